@@ -3,9 +3,9 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.db.database import get_db
+from app.core.container import ServiceContainer, get_container
 from app.models.schemas import DocumentUpload, DocumentProcessResponse, UserCreate, UserResponse
 from app.services.admin_service import AdminService
-from app.services.document_processor import DocumentProcessor
 
 router = APIRouter()
 
@@ -15,12 +15,13 @@ async def upload_document(
     category: str = "General",
     title: str = "",
     description: str = "",
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
 ):
     """Upload and process a new HR document"""
     try:
-        admin_service = AdminService(db)
-        processor = DocumentProcessor()
+        admin_service = AdminService(db, container)
+        processor = container.document_processor
         
         # Save uploaded file
         file_path = f"uploads/{file.filename}"
@@ -42,7 +43,8 @@ async def upload_document(
         return DocumentProcessResponse(
             success=True,
             chunks_created=result.get("chunks_created", 0),
-            message="Document processed successfully"
+            message="Document processed successfully",
+            ingest_stats=result.get("ingest_stats")
         )
         
     except Exception as e:
@@ -50,11 +52,12 @@ async def upload_document(
 
 @router.get("/users", response_model=List[UserResponse])
 async def get_users(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
 ):
     """Get all users"""
     try:
-        admin_service = AdminService(db)
+        admin_service = AdminService(db, container)
         users = await admin_service.get_users()
         return users
         
@@ -64,11 +67,12 @@ async def get_users(
 @router.post("/users", response_model=UserResponse)
 async def create_user(
     user: UserCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
 ):
     """Create a new user"""
     try:
-        admin_service = AdminService(db)
+        admin_service = AdminService(db, container)
         new_user = await admin_service.create_user(user)
         return new_user
         
@@ -77,24 +81,56 @@ async def create_user(
 
 @router.get("/system-health")
 async def get_system_health(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
 ):
     """Get system health status"""
     try:
-        admin_service = AdminService(db)
+        admin_service = AdminService(db, container)
         health = await admin_service.get_system_health()
         return health
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking system health: {str(e)}")
 
+@router.get("/metrics")
+async def get_metrics(
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
+):
+    """Get runtime metrics such as embedding cache hit rates"""
+    try:
+        admin_service = AdminService(db, container)
+        return await admin_service.get_metrics()
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching metrics: {str(e)}")
+
+@router.get("/vector-store/recall")
+async def evaluate_vector_recall(
+    k: int = 10,
+    samples: int = 100,
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
+):
+    """Measure recall@k of the quantized vector index against exact search"""
+    try:
+        admin_service = AdminService(db, container)
+        return await admin_service.evaluate_vector_recall(k=k, samples=samples)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error evaluating recall: {str(e)}")
+
 @router.post("/reindex")
 async def reindex_documents(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
 ):
     """Reindex all documents in the vector database"""
     try:
-        admin_service = AdminService(db)
+        admin_service = AdminService(db, container)
         result = await admin_service.reindex_documents()
         return {"message": "Reindexing completed", "documents_processed": result}
         
@@ -103,11 +139,12 @@ async def reindex_documents(
 
 @router.get("/backup")
 async def create_backup(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
 ):
     """Create a backup of the system data"""
     try:
-        admin_service = AdminService(db)
+        admin_service = AdminService(db, container)
         backup_path = await admin_service.create_backup()
         return {"message": "Backup created successfully", "backup_path": backup_path}
         
@@ -3,8 +3,10 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.db.database import get_db
+from app.core.container import get_document_processor
 from app.models.schemas import PolicyCreate, PolicyResponse, PolicyChunkResponse
 from app.services.policy_service import PolicyService
+from app.services.document_processor import DocumentProcessor
 
 router = APIRouter()
 
@@ -12,11 +14,12 @@ router = APIRouter()
 async def get_policies(
     category: Optional[str] = None,
     is_active: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    document_processor: DocumentProcessor = Depends(get_document_processor)
 ):
     """Get all policies, optionally filtered by category"""
     try:
-        policy_service = PolicyService(db)
+        policy_service = PolicyService(db, document_processor)
         policies = await policy_service.get_policies(category, is_active)
         return policies
         
@@ -26,11 +29,12 @@ async def get_policies(
 @router.get("/{policy_id}", response_model=PolicyResponse)
 async def get_policy(
     policy_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    document_processor: DocumentProcessor = Depends(get_document_processor)
 ):
     """Get a specific policy by ID"""
     try:
-        policy_service = PolicyService(db)
+        policy_service = PolicyService(db, document_processor)
         policy = await policy_service.get_policy(policy_id)
         if not policy:
             raise HTTPException(status_code=404, detail="Policy not found")
@@ -44,11 +48,12 @@ async def get_policy(
 @router.post("/", response_model=PolicyResponse)
 async def create_policy(
     policy: PolicyCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    document_processor: DocumentProcessor = Depends(get_document_processor)
 ):
     """Create a new policy"""
     try:
-        policy_service = PolicyService(db)
+        policy_service = PolicyService(db, document_processor)
         new_policy = await policy_service.create_policy(policy)
         return new_policy
         
@@ -59,11 +64,12 @@ async def create_policy(
 async def update_policy(
     policy_id: int,
     policy: PolicyCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    document_processor: DocumentProcessor = Depends(get_document_processor)
 ):
     """Update an existing policy"""
     try:
-        policy_service = PolicyService(db)
+        policy_service = PolicyService(db, document_processor)
         updated_policy = await policy_service.update_policy(policy_id, policy)
         if not updated_policy:
             raise HTTPException(status_code=404, detail="Policy not found")
@@ -77,11 +83,12 @@ async def update_policy(
 @router.delete("/{policy_id}")
 async def delete_policy(
     policy_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    document_processor: DocumentProcessor = Depends(get_document_processor)
 ):
     """Delete a policy (soft delete)"""
     try:
-        policy_service = PolicyService(db)
+        policy_service = PolicyService(db, document_processor)
         success = await policy_service.delete_policy(policy_id)
         if not success:
             raise HTTPException(status_code=404, detail="Policy not found")
@@ -95,11 +102,12 @@ async def delete_policy(
 @router.get("/{policy_id}/chunks", response_model=List[PolicyChunkResponse])
 async def get_policy_chunks(
     policy_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    document_processor: DocumentProcessor = Depends(get_document_processor)
 ):
     """Get chunks for a specific policy"""
     try:
-        policy_service = PolicyService(db)
+        policy_service = PolicyService(db, document_processor)
         chunks = await policy_service.get_policy_chunks(policy_id)
         return chunks
         
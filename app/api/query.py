@@ -1,56 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from typing import List
+import json
 import time
 
-from app.db.database import get_db
-from app.models.schemas import QueryRequest, QueryResponse, QueryFeedbackRequest
+from app.core.config import settings
+from app.core.container import get_query_service
+from app.models.schemas import QueryRequest, QueryResponse, QueryFeedbackRequest, BatchQueryRequest
 from app.services.query_service import QueryService
-from app.services.vector_search import VectorSearchService
+from app.services.spans import start_spans
 
 router = APIRouter()
 
 @router.post("/", response_model=QueryResponse)
 async def process_query(
     query_request: QueryRequest,
-    db: Session = Depends(get_db)
+    response: Response,
+    query_service: QueryService = Depends(get_query_service)
 ):
     """Process an HR policy query and return AI-generated response"""
     try:
         start_time = time.time()
-        
-        # Initialize services
-        query_service = QueryService(db)
-        vector_search = VectorSearchService()
+        spans = start_spans()
         
         # Process the query
         result = await query_service.process_query(
             question=query_request.question,
             user_id=query_request.user_id,
-            context=query_request.context
+            context=query_request.context,
+            nprobe=query_request.nprobe,
+            mode=query_request.mode
         )
         
         response_time = int((time.time() - start_time) * 1000)
+        if settings.SERVER_TIMING_ENABLED:
+            response.headers["Server-Timing"] = spans.server_timing()
         
         return QueryResponse(
             answer=result["answer"],
             confidence_score=result["confidence_score"],
             sources=result["sources"],
             suggested_forms=result["suggested_forms"],
-            response_time_ms=response_time
+            response_time_ms=response_time,
+            query_id=result.get("query_id")
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+@router.post("/batch")
+async def process_query_batch(
+    batch_request: BatchQueryRequest,
+    query_service: QueryService = Depends(get_query_service)
+):
+    """Process several HR policy queries, streaming one JSON line per answer as it completes"""
+    if not batch_request.questions:
+        raise HTTPException(status_code=400, detail="At least one question is required")
+    if len(batch_request.questions) > settings.QUERY_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {settings.QUERY_BATCH_MAX_SIZE} questions"
+        )
+    
+    start_time = time.time()
+    
+    async def stream_answers():
+        async for index, result in query_service.process_batch(
+            questions=batch_request.questions,
+            user_id=batch_request.user_id,
+            context=batch_request.context,
+            nprobe=batch_request.nprobe,
+            max_concurrency=settings.QUERY_BATCH_LLM_CONCURRENCY
+        ):
+            yield json.dumps({
+                "index": index,
+                "question": batch_request.questions[index],
+                "answer": result["answer"],
+                "confidence_score": result["confidence_score"],
+                "sources": result["sources"],
+                "suggested_forms": result["suggested_forms"],
+                "query_id": result.get("query_id"),
+                "response_time_ms": int((time.time() - start_time) * 1000)
+            }) + "\n"
+    
+    return StreamingResponse(stream_answers(), media_type="application/x-ndjson")
+
+@router.post("/stream")
+async def stream_query(
+    query_request: QueryRequest,
+    query_service: QueryService = Depends(get_query_service)
+):
+    """Process an HR policy query, streaming sources, answer tokens and a final summary as Server-Sent Events"""
+    start_time = time.time()
+    
+    async def stream_events():
+        spans = start_spans()
+        async for event, data in query_service.stream_query(
+            question=query_request.question,
+            user_id=query_request.user_id,
+            context=query_request.context,
+            nprobe=query_request.nprobe,
+            mode=query_request.mode
+        ):
+            if event == "done":
+                data = {**data, "response_time_ms": int((time.time() - start_time) * 1000)}
+                if settings.SERVER_TIMING_ENABLED:
+                    # Headers are long gone by now, so the stage timings ride on the final event
+                    data["timings"] = spans.durations()
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/feedback")
 async def submit_feedback(
     feedback: QueryFeedbackRequest,
-    db: Session = Depends(get_db)
+    query_service: QueryService = Depends(get_query_service)
 ):
     """Submit feedback on a query response"""
     try:
-        query_service = QueryService(db)
         await query_service.submit_feedback(feedback)
         return {"message": "Feedback submitted successfully"}
         
@@ -61,11 +132,10 @@ async def submit_feedback(
 async def get_query_history(
     user_id: str,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    query_service: QueryService = Depends(get_query_service)
 ):
     """Get query history for a user"""
     try:
-        query_service = QueryService(db)
         history = await query_service.get_query_history(user_id, limit)
         return history
         
@@ -9,14 +9,113 @@ class Settings(BaseSettings):
     
     # OpenAI
     OPENAI_API_KEY: str = ""
+    OPENAI_MODEL: str = "gpt-3.5-turbo"
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"  # any OpenAI-compatible API, e.g. llm_stub_server.py
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Vector store
+    VECTOR_STORE_BACKEND: str = "chroma"  # chroma, numpy, int8, binary, ivf or partitioned
+    VECTOR_STORE_PATH: str = "./vector_index"
+    VECTOR_STORE_MAX_BATCH_SIZE: int = 5000
+    VECTOR_STORE_PARTITION_BACKEND: str = "numpy"  # per-category index used by the partitioned backend
+    VECTOR_STORE_RESCORE_FACTOR: Optional[int] = None  # int8/binary shortlist multiplier, defaults per mode
+    IVF_N_LISTS: int = 0  # 0 sizes the lists as sqrt(chunk count) at training time
+    IVF_NPROBE: int = 8
+    IVF_MIN_TRAIN_SIZE: int = 1024
+    
     # ChromaDB
     CHROMA_PERSIST_DIRECTORY: str = "./chroma_db"
+    CHROMA_COLLECTION_NAME: str = "hr_policies"
+    
+    # Embeddings
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_CACHE_SIZE: int = 2048
+    EMBEDDING_CACHE_TTL_SECONDS: Optional[float] = None
+    EMBEDDING_BATCH_WINDOW_MS: float = 3.0
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    
+    # Hybrid retrieval
+    HYBRID_SEARCH_ENABLED: bool = True
+    HYBRID_RRF_K: int = 60
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    BM25_DECISIVE_RATIO: float = 2.0  # skip vector search when the top BM25 hit beats the next by this factor; 0 disables
+    
+    # Context assembly
+    CONTEXT_MAX_TOKENS: int = 1500  # prompt budget for retrieved chunks, counted for OPENAI_MODEL
+    CONTEXT_MMR_LAMBDA: float = 0.7  # 1.0 ranks purely by relevance, lower values favour diverse chunks
+    CONTEXT_DUPLICATE_THRESHOLD: float = 0.9  # chunks at least this similar to a kept chunk are dropped
+    CONTEXT_SCORE_GAP: float = 0.3  # cut after a score drop of this fraction of the top score
+    CONTEXT_MIN_CHUNKS: int = 2
+    
+    # Answer cache
+    ANSWER_CACHE_SIZE: int = 1000  # 0 disables the cache
+    ANSWER_CACHE_MAX_MB: float = 16.0
+    ANSWER_CACHE_TTL_SECONDS: Optional[float] = 3600.0  # bounds staleness of cached suggested forms
+    
+    # LLM client
+    LLM_TIMEOUT_SECONDS: float = 30.0  # deadline per answer, retries included
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BACKOFF_SECONDS: float = 0.5
+    LLM_HEDGE_ENABLED: bool = True  # send a second request once a call outlives the recent p95
+    LLM_HEDGE_MIN_MS: float = 500.0
+    LLM_BREAKER_FAILURES: int = 5  # consecutive failed calls before answering from retrieval only
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+    
+    # Query routing by retrieval score; thresholds are cosine similarities (every backend reports cosine distance)
+    ROUTING_ENABLED: bool = True
+    ROUTING_SIMILARITY_FLOOR: float = 0.25  # below this the question is not covered by any policy
+    ROUTING_EXTRACTIVE_CEILING: float = 0.85  # at or above this the top chunk is quoted instead of calling the LLM
+    
+    # Extractive answers (LLM-free mode, high-confidence routing tier and LLM fallback)
+    EXTRACTIVE_MAX_SENTENCES: int = 3
+    EXTRACTIVE_MIN_SCORE: float = 0.3  # sentence-to-question cosine similarity
+    EXTRACTIVE_CACHE_SIZE: int = 2048  # chunks whose sentence embeddings are kept
+    
+    # Policy facts (amounts, percentages, time limits) extracted at ingest and answered before retrieval
+    FACT_INDEX_ENABLED: bool = True
+    FACT_MIN_SCORE: float = 2.0  # question-to-fact match score needed to answer from the fact table
+    
+    # Coalesce identical questions that are in flight at the same time
+    QUERY_COALESCING_ENABLED: bool = True
+    
+    # Semantic answer cache (paraphrased questions)
+    SEMANTIC_CACHE_SIZE: int = 5000  # 0 disables the cache
+    SEMANTIC_CACHE_THRESHOLD: float = 0.85  # question embedding cosine similarity
+    SEMANTIC_CACHE_MIN_OVERLAP: float = 0.6  # share of the cached answer's chunks that must be retrieved again
+    SEMANTIC_CACHE_SAMPLE_RATE: float = 0.05  # share of hits re-answered to measure false hits
+    
+    # Background query log: batched inserts of queries, suggested forms and feedback
+    QUERY_LOG_QUEUE_SIZE: int = 10000  # submitting waits once this many records are queued
+    QUERY_LOG_FLUSH_SIZE: int = 200  # records per transaction
+    QUERY_LOG_FLUSH_INTERVAL_MS: float = 50.0  # longest wait for a batch to fill
+    QUERY_LOG_ID_BLOCK_SIZE: int = 100  # query IDs reserved per database round trip
+    
+    # Per-stage timings in a Server-Timing header (and the final stream event)
+    SERVER_TIMING_ENABLED: bool = True
+    
+    # Batch queries
+    QUERY_BATCH_MAX_SIZE: int = 100
+    QUERY_BATCH_LLM_CONCURRENCY: int = 8
+    
+    # Related-policy neighbour graph
+    NEIGHBOUR_GRAPH_PATH: str = "./neighbour_graph.json"
+    NEIGHBOUR_GRAPH_SIZE: int = 10
+    
+    # Concurrency
+    CPU_EXECUTOR_WORKERS: Optional[int] = None  # Defaults to the number of cores
+    IO_EXECUTOR_WORKERS: int = 16
+    SEARCH_EXECUTOR_WORKERS: Optional[int] = None  # Partition fan-out; defaults to the number of cores
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_BLOCK_THRESHOLD_MS: float = 100.0
     
     # Email
     SMTP_SERVER: Optional[str] = None
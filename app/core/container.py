@@ -0,0 +1,221 @@
+from fastapi import Depends, Request
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+import asyncio
+from sentence_transformers import SentenceTransformer
+
+from app.core.config import settings
+from app.core.executors import executors, run_cpu, run_io
+from app.core.loop_monitor import LoopMonitor
+from app.db.database import SessionLocal, get_db
+from app.services.vector_search import VectorSearchService
+from app.services.document_processor import DocumentProcessor
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.lexical_index import LexicalIndex
+from app.services.fact_index import FactIndex
+from app.services.neighbour_graph import NeighbourGraph
+from app.services.context_builder import ContextBuilder
+from app.services.pipeline import StageTimings
+from app.services.query_log_writer import QueryLogWriter
+from app.services.query_service import QueryService, SYSTEM_PROMPT, ANSWER_PROMPT
+from app.services.answer_cache import AnswerCache
+from app.services.semantic_cache import SemanticCache
+from app.services.singleflight import Singleflight
+from app.services.llm_client import LLMClient, CircuitBreaker
+from app.services.query_router import QueryRouter
+from app.services.extractive_answerer import ExtractiveAnswerer
+from app.services.vector_stores.factory import create_vector_store
+
+class ServiceContainer:
+    """Application-scoped owner of the embedding model, vector store and long-lived services"""
+
+    def __init__(self):
+        # Loaded once per process and shared by every request
+        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
+        self.vector_store = create_vector_store(settings.VECTOR_STORE_BACKEND)
+
+        self.embedding_cache = EmbeddingCache(
+            model_id=settings.EMBEDDING_MODEL_NAME,
+            max_size=settings.EMBEDDING_CACHE_SIZE,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS
+        )
+        self.embedding_batcher = EmbeddingBatcher(
+            self.embedding_model,
+            window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE
+        )
+
+        self.loop_monitor = LoopMonitor(threshold_ms=settings.LOOP_BLOCK_THRESHOLD_MS)
+        self.lexical_index = LexicalIndex(k1=settings.BM25_K1, b=settings.BM25_B)
+        self.fact_index = FactIndex(min_score=settings.FACT_MIN_SCORE) if settings.FACT_INDEX_ENABLED else None
+        self.neighbour_graph = NeighbourGraph(
+            self.vector_store,
+            path=settings.NEIGHBOUR_GRAPH_PATH,
+            n_neighbours=settings.NEIGHBOUR_GRAPH_SIZE
+        )
+        self._graph_build: Optional[asyncio.Task] = None
+
+        self.vector_search = VectorSearchService(
+            self.embedding_model,
+            self.vector_store,
+            self.embedding_cache,
+            self.embedding_batcher,
+            lexical_index=self.lexical_index if settings.HYBRID_SEARCH_ENABLED else None,
+            rrf_k=settings.HYBRID_RRF_K,
+            decisive_ratio=settings.BM25_DECISIVE_RATIO,
+            neighbour_graph=self.neighbour_graph
+        )
+        self.context_builder = ContextBuilder(
+            model=settings.OPENAI_MODEL,
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            mmr_lambda=settings.CONTEXT_MMR_LAMBDA,
+            duplicate_threshold=settings.CONTEXT_DUPLICATE_THRESHOLD,
+            score_gap=settings.CONTEXT_SCORE_GAP,
+            min_chunks=settings.CONTEXT_MIN_CHUNKS
+        )
+        self.answer_cache = AnswerCache(
+            model=settings.OPENAI_MODEL,
+            prompt_template=SYSTEM_PROMPT + ANSWER_PROMPT,
+            max_entries=settings.ANSWER_CACHE_SIZE,
+            max_bytes=int(settings.ANSWER_CACHE_MAX_MB * 1024 * 1024),
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS
+        )
+        self.semantic_cache = SemanticCache(
+            self.answer_cache,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            min_overlap=settings.SEMANTIC_CACHE_MIN_OVERLAP,
+            max_entries=settings.SEMANTIC_CACHE_SIZE,
+            sample_rate=settings.SEMANTIC_CACHE_SAMPLE_RATE
+        ) if settings.SEMANTIC_CACHE_SIZE > 0 else None
+        self.llm_client = LLMClient(
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.OPENAI_MODEL,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            connect_timeout=settings.LLM_CONNECT_TIMEOUT_SECONDS,
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            max_retries=settings.LLM_MAX_RETRIES,
+            backoff_seconds=settings.LLM_RETRY_BACKOFF_SECONDS,
+            hedge=settings.LLM_HEDGE_ENABLED,
+            hedge_min_ms=settings.LLM_HEDGE_MIN_MS,
+            breaker=CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SECONDS)
+        )
+        self.router = QueryRouter(
+            similarity_floor=settings.ROUTING_SIMILARITY_FLOOR,
+            extractive_ceiling=settings.ROUTING_EXTRACTIVE_CEILING,
+            enabled=settings.ROUTING_ENABLED
+        )
+        self.extractive_answerer = ExtractiveAnswerer(
+            self.vector_search,
+            max_sentences=settings.EXTRACTIVE_MAX_SENTENCES,
+            min_score=settings.EXTRACTIVE_MIN_SCORE,
+            cache_size=settings.EXTRACTIVE_CACHE_SIZE
+        )
+        self.singleflight = Singleflight() if settings.QUERY_COALESCING_ENABLED else None
+        self.query_log = QueryLogWriter(
+            SessionLocal,
+            max_queue=settings.QUERY_LOG_QUEUE_SIZE,
+            flush_size=settings.QUERY_LOG_FLUSH_SIZE,
+            flush_interval_ms=settings.QUERY_LOG_FLUSH_INTERVAL_MS,
+            id_block_size=settings.QUERY_LOG_ID_BLOCK_SIZE
+        )
+        self.stage_timings = StageTimings()
+        self.document_processor = DocumentProcessor(
+            self.embedding_model,
+            self.vector_store,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            write_batch_size=self.vector_store.max_batch_size,
+            lexical_index=self.lexical_index,
+            neighbour_graph=self.neighbour_graph,
+            answer_cache=self.answer_cache,
+            fact_index=self.fact_index
+        )
+
+    async def start(self) -> None:
+        """Start background workers owned by the container"""
+        await self.rebuild_text_indexes()
+        if len(self.neighbour_graph) == 0 and await run_io(self.vector_store.count) > 0:
+            # Chunks ingested before the graph existed; built off the loop without delaying startup
+            self._graph_build = asyncio.create_task(run_io(self.neighbour_graph.rebuild))
+        await self.embedding_batcher.start()
+        await self.query_log.start()
+        if settings.LOOP_MONITOR_ENABLED:
+            await self.loop_monitor.start()
+
+    async def rebuild_text_indexes(self) -> None:
+        """Load every stored chunk into the in-memory BM25 and fact indexes"""
+        stored = await run_io(self.vector_store.get, include=["documents", "metadatas"])
+        await run_cpu(self.lexical_index.rebuild, stored["ids"], stored["documents"], stored["metadatas"])
+        if self.fact_index is not None:
+            await run_cpu(self.fact_index.rebuild, stored["ids"], stored["documents"], stored["metadatas"])
+
+    async def stop(self) -> None:
+        """Stop background workers owned by the container"""
+        await self.loop_monitor.stop()
+        await self.embedding_batcher.stop()
+        await self.query_log.stop()
+        await self.llm_client.close()
+        if self._graph_build is not None:
+            await self._graph_build
+        executors.shutdown()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Collect runtime counters from the shared services"""
+        return {
+            "embedding_cache": self.embedding_cache.stats(),
+            "embedding_batcher": self.embedding_batcher.stats(),
+            "executors": {
+                "cpu_workers": executors.cpu_workers,
+                "io_workers": executors.io_workers,
+                "search_workers": executors.search_workers
+            },
+            "event_loop": self.loop_monitor.stats(),
+            "retrieval": self.vector_search.stats(),
+            "context": self.context_builder.stats(),
+            "answer_cache": self.answer_cache.stats(),
+            "semantic_cache": self.semantic_cache.stats() if self.semantic_cache is not None else None,
+            "query_stages": self.stage_timings.stats(),
+            "llm": self.llm_client.stats(),
+            "query_routing": self.router.stats(),
+            "extractive": self.extractive_answerer.stats(),
+            "query_coalescing": self.singleflight.stats() if self.singleflight is not None else None,
+            "query_log": self.query_log.stats(),
+            "lexical_index": self.lexical_index.stats(),
+            "fact_index": self.fact_index.stats() if self.fact_index is not None else None,
+            "neighbour_graph": self.neighbour_graph.stats(),
+            "vector_store": self.vector_store.stats()
+        }
+
+def get_container(request: Request) -> ServiceContainer:
+    """Dependency to get the application service container"""
+    return request.app.state.container
+
+def get_vector_search(container: ServiceContainer = Depends(get_container)) -> VectorSearchService:
+    """Dependency to get the shared vector search service"""
+    return container.vector_search
+
+def get_query_service(
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
+) -> QueryService:
+    """Dependency to get a query service wired to the shared services"""
+    return QueryService(
+        db,
+        container.vector_search,
+        context_builder=container.context_builder,
+        query_log=container.query_log,
+        stage_timings=container.stage_timings,
+        answer_cache=container.answer_cache,
+        semantic_cache=container.semantic_cache,
+        singleflight=container.singleflight,
+        llm_client=container.llm_client,
+        router=container.router,
+        extractive_answerer=container.extractive_answerer,
+        fact_index=container.fact_index
+    )
+
+def get_document_processor(container: ServiceContainer = Depends(get_container)) -> DocumentProcessor:
+    """Dependency to get the shared document processor"""
+    return container.document_processor
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+import functools
+import os
+
+from app.core.config import settings
+
+class Executors:
+    """Dedicated thread pools for CPU-bound work (embedding), blocking I/O (vector store, DB)
+    and fan-out searches issued from inside the I/O pool (vector store partitions)"""
+
+    def __init__(self, cpu_workers: Optional[int] = None, io_workers: Optional[int] = None,
+                 search_workers: Optional[int] = None):
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.io_workers = io_workers or 16
+        self.search_workers = search_workers or os.cpu_count() or 1
+        self._cpu: Optional[ThreadPoolExecutor] = None
+        self._io: Optional[ThreadPoolExecutor] = None
+        self._search: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def cpu(self) -> ThreadPoolExecutor:
+        if self._cpu is None:
+            self._cpu = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix="cpu")
+        return self._cpu
+
+    @property
+    def io(self) -> ThreadPoolExecutor:
+        if self._io is None:
+            self._io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="io")
+        return self._io
+
+    @property
+    def search(self) -> ThreadPoolExecutor:
+        if self._search is None:
+            self._search = ThreadPoolExecutor(max_workers=self.search_workers, thread_name_prefix="search")
+        return self._search
+
+    def shutdown(self) -> None:
+        """Wait for queued work and release all pools"""
+        for pool in (self._cpu, self._io, self._search):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self._cpu = None
+        self._io = None
+        self._search = None
+
+executors = Executors(settings.CPU_EXECUTOR_WORKERS, settings.IO_EXECUTOR_WORKERS, settings.SEARCH_EXECUTOR_WORKERS)
+
+async def run_cpu(fn: Callable, *args, **kwargs) -> Any:
+    """Run a CPU-bound callable on the CPU pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executors.cpu, functools.partial(fn, *args, **kwargs))
+
+async def run_io(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking I/O callable on the I/O pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executors.io, functools.partial(fn, *args, **kwargs))
+
+def io_bound(fn: Callable) -> Callable:
+    """Turn a blocking method into an awaitable that runs on the I/O pool"""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_io(fn, *args, **kwargs)
+    return wrapper
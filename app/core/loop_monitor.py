@@ -0,0 +1,94 @@
+from collections import deque
+from typing import Dict, Any, Optional
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+class LoopMonitor:
+    """Report synchronous calls that hold the event loop for longer than a threshold
+
+    A coroutine on the loop records a heartbeat; a watchdog thread notices when the
+    heartbeat stalls and captures the loop thread's stack, which names the blocking call.
+    """
+
+    def __init__(self, threshold_ms: float = 100.0, interval_ms: float = 20.0):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._stall_reported = False
+
+        self.stalls = 0
+        self.max_stall_ms = 0.0
+        self.recent_stalls = deque(maxlen=20)
+
+    async def start(self) -> None:
+        """Start the heartbeat on the running loop and the watchdog thread"""
+        if self._heartbeat is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring"""
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _beat(self) -> None:
+        while True:
+            now = time.monotonic()
+            stalled_for = now - self._last_beat - self.interval
+            if self._stall_reported:
+                self.max_stall_ms = max(self.max_stall_ms, stalled_for * 1000)
+                if self.recent_stalls:
+                    self.recent_stalls[-1]["blocked_ms"] = round(stalled_for * 1000, 1)
+                self._stall_reported = False
+            self._last_beat = now
+            await asyncio.sleep(self.interval)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            blocked = time.monotonic() - self._last_beat - self.interval
+            if blocked > self.threshold and not self._stall_reported:
+                self._stall_reported = True
+                self._record_stall(blocked)
+
+    def _record_stall(self, blocked: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame, limit=8) if frame is not None else []
+        self.stalls += 1
+        self.recent_stalls.append({
+            "detected_at": datetime.now().isoformat(),
+            "blocked_ms": round(blocked * 1000, 1),
+            "stack": [line.strip() for line in stack]
+        })
+        location = stack[-1].strip().splitlines()[0] if stack else "unknown location"
+        print(f"Event loop blocked for more than {self.threshold * 1000:.0f}ms at {location}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get stall counters and the most recent blocking stacks"""
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "stalls": self.stalls,
+            "max_stall_ms": round(self.max_stall_ms, 1),
+            "recent_stalls": list(self.recent_stalls)
+        }
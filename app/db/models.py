@@ -75,6 +75,7 @@ class Query(Base):
     # Relationships
     feedback = relationship("QueryFeedback", back_populates="query")
     suggested_forms = relationship("QueryForm", back_populates="query")
+    stage_timings = relationship("QueryStageTiming", back_populates="query")
 
 class QueryFeedback(Base):
     __tablename__ = "query_feedback"
@@ -102,6 +103,23 @@ class QueryForm(Base):
     query = relationship("Query", back_populates="suggested_forms")
     form = relationship("Form")
 
+class QueryStageTiming(Base):
+    __tablename__ = "query_stage_timings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    query_id = Column(Integer, ForeignKey("queries.id"), index=True)
+    stage = Column(String(20), nullable=False)  # embed, search, context, llm, forms, persist, ...
+    duration_ms = Column(Float, nullable=False)
+    
+    # Relationships
+    query = relationship("Query", back_populates="stage_timings")
+
+class IdBlock(Base):
+    __tablename__ = "id_blocks"
+    
+    name = Column(String(50), primary_key=True)  # Table the IDs are for
+    next_id = Column(Integer, nullable=False)  # First ID not yet handed to any writer
+
 class User(Base):
     __tablename__ = "users"
     
@@ -2,11 +2,13 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
+from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
 from app.api import query, policies, forms, analytics, admin
 from app.core.config import settings
+from app.core.container import ServiceContainer
 from app.db.database import engine
 from app.db import models
 
@@ -16,11 +18,20 @@ load_dotenv()
 # Create database tables
 models.Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the shared service container once per process"""
+    app.state.container = ServiceContainer()
+    await app.state.container.start()
+    yield
+    await app.state.container.stop()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="HR Policies & Benefits Copilot",
     description="AI-powered HR assistant for policy queries and form management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
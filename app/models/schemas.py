@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 
 # Query Models
@@ -7,6 +7,8 @@ class QueryRequest(BaseModel):
     question: str
     user_id: Optional[str] = None
     context: Optional[str] = None
+    nprobe: Optional[int] = None  # IVF lists to probe; higher trades latency for recall
+    mode: Literal["auto", "extractive", "llm"] = "auto"  # extractive never calls the LLM
 
 class QueryResponse(BaseModel):
     answer: str
@@ -14,6 +16,13 @@ class QueryResponse(BaseModel):
     sources: List[str]
     suggested_forms: List['FormResponse']
     response_time_ms: int
+    query_id: Optional[int] = None  # For feedback; None when the question was not recorded
+
+class BatchQueryRequest(BaseModel):
+    questions: List[str]
+    user_id: Optional[str] = None
+    context: Optional[str] = None
+    nprobe: Optional[int] = None
 
 class QueryFeedbackRequest(BaseModel):
     query_id: int
@@ -128,4 +137,5 @@ class DocumentProcessResponse(BaseModel):
     success: bool
     chunks_created: int
     message: str
+    ingest_stats: Optional[Dict[str, Any]] = None
 
@@ -5,19 +5,24 @@ import os
 import json
 from app.db.models import User, Policy, Form, Query
 from app.models.schemas import UserCreate, UserResponse, DocumentProcessResponse
-from app.services.document_processor import DocumentProcessor
+from app.core.config import settings
+from app.core.container import ServiceContainer
+from app.core.executors import io_bound, run_io
 
 class AdminService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, container: ServiceContainer):
         self.db = db
-        self.document_processor = DocumentProcessor()
+        self.container = container
+        self.document_processor = container.document_processor
     
-    async def get_users(self) -> List[UserResponse]:
+    @io_bound
+    def get_users(self) -> List[UserResponse]:
         """Get all users"""
         users = self.db.query(User).all()
         return [UserResponse.from_orm(user) for user in users]
     
-    async def create_user(self, user_data: UserCreate) -> UserResponse:
+    @io_bound
+    def create_user(self, user_data: UserCreate) -> UserResponse:
         """Create a new user"""
         user = User(
             employee_id=user_data.employee_id,
@@ -33,7 +38,8 @@ class AdminService:
         
         return UserResponse.from_orm(user)
     
-    async def get_system_health(self) -> Dict[str, Any]:
+    @io_bound
+    def get_system_health(self) -> Dict[str, Any]:
         """Get system health status"""
         try:
             # Database health
@@ -46,8 +52,8 @@ class AdminService:
             # Vector database health
             vector_health = "healthy"
             try:
-                collections = self.document_processor.chroma_client.list_collections()
-                vector_health = "healthy" if collections else "no_data"
+                chunk_count = self.container.vector_store.count()
+                vector_health = "healthy" if chunk_count else "no_data"
             except Exception:
                 vector_health = "unhealthy"
             
@@ -83,15 +89,25 @@ class AdminService:
                 "timestamp": datetime.now().isoformat()
             }
     
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Get runtime metrics for caches and shared services"""
+        return self.container.get_metrics()
+    
+    async def evaluate_vector_recall(self, k: int = 10, samples: int = 100) -> Dict[str, Any]:
+        """Compare quantized search results against exact float search"""
+        vector_store = self.container.vector_store
+        if not hasattr(vector_store, "evaluate_recall"):
+            raise ValueError(f"Vector store backend '{settings.VECTOR_STORE_BACKEND}' is not quantized")
+        return await run_io(vector_store.evaluate_recall, k=k, samples=samples)
+    
     async def reindex_documents(self) -> int:
         """Reindex all documents in the vector database"""
         try:
             # Get all policies
-            policies = self.db.query(Policy).filter(Policy.is_active == True).all()
+            policies = await run_io(self.db.query(Policy).filter(Policy.is_active == True).all)
             
-            # Clear existing vector database
-            self.document_processor.chroma_client.delete_collection("hr_policies")
-            self.document_processor.collection = self.document_processor.chroma_client.create_collection("hr_policies")
+            # Clear existing vector database and lexical index
+            await self.document_processor.clear()
             
             # Reprocess all policies
             processed_count = 0
@@ -100,7 +116,8 @@ class AdminService:
                     file_path=f"temp_policy_{policy.id}.txt",
                     category=policy.category,
                     title=policy.title,
-                    description=f"Policy: {policy.title}"
+                    description=f"Policy: {policy.title}",
+                    policy_id=policy.id
                 )
                 
                 if result["success"]:
@@ -115,7 +132,8 @@ class AdminService:
             print(f"Error reindexing documents: {e}")
             return 0
     
-    async def _update_policy_chunks(self, policy, chunk_ids: List[str]) -> None:
+    @io_bound
+    def _update_policy_chunks(self, policy, chunk_ids: List[str]) -> None:
         """Update policy chunks in database"""
         # Delete existing chunks
         from app.db.models import PolicyChunk
@@ -133,7 +151,8 @@ class AdminService:
         
         self.db.commit()
     
-    async def store_processed_document(self, result: Dict[str, Any]) -> None:
+    @io_bound
+    def store_processed_document(self, result: Dict[str, Any]) -> None:
         """Store processed document results in database"""
         try:
             if result["success"]:
@@ -165,7 +184,8 @@ class AdminService:
         except Exception as e:
             print(f"Error storing processed document: {e}")
     
-    async def create_backup(self) -> str:
+    @io_bound
+    def create_backup(self) -> str:
         """Create a backup of the system data"""
         try:
             backup_dir = "backups"
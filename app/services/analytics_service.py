@@ -2,14 +2,16 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, and_
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from app.db.models import Query, QueryFeedback, Policy, Form
+from app.db.models import Query, QueryFeedback, QueryStageTiming, Policy, Form
 from app.models.schemas import AnalyticsResponse, QueryAnalytics
+from app.core.executors import io_bound
 
 class AnalyticsService:
     def __init__(self, db: Session):
         self.db = db
     
-    async def get_analytics(self, days: int = 30) -> AnalyticsResponse:
+    @io_bound
+    def get_analytics(self, days: int = 30) -> AnalyticsResponse:
         """Get comprehensive system analytics"""
         start_date = datetime.now() - timedelta(days=days)
         
@@ -84,7 +86,8 @@ class AnalyticsService:
             misrouting_rate=float(misrouting_rate)
         )
     
-    async def get_query_analytics(self, limit: int = 100, offset: int = 0, 
+    @io_bound
+    def get_query_analytics(self, limit: int = 100, offset: int = 0, 
                                  start_date: Optional[datetime] = None, 
                                  end_date: Optional[datetime] = None) -> List[QueryAnalytics]:
         """Get detailed query analytics"""
@@ -119,7 +122,8 @@ class AnalyticsService:
             for q in queries
         ]
     
-    async def get_performance_metrics(self, days: int = 7) -> Dict[str, Any]:
+    @io_bound
+    def get_performance_metrics(self, days: int = 7) -> Dict[str, Any]:
         """Get performance metrics"""
         start_date = datetime.now() - timedelta(days=days)
         
@@ -139,6 +143,28 @@ class AnalyticsService:
         
         confidence_list = [cs[0] for cs in confidence_scores]
         
+        # Where the time goes, per stage; stages can overlap, so shares may add up to more than 1
+        stage_rows = self.db.query(
+            QueryStageTiming.stage,
+            func.count(QueryStageTiming.id),
+            func.avg(QueryStageTiming.duration_ms),
+            func.max(QueryStageTiming.duration_ms),
+            func.sum(QueryStageTiming.duration_ms)
+        ).join(Query).filter(
+            Query.created_at >= start_date
+        ).group_by(QueryStageTiming.stage).all()
+        
+        total_response_time = sum(response_times_list)
+        stages = {
+            stage: {
+                "count": count,
+                "avg_ms": avg_ms,
+                "max_ms": max_ms,
+                "share": total_ms / total_response_time if total_response_time else 0
+            }
+            for stage, count, avg_ms, max_ms, total_ms in sorted(stage_rows, key=lambda row: row[4], reverse=True)
+        }
+        
         # Feedback metrics
         feedback_data = self.db.query(QueryFeedback).join(Query).filter(
             Query.created_at >= start_date
@@ -154,6 +180,7 @@ class AnalyticsService:
                 "max": max(response_times_list) if response_times_list else 0,
                 "count": len(response_times_list)
             },
+            "stages": stages,
             "confidence": {
                 "avg": sum(confidence_list) / len(confidence_list) if confidence_list else 0,
                 "min": min(confidence_list) if confidence_list else 0,
@@ -167,7 +194,8 @@ class AnalyticsService:
             }
         }
     
-    async def get_category_analytics(self, days: int = 30) -> Dict[str, Any]:
+    @io_bound
+    def get_category_analytics(self, days: int = 30) -> Dict[str, Any]:
         """Get analytics by policy category"""
         start_date = datetime.now() - timedelta(days=days)
         
@@ -212,7 +240,8 @@ class AnalyticsService:
         
         return category_stats
     
-    async def get_misrouting_analysis(self, days: int = 30) -> Dict[str, Any]:
+    @io_bound
+    def get_misrouting_analysis(self, days: int = 30) -> Dict[str, Any]:
         """Get misrouting analysis and suggestions"""
         start_date = datetime.now() - timedelta(days=days)
         
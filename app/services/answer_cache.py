@@ -0,0 +1,216 @@
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set
+import hashlib
+import json
+import threading
+import time
+
+from app.services.search_result import SearchResult
+from app.utils.text import normalize_question
+
+class AnswerCache:
+    """Bounded LRU cache of complete answers with dependency-tracked invalidation
+
+    Entries are keyed by a hash of everything that shapes the prompt: the
+    normalised question, the retrieved chunk IDs, any additional context, the
+    model and the prompt template. Chunk IDs are regenerated whenever a policy
+    is reprocessed, so they also version the chunk text. Each entry remembers
+    the chunks and policies it was built from so a policy change drops only
+    the answers that used it.
+
+    lookup() skips retrieval entirely by remembering which key a question last
+    resolved to. Those shortcuts are dropped whenever new chunks are ingested,
+    since new content can change what retrieval returns.
+    """
+
+    def __init__(self, model: str, prompt_template: str, max_entries: int = 1000,
+                 max_bytes: int = 16 * 1024 * 1024, ttl_seconds: Optional[float] = None):
+        self.model = model
+        self.template_hash = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()[:16]
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_chunk: Dict[str, Set[str]] = {}
+        self._by_policy: Dict[str, Set[str]] = {}
+        self._shortcuts: Dict[str, str] = {}  # question key -> entry key
+        self._bytes = 0
+
+        self.hits = 0
+        self.shortcut_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    # Keys
+
+    def key(self, question: str, chunk_ids: List[str], context: str = None) -> str:
+        """Cache key for a question answered from these chunks"""
+        material = json.dumps([self._question_key(question, context), list(chunk_ids)], separators=(",", ":"))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _question_key(self, question: str, context: str = None) -> str:
+        return json.dumps([normalize_question(question), context or "", self.model, self.template_hash],
+                          separators=(",", ":"))
+
+    # Reads
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached answer for a key, or None on a miss"""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._shortcuts[entry["question_key"]] = key
+            return dict(entry["response"])
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached answer for a key without counting a lookup"""
+        with self._lock:
+            entry = self._live_entry(key)
+            return dict(entry["response"]) if entry is not None else None
+
+    def lookup(self, question: str, context: str = None) -> Optional[Dict[str, Any]]:
+        """Return the answer this question last resolved to without running retrieval, if still valid"""
+        question_key = self._question_key(question, context)
+        with self._lock:
+            key = self._shortcuts.get(question_key)
+            entry = self._live_entry(key) if key is not None else None
+            if entry is None:
+                self._shortcuts.pop(question_key, None)
+                return None
+            self.shortcut_hits += 1
+            return dict(entry["response"])
+
+    def _live_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl_seconds and time.monotonic() - entry["stored_at"] > self.ttl_seconds:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    # Writes
+
+    def put(self, key: str, question: str, response: Dict[str, Any], chunks: List[SearchResult],
+            context: str = None) -> None:
+        """Store an answer along with the chunks and policies it depends on"""
+        if self.max_entries <= 0:
+            return
+
+        response = dict(response)
+        chunk_ids = [chunk.id for chunk in chunks]
+        policies = {self._policy_key(chunk.metadata) for chunk in chunks if chunk.metadata}
+        size = len(json.dumps(response, default=str)) + len(question) + sum(len(chunk_id) for chunk_id in chunk_ids)
+        if size > self.max_bytes:
+            return
+
+        question_key = self._question_key(question, context)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                "response": response,
+                "question_key": question_key,
+                "chunks": chunk_ids,
+                "policies": policies,
+                "size": size,
+                "stored_at": time.monotonic()
+            }
+            self._bytes += size
+            self._shortcuts[question_key] = key
+            for chunk_id in chunk_ids:
+                self._by_chunk.setdefault(chunk_id, set()).add(key)
+            for policy in policies:
+                self._by_policy.setdefault(policy, set()).add(key)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_chunks(self, chunk_ids: List[str]) -> int:
+        """Drop answers built from any of these chunks; returns how many were dropped"""
+        with self._lock:
+            keys = set()
+            for chunk_id in chunk_ids:
+                keys |= self._by_chunk.get(chunk_id, set())
+            return self._invalidate(keys)
+
+    def invalidate_policy(self, policy_id: Any) -> int:
+        """Drop answers built from any chunk of this policy; returns how many were dropped"""
+        with self._lock:
+            return self._invalidate(set(self._by_policy.get(str(policy_id), set())))
+
+    def content_added(self) -> None:
+        """Forget question shortcuts, since retrieval may now return different chunks"""
+        with self._lock:
+            self._shortcuts.clear()
+
+    def clear(self) -> None:
+        """Drop every cached answer"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_chunk.clear()
+            self._by_policy.clear()
+            self._shortcuts.clear()
+            self._bytes = 0
+
+    def _invalidate(self, keys: Set[str]) -> int:
+        removed = 0
+        for key in keys:
+            if key in self._entries:
+                self._remove(key)
+                removed += 1
+        self.invalidations += removed
+        return removed
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+        if self._shortcuts.get(entry["question_key"]) == key:
+            del self._shortcuts[entry["question_key"]]
+        for chunk_id in entry["chunks"]:
+            keys = self._by_chunk.get(chunk_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_chunk[chunk_id]
+        for policy in entry["policies"]:
+            keys = self._by_policy.get(policy)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_policy[policy]
+
+    def _policy_key(self, metadata: Dict[str, Any]) -> str:
+        policy_id = metadata.get("policy_id")
+        return str(policy_id) if policy_id is not None else metadata.get("title", "")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters and size"""
+        with self._lock:
+            lookups = self.hits + self.shortcut_hits + self.misses
+            return {
+                "model": self.model,
+                "size": len(self._entries),
+                "max_size": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "shortcut_hits": self.shortcut_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits + self.shortcut_hits) / lookups if lookups else 0.0
+            }
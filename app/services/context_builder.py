@@ -0,0 +1,210 @@
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+import math
+import threading
+
+from app.services.search_result import SearchResult
+from app.utils.text import normalize_whitespace, tokenize
+
+class TokenCounter:
+    """Token counts for the target model, using tiktoken when it is installed
+
+    Without tiktoken the count is estimated at four characters per token.
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+
+    def _get_encoding(self):
+        if not self._loaded:
+            try:
+                import tiktoken
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except ImportError:
+                self._encoding = None
+            self._loaded = True
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is None:
+            return math.ceil(len(text) / self.CHARS_PER_TOKEN)
+        return len(encoding.encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        encoding = self._get_encoding()
+        if encoding is None:
+            return text[:max_tokens * self.CHARS_PER_TOKEN]
+        return encoding.decode(encoding.encode(text)[:max_tokens])
+
+class ContextBuilder:
+    """Turns retrieved chunks into the prompt context
+
+    Chunks are cut at the largest drop in retrieval score, whitespace is
+    collapsed, near-duplicates are dropped while ordering by maximal marginal
+    relevance, and the result is packed under a token budget.
+    """
+
+    SEPARATOR = "\n---\n"
+
+    def __init__(self, model: str = "gpt-3.5-turbo", max_tokens: int = 1500, mmr_lambda: float = 0.7,
+                 duplicate_threshold: float = 0.9, score_gap: float = 0.3, min_chunks: int = 2):
+        self.token_counter = TokenCounter(model)
+        self.max_tokens = max_tokens
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_threshold = duplicate_threshold
+        self.score_gap = score_gap
+        self.min_chunks = min_chunks
+
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.chunks_in = 0
+        self.chunks_used = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.dropped = {"score_gap": 0, "duplicate": 0, "budget": 0}
+
+    def build(self, chunks: List[SearchResult], additional_context: str = None) -> Dict[str, Any]:
+        """Assemble the context text for a question
+
+        Returns the text, the chunks it contains, its token count and the tokens
+        saved compared with concatenating every chunk verbatim.
+        """
+        original_tokens = self.token_counter.count(self._join(
+            [self._format_chunk(chunk, chunk.content) for chunk in chunks], additional_context
+        ))
+
+        candidates = self._cut_at_score_gap(chunks)
+        dropped = {"score_gap": len(chunks) - len(candidates), "duplicate": 0, "budget": 0}
+
+        contents = [normalize_whitespace(chunk.content) for chunk in candidates]
+        order, dropped["duplicate"] = self._mmr_order(candidates, contents)
+
+        budget = self.max_tokens
+        if additional_context:
+            budget -= self.token_counter.count(f"Additional Context: {additional_context}") + self.token_counter.count(self.SEPARATOR)
+
+        parts, used = [], []
+        for i in order:
+            part = self._format_chunk(candidates[i], contents[i])
+            cost = self.token_counter.count(part) + (self.token_counter.count(self.SEPARATOR) if parts else 0)
+            if cost > budget:
+                if parts:
+                    dropped["budget"] += 1
+                    continue
+                # Never send an empty context: trim the best chunk to fit
+                overhead = self.token_counter.count(self._format_chunk(candidates[i], ""))
+                part = self._format_chunk(candidates[i], self.token_counter.truncate(contents[i], budget - overhead))
+                cost = self.token_counter.count(part)
+            parts.append(part)
+            used.append(candidates[i])
+            budget -= cost
+
+        text = self._join(parts, additional_context)
+        tokens = self.token_counter.count(text)
+
+        with self._lock:
+            self.builds += 1
+            self.chunks_in += len(chunks)
+            self.chunks_used += len(used)
+            self.tokens_before += original_tokens
+            self.tokens_after += tokens
+            for reason, count in dropped.items():
+                self.dropped[reason] += count
+
+        return {
+            "text": text,
+            "chunks": used,
+            "tokens": tokens,
+            "original_tokens": original_tokens,
+            "tokens_saved": max(0, original_tokens - tokens),
+            "dropped": dropped
+        }
+
+    def _cut_at_score_gap(self, chunks: List[SearchResult]) -> List[SearchResult]:
+        """Keep the chunks above the largest score drop, if that drop is large enough"""
+        scores = self._relevance(chunks)
+        if scores is None or len(chunks) <= self.min_chunks or scores[0] <= 0:
+            return list(chunks)
+
+        gaps = [(scores[i - 1] - scores[i], i) for i in range(max(1, self.min_chunks), len(scores))]
+        largest, cut = max(gaps)
+        if largest < self.score_gap * scores[0]:
+            return list(chunks)
+        return list(chunks[:cut])
+
+    def _relevance(self, chunks: List[SearchResult]) -> Optional[List[float]]:
+        """One score per chunk from the first score field every chunk has, in ranked order"""
+        for field in ("similarity_score", "rrf_score", "bm25_score"):
+            scores = [getattr(chunk, field) for chunk in chunks]
+            if chunks and all(score is not None for score in scores):
+                return scores
+        return None
+
+    def _mmr_order(self, chunks: List[SearchResult], contents: List[str]) -> Tuple[List[int], int]:
+        """Order chunks by maximal marginal relevance, dropping near-duplicates"""
+        vectors = [Counter(tokenize(content)) for content in contents]
+        norms = [math.sqrt(sum(count * count for count in vector.values())) or 1.0 for vector in vectors]
+        # Rank-based relevance, so fused and single-source results are treated alike
+        relevance = [1.0 - i / len(chunks) for i in range(len(chunks))]
+
+        def similarity(a: int, b: int) -> float:
+            small, large = (vectors[a], vectors[b]) if len(vectors[a]) < len(vectors[b]) else (vectors[b], vectors[a])
+            dot = sum(count * large.get(term, 0) for term, count in small.items())
+            return dot / (norms[a] * norms[b])
+
+        remaining = list(range(len(chunks)))
+        closest = {i: 0.0 for i in remaining}
+        selected, duplicates = [], 0
+        while remaining:
+            best = max(remaining, key=lambda i: self.mmr_lambda * relevance[i] - (1 - self.mmr_lambda) * closest[i])
+            remaining.remove(best)
+            selected.append(best)
+
+            for i in list(remaining):
+                closest[i] = max(closest[i], similarity(best, i))
+                if closest[i] >= self.duplicate_threshold:
+                    remaining.remove(i)
+                    duplicates += 1
+        return selected, duplicates
+
+    def _format_chunk(self, chunk: SearchResult, content: str) -> str:
+        section_info = ""
+        if chunk.section:
+            section_info = f"Section: {chunk.section}"
+        if chunk.subsection:
+            section_info += f" - {chunk.subsection}"
+
+        context_part = f"Source: {chunk.title}\n"
+        if section_info:
+            context_part += f"{section_info}\n"
+        context_part += f"Content: {content}\n"
+        return context_part
+
+    def _join(self, parts: List[str], additional_context: str = None) -> str:
+        if additional_context:
+            parts = parts + [f"Additional Context: {additional_context}"]
+        return self.SEPARATOR.join(parts)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get prompt context sizes before and after assembly"""
+        return {
+            "builds": self.builds,
+            "chunks_in": self.chunks_in,
+            "chunks_used": self.chunks_used,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_before - self.tokens_after,
+            "avg_tokens_saved": (self.tokens_before - self.tokens_after) / self.builds if self.builds else 0.0,
+            "dropped": dict(self.dropped),
+            "max_tokens": self.max_tokens
+        }
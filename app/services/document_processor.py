@@ -1,47 +1,48 @@
 import os
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import PyPDF2
 from docx import Document
-import chromadb
 from sentence_transformers import SentenceTransformer
 import uuid
+import time
+
+from app.core.executors import run_cpu, run_io
+from app.services.vector_stores.base import VectorStore
+from app.services.lexical_index import LexicalIndex
+from app.services.fact_index import FactIndex
+from app.services.neighbour_graph import NeighbourGraph
+from app.services.answer_cache import AnswerCache
 
 class DocumentProcessor:
-    def __init__(self):
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.chroma_client = chromadb.PersistentClient(path="./chroma_db")
-        self.collection = self.chroma_client.get_or_create_collection("hr_policies")
+    def __init__(self, embedding_model: SentenceTransformer, vector_store: VectorStore,
+                 batch_size: int = 64, write_batch_size: int = 5000, lexical_index: Optional[LexicalIndex] = None,
+                 neighbour_graph: Optional[NeighbourGraph] = None, answer_cache: Optional[AnswerCache] = None,
+                 fact_index: Optional[FactIndex] = None):
+        self.embedding_model = embedding_model
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.write_batch_size = write_batch_size
+        self.lexical_index = lexical_index
+        self.neighbour_graph = neighbour_graph
+        self.answer_cache = answer_cache
+        self.fact_index = fact_index
     
-    async def process_document(self, file_path: str, category: str, title: str, description: str = "") -> Dict[str, Any]:
+    async def process_document(self, file_path: str, category: str, title: str, description: str = "",
+                               policy_id: Optional[int] = None) -> Dict[str, Any]:
         """Process a document and create searchable chunks"""
+        written_ids = []
         try:
             # Extract text based on file type
-            if file_path.endswith('.pdf'):
-                text = self._extract_pdf_text(file_path)
-            elif file_path.endswith('.docx'):
-                text = self._extract_docx_text(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {file_path}")
+            text = await run_io(self._extract_text, file_path)
             
             # Split into chunks
-            chunks = self._split_into_chunks(text, title)
-            
-            # Create embeddings and store in vector database
-            chunk_ids = []
-            embeddings = []
-            metadatas = []
+            chunks = await run_cpu(self._split_into_chunks, text, title)
             
-            for i, chunk in enumerate(chunks):
-                chunk_id = str(uuid.uuid4())
-                chunk_ids.append(chunk_id)
-                
-                # Create embedding
-                embedding = self.embedding_model.encode(chunk['content']).tolist()
-                embeddings.append(embedding)
-                
-                # Create metadata
-                metadata = {
+            chunk_ids = [str(uuid.uuid4()) for _ in chunks]
+            documents = [chunk['content'] for chunk in chunks]
+            metadatas = [
+                {
                     "title": title,
                     "category": category,
                     "description": description,
@@ -50,31 +51,157 @@ class DocumentProcessor:
                     "section": chunk.get('section', ''),
                     "subsection": chunk.get('subsection', '')
                 }
-                metadatas.append(metadata)
+                for i, chunk in enumerate(chunks)
+            ]
+            if policy_id is not None:
+                for metadata in metadatas:
+                    metadata["policy_id"] = policy_id
             
-            # Store in ChromaDB
-            self.collection.add(
-                ids=chunk_ids,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                documents=[chunk['content'] for chunk in chunks]
-            )
+            # Encode in batches, writing to the vector database in bounded sub-batches
+            stats = {
+                "encode_batches": 0,
+                "write_batches": 0,
+                "encode_seconds": 0.0,
+                "write_seconds": 0.0,
+                "peak_batch_memory_bytes": 0
+            }
+            started = time.perf_counter()
+            
+            for write_start in range(0, len(documents), self.write_batch_size):
+                write_end = write_start + self.write_batch_size
+                window = documents[write_start:write_end]
+                window_embeddings = []
+                
+                for batch_start in range(0, len(window), self.batch_size):
+                    batch = window[batch_start:batch_start + self.batch_size]
+                    
+                    encode_started = time.perf_counter()
+                    batch_embeddings = await run_cpu(
+                        self.embedding_model.encode,
+                        batch,
+                        batch_size=self.batch_size,
+                        convert_to_numpy=True,
+                        show_progress_bar=False
+                    )
+                    stats["encode_seconds"] += time.perf_counter() - encode_started
+                    stats["encode_batches"] += 1
+                    
+                    batch_bytes = batch_embeddings.nbytes + sum(len(text.encode('utf-8')) for text in batch)
+                    stats["peak_batch_memory_bytes"] = max(stats["peak_batch_memory_bytes"], batch_bytes)
+                    window_embeddings.extend(batch_embeddings.tolist())
+                
+                write_started = time.perf_counter()
+                await run_io(
+                    self.vector_store.add,
+                    ids=chunk_ids[write_start:write_end],
+                    embeddings=window_embeddings,
+                    metadatas=metadatas[write_start:write_end],
+                    documents=window
+                )
+                stats["write_seconds"] += time.perf_counter() - write_started
+                stats["write_batches"] += 1
+                written_ids.extend(chunk_ids[write_start:write_end])
+                
+                if self.lexical_index is not None:
+                    await run_cpu(
+                        self.lexical_index.add,
+                        chunk_ids[write_start:write_end],
+                        window,
+                        metadatas[write_start:write_end]
+                    )
+                
+                if self.fact_index is not None:
+                    await run_cpu(
+                        self.fact_index.add,
+                        chunk_ids[write_start:write_end],
+                        window,
+                        metadatas[write_start:write_end]
+                    )
+                
+                if self.neighbour_graph is not None:
+                    await run_io(
+                        self.neighbour_graph.add,
+                        chunk_ids[write_start:write_end],
+                        window_embeddings,
+                        metadatas[write_start:write_end]
+                    )
+            
+            elapsed = time.perf_counter() - started
+            stats["chunks"] = len(chunks)
+            stats["total_seconds"] = round(elapsed, 4)
+            stats["chunks_per_second"] = round(len(chunks) / elapsed, 2) if elapsed > 0 else 0.0
+            stats["encode_seconds"] = round(stats["encode_seconds"], 4)
+            stats["write_seconds"] = round(stats["write_seconds"], 4)
+            
+            if self.answer_cache is not None:
+                self.answer_cache.content_added()
             
             return {
                 "success": True,
                 "chunks_created": len(chunks),
                 "title": title,
                 "category": category,
-                "chunk_ids": chunk_ids
+                "chunk_ids": chunk_ids,
+                "ingest_stats": stats
             }
             
         except Exception as e:
+            # Roll back sub-batches that were already written
+            if written_ids:
+                try:
+                    await self.delete_chunks(written_ids)
+                except Exception as cleanup_error:
+                    print(f"Error rolling back partial ingest: {cleanup_error}")
+            
             return {
                 "success": False,
                 "error": str(e),
                 "chunks_created": 0
             }
     
+    async def delete_chunks(self, chunk_ids: List[str]) -> None:
+        """Remove chunks from the vector store and the derived indexes"""
+        if not chunk_ids:
+            return
+        if self.neighbour_graph is not None:
+            await run_io(self.neighbour_graph.forget, chunk_ids)
+        await run_io(self.vector_store.delete, ids=chunk_ids)
+        if self.lexical_index is not None:
+            self.lexical_index.remove(chunk_ids)
+        if self.fact_index is not None:
+            self.fact_index.remove(chunk_ids)
+        if self.neighbour_graph is not None:
+            await run_io(self.neighbour_graph.refresh_stale)
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate_chunks(chunk_ids)
+    
+    def invalidate_policy(self, policy_id: int) -> None:
+        """Drop derived state built from a policy whose details changed"""
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate_policy(policy_id)
+    
+    async def clear(self) -> None:
+        """Remove every chunk from the vector store and the derived indexes"""
+        await run_io(self.vector_store.reset)
+        if self.lexical_index is not None:
+            self.lexical_index.reset()
+        if self.fact_index is not None:
+            self.fact_index.reset()
+        if self.neighbour_graph is not None:
+            await run_io(self.neighbour_graph.reset)
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+    
+    def _extract_text(self, file_path: str) -> str:
+        """Extract text from a supported document type"""
+        if file_path.endswith('.pdf'):
+            return self._extract_pdf_text(file_path)
+        elif file_path.endswith('.docx'):
+            return self._extract_docx_text(file_path)
+        elif file_path.endswith(('.txt', '.md')):
+            return self._extract_plain_text(file_path)
+        raise ValueError(f"Unsupported file type: {file_path}")
+    
     def _extract_pdf_text(self, file_path: str) -> str:
         """Extract text from PDF file"""
         text = ""
@@ -92,6 +219,11 @@ class DocumentProcessor:
             text += paragraph.text + "\n"
         return text
     
+    def _extract_plain_text(self, file_path: str) -> str:
+        """Extract text from a plain text or markdown file"""
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file.read()
+    
     def _split_into_chunks(self, text: str, title: str) -> List[Dict[str, Any]]:
         """Split text into meaningful chunks with section detection"""
         # Clean and normalize text
@@ -176,10 +308,11 @@ class DocumentProcessor:
         """Search for similar chunks using vector similarity"""
         try:
             # Create query embedding
-            query_embedding = self.embedding_model.encode(query).tolist()
+            query_embedding = (await run_cpu(self.embedding_model.encode, query)).tolist()
             
-            # Search in ChromaDB
-            results = self.collection.query(
+            # Search the vector store
+            results = await run_io(
+                self.vector_store.query,
                 query_embeddings=[query_embedding],
                 n_results=n_results
             )
@@ -0,0 +1,142 @@
+from collections import deque
+from typing import Dict, Any, List, Optional
+import asyncio
+import time
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.core.executors import run_cpu
+
+class EmbeddingBatcher:
+    """Collect concurrent single-text encodes and run them as one batched encode"""
+
+    def __init__(self, embedding_model: SentenceTransformer, window_ms: float = 3.0, max_batch_size: int = 32):
+        self.embedding_model = embedding_model
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.batch_size_counts: Dict[int, int] = {}
+        self._queue_delays_ms = deque(maxlen=1000)
+        self._encode_times_ms = deque(maxlen=1000)
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def available(self) -> bool:
+        """Whether encode() can be awaited from the current event loop"""
+        if not self.running:
+            return False
+        try:
+            return asyncio.get_running_loop() is self._worker.get_loop()
+        except RuntimeError:
+            return False
+
+    async def start(self) -> None:
+        """Start the background batching loop on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the batching loop and fail anything still waiting"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped"))
+
+    async def encode(self, text: str) -> np.ndarray:
+        """Queue a text for the next batch and wait for its embedding"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window_seconds
+
+            # Keep collecting until the window closes or the batch is full
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._encode_batch(batch)
+
+    async def _encode_batch(self, batch: List) -> None:
+        texts = [text for text, _, _ in batch]
+        dispatched = time.perf_counter()
+        try:
+            embeddings = await run_cpu(self._encode_texts, texts)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        encode_ms = (time.perf_counter() - dispatched) * 1000
+        for (_, future, enqueued), embedding in zip(batch, embeddings):
+            self._queue_delays_ms.append((dispatched - enqueued) * 1000)
+            if not future.done():
+                future.set_result(embedding)
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.batch_size_counts[len(batch)] = self.batch_size_counts.get(len(batch), 0) + 1
+        self._encode_times_ms.append(encode_ms)
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        return self.embedding_model.encode(
+            texts,
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batch size and queueing delay metrics"""
+        delays = np.array(self._queue_delays_ms) if self._queue_delays_ms else np.zeros(1)
+        encode_times = np.array(self._encode_times_ms) if self._encode_times_ms else np.zeros(1)
+        return {
+            "running": self.running,
+            "window_ms": self.window_seconds * 1000,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "queue_delay_ms": {
+                "avg": float(delays.mean()),
+                "p50": float(np.percentile(delays, 50)),
+                "p95": float(np.percentile(delays, 95)),
+                "max": float(delays.max())
+            },
+            "encode_ms": {
+                "avg": float(encode_times.mean()),
+                "p95": float(np.percentile(encode_times, 95))
+            }
+        }
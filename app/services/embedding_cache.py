@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import threading
+import time
+import numpy as np
+
+from app.utils.text import normalize_question
+
+class EmbeddingCache:
+    """Bounded, thread-safe LRU cache of text embeddings with optional TTL"""
+
+    def __init__(self, model_id: str, max_size: int = 2048, ttl_seconds: Optional[float] = None):
+        self.model_id = model_id
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # (model_id, normalised text) -> (embedding, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _key(self, text: str) -> Tuple[str, str]:
+        return (self.model_id, normalize_question(text))
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for a text, or None on a miss"""
+        key = self._key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            embedding, stored_at = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, text: str, embedding: np.ndarray) -> None:
+        """Store an embedding, evicting the least recently used entries when full"""
+        if self.max_size <= 0:
+            return
+
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        key = self._key(text)
+        with self._lock:
+            self._entries[key] = (embedding, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached embedding"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_id": self.model_id,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
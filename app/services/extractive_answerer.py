@@ -0,0 +1,155 @@
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+import time
+import numpy as np
+
+from app.core.executors import run_cpu
+from app.services.search_result import SearchResult
+from app.services.spans import span
+from app.services.vector_search import VectorSearchService
+from app.utils.text import split_sentences
+
+class ExtractiveAnswerer:
+    """Answers from the retrieved chunks' own sentences, without an LLM
+
+    Chunks are split into sentences, and the sentences of every chunk not seen
+    before are embedded in one batch. Sentence embeddings are cached per chunk
+    ID, which changes whenever a chunk's text does. Sentences are scored by
+    cosine similarity to the question; the best ones, minus near-duplicates,
+    are returned with the policy and section they came from.
+
+    Confidence rests on the best sentence score, scaled down when the chosen
+    sentences come from different policies.
+    """
+
+    INTRO = "Here is what our policies say:"
+    NO_ANSWER = "I couldn't find a policy statement that answers your question. Please try rephrasing or contact HR for assistance."
+    MIN_WORDS = 4  # shorter lines are headings, not answers
+
+    def __init__(self, vector_search: VectorSearchService, max_sentences: int = 3, min_score: float = 0.3,
+                 duplicate_threshold: float = 0.9, cache_size: int = 2048):
+        self.vector_search = vector_search
+        self.max_sentences = max_sentences
+        self.min_score = min_score
+        self.duplicate_threshold = duplicate_threshold
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, Tuple[List[str], np.ndarray]]" = OrderedDict()
+
+        # Metrics
+        self.answers = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.sentences_encoded = 0
+        self._latencies_ms = deque(maxlen=1000)
+
+    async def answer(self, question: str, chunks: List[SearchResult], intro: str = INTRO) -> Dict[str, Any]:
+        """Answer a question from the sentences of its retrieved chunks
+
+        Returns the answer text, its confidence and the policies it cites.
+        """
+        started = time.perf_counter()
+        with span("extractive"):
+            await self.vector_search.load_content(chunks)
+            question_vector = self._normalize(np.asarray(await self.vector_search.get_embedding(question), dtype=np.float32))
+            sentences, vectors, origins = await self._sentences(chunks)
+
+        selected, scores = [], None
+        if sentences:
+            scores = vectors @ question_vector
+            for i in np.argsort(-scores):
+                if len(selected) == self.max_sentences or (selected and scores[i] < self.min_score):
+                    break
+                if any(float(vectors[i] @ vectors[j]) >= self.duplicate_threshold for j in selected):
+                    continue
+                selected.append(int(i))
+
+        self.answers += 1
+        self._latencies_ms.append((time.perf_counter() - started) * 1000)
+        if not selected or scores[selected[0]] < self.min_score:
+            return {"answer": self.NO_ANSWER, "confidence": 0.0, "sources": []}
+
+        lines = [f"- {sentences[i]} [{self._citation(origins[i])}]" for i in selected]
+        sources = list(dict.fromkeys(origins[i].title for i in selected if origins[i].title))
+        return {
+            "answer": f"{intro}\n\n" + "\n".join(lines),
+            "confidence": self._confidence([float(scores[i]) for i in selected], [origins[i] for i in selected]),
+            "sources": sources
+        }
+
+    async def _sentences(self, chunks: List[SearchResult]) -> Tuple[List[str], Optional[np.ndarray], List[SearchResult]]:
+        """Sentences of every chunk with their embeddings and source chunk"""
+        missing = {}
+        for chunk in chunks:
+            if chunk.id in self._cache:
+                self._cache.move_to_end(chunk.id)
+                self.cache_hits += 1
+            elif chunk.id not in missing:
+                self.cache_misses += 1
+                missing[chunk.id] = [
+                    sentence for sentence in split_sentences(chunk.content or "")
+                    if len(sentence.split()) >= self.MIN_WORDS
+                ]
+
+        texts = [sentence for sentences in missing.values() for sentence in sentences]
+        encoded = await self._encode(texts) if texts else None
+        offset = 0
+        for chunk_id, sentences in missing.items():
+            self._cache[chunk_id] = (sentences, encoded[offset:offset + len(sentences)] if sentences else None)
+            offset += len(sentences)
+        self.sentences_encoded += len(texts)
+
+        all_sentences, matrices, origins = [], [], []
+        for chunk in chunks:
+            sentences, matrix = self._cache.get(chunk.id, ([], None))
+            if sentences:
+                all_sentences.extend(sentences)
+                matrices.append(matrix)
+                origins.extend([chunk] * len(sentences))
+
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return all_sentences, np.vstack(matrices) if matrices else None, origins
+
+    async def _encode(self, texts: List[str]) -> np.ndarray:
+        embeddings = await run_cpu(
+            self.vector_search.embedding_model.encode,
+            texts,
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return self._normalize(np.asarray(embeddings, dtype=np.float32))
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def _citation(self, chunk: SearchResult) -> str:
+        citation = chunk.title or "Policy"
+        if chunk.section:
+            citation += f", {chunk.section}"
+        if chunk.subsection:
+            citation += f" - {chunk.subsection}"
+        return citation
+
+    def _confidence(self, scores: List[float], origins: List[SearchResult]) -> float:
+        """Best sentence score, reduced when the supporting sentences disagree on the policy"""
+        best_policy = origins[0].title
+        agreement = sum(1 for chunk in origins if chunk.title == best_policy) / len(origins)
+        return round(min(0.9, max(0.0, scores[0] * (0.7 + 0.3 * agreement))), 4)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get answer counts, latency and sentence cache use"""
+        latencies = np.array(self._latencies_ms) if self._latencies_ms else np.zeros(1)
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "answers": self.answers,
+            "latency_ms": {
+                "avg": float(latencies.mean()),
+                "p95": float(np.percentile(latencies, 95))
+            },
+            "cached_chunks": len(self._cache),
+            "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            "sentences_encoded": self.sentences_encoded
+        }
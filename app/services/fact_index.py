@@ -0,0 +1,301 @@
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+import re
+import threading
+import time
+import numpy as np
+
+from app.utils.text import split_sentences, tokenize
+
+_MONEY = re.compile(r"\$\s?\d[\d,]*(?:\.\d+)?(?:\s*(?:/|per\s+)(?P<unit>[a-z]+))?", re.IGNORECASE)
+_PERCENT = re.compile(r"\d+(?:\.\d+)?\s?%")
+_TIME = re.compile(
+    r"(?P<number>\d+)\s+(?P<unit>(?:business |calendar )?(?:days?|weeks?|months?|years?|hours?))"
+    r"(?:\s+(?:per|a|each)\s+(?P<period>day|week|month|year))?",
+    re.IGNORECASE
+)
+_LABEL = re.compile(r"^(?P<label>[^:]{1,40}):\s+(?=\S)")
+_RANGE = re.compile(r"(?P<low>\d+)\s*(?:-|to)\s*(?P<high>\d+)|(?P<min>\d+)\s*\+")
+_QUESTION_YEARS = re.compile(r"(?P<years>\d+)\s*\+?\s*years?", re.IGNORECASE)
+
+# What a question is asking for, strongest signal first
+_QUESTION_KINDS = [
+    (re.compile(r"\b(percent|percentage)\b|%", re.IGNORECASE), ("percentage", "amount")),
+    (re.compile(r"\bhow many\b.*\b(get|earn|accrue|receive|entitled)\b|\bhow much (pto|time off|leave|vacation)\b", re.IGNORECASE),
+     ("allowance", "duration")),
+    (re.compile(r"\b(how long|how many|how soon|when|deadline|within|how far in advance|notice|waiting period)\b", re.IGNORECASE),
+     ("duration", "allowance")),
+    (re.compile(r"\b(how much|cost|limit|cap|maximum|max|reimburse\w*|rate|allowance|budget|pay)\b|\$", re.IGNORECASE),
+     ("amount", "percentage")),
+]
+_QUESTION_WORDS = frozenset({
+    "how", "what", "when", "which", "who", "where", "why", "many", "much", "long", "i", "my", "me", "we",
+    "our", "get", "there", "any", "this", "that", "it", "am", "per"
+})
+_UNIT_TERMS = frozenset({"hour", "day", "night", "week", "month", "year", "business", "calendar"})
+
+def _stem(term: str) -> str:
+    """Crude suffix stripping so "carried" matches "carry" and "receipts" matches "receipt" """
+    if len(term) > 4:
+        if term.endswith(("ied", "ies")):
+            return term[:-3] + "y"
+        if term.endswith("ing"):
+            return term[:-3]
+        if term.endswith("ed"):
+            return term[:-2]
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+def _terms(text: str) -> Set[str]:
+    return {_stem(term) for term in tokenize(text) if term not in _QUESTION_WORDS and not term[0].isdigit()}
+
+class FactIndex:
+    """Structured policy facts extracted at ingest, answered without search or an LLM
+
+    Every money amount, percentage and time span in a chunk becomes a fact
+    keyed by (policy, topic, attribute, condition). The attribute is the kind
+    of value, the topic comes from the surrounding sentence and heading, and
+    the condition is a list label such as "3-5 years". Each fact keeps the
+    chunk it came from. Facts are indexed by term, so matching a question
+    touches only the facts that share words with it.
+
+    A question is matched only when it asks for a kind of value, shares a
+    topic term with a fact (or its tenure falls in the fact's condition),
+    and that fact's group clearly beats the runner-up. A lone group must
+    clear the same margin over what it would score from the policy title,
+    value kind and unit alone. When the question names policies by title,
+    only their facts are considered. Anything else falls through to normal
+    retrieval.
+    """
+
+    KIND_WEIGHT = 1.5       # the value is the kind the question asks for first
+    TITLE_WEIGHT = 1.0      # a question word names the policy
+    UNIT_WEIGHT = 0.5       # the question names the value's unit ("days", "night")
+    CONDITION_WEIGHT = 1.0  # the question's tenure falls in the fact's condition
+
+    def __init__(self, min_score: float = 2.0, margin: float = 1.0):
+        self.min_score = min_score
+        self.margin = margin
+
+        self._lock = threading.RLock()
+        self._facts: Dict[int, Dict[str, Any]] = {}
+        self._by_term: Dict[str, Set[int]] = {}
+        self._by_chunk: Dict[str, List[int]] = {}
+        self._next_id = 0
+
+        self.lookups = 0
+        self.matches = 0
+        self._lookup_times_us = deque(maxlen=1000)
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    # Writes
+
+    def add(self, ids: List[str], documents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Extract and index the facts of these chunks; chunks already indexed are replaced"""
+        metadatas = metadatas or [{} for _ in ids]
+        extracted = [(chunk_id, self.extract(document or "", metadata or {}))
+                     for chunk_id, document, metadata in zip(ids, documents, metadatas)]
+        with self._lock:
+            self.remove([chunk_id for chunk_id in ids if chunk_id in self._by_chunk])
+            for chunk_id, facts in extracted:
+                fact_ids = []
+                for fact in facts:
+                    fact["chunk_id"] = chunk_id
+                    fact_id = self._next_id
+                    self._next_id += 1
+                    self._facts[fact_id] = fact
+                    for term in fact["terms"] | fact["title_terms"]:
+                        self._by_term.setdefault(term, set()).add(fact_id)
+                    fact_ids.append(fact_id)
+                self._by_chunk[chunk_id] = fact_ids
+
+    def remove(self, ids: List[str]) -> None:
+        """Drop the facts of these chunks"""
+        with self._lock:
+            for chunk_id in ids:
+                for fact_id in self._by_chunk.pop(chunk_id, []):
+                    fact = self._facts.pop(fact_id)
+                    for term in fact["terms"] | fact["title_terms"]:
+                        fact_ids = self._by_term.get(term)
+                        if fact_ids is not None:
+                            fact_ids.discard(fact_id)
+                            if not fact_ids:
+                                del self._by_term[term]
+
+    def rebuild(self, ids: List[str], documents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Replace the whole index with these chunks"""
+        with self._lock:
+            self.reset()
+            self.add(ids, documents, metadatas)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._facts.clear()
+            self._by_term.clear()
+            self._by_chunk.clear()
+
+    # Extraction
+
+    def extract(self, text: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Facts found in one chunk's text"""
+        title = metadata.get("title", "")
+        facts, heading = [], ""
+        for sentence in split_sentences(text):
+            values = self._values(sentence)
+            if not values:
+                if len(sentence.split()) <= 4:
+                    # Short value-less lines title the list items that follow
+                    heading = sentence.rstrip(":").capitalize() if sentence.isupper() else sentence.rstrip(":")
+                continue
+
+            label_match = _LABEL.match(sentence)
+            condition = label_match.group("label").strip() if label_match and any(c.isdigit() for c in label_match.group("label")) else ""
+            body = sentence[label_match.end():] if condition else sentence
+            for attribute, value, unit, span in self._values(body):
+                context = body[:span[0]] + " " + body[span[1]:]
+                terms = _terms(f"{context} {heading if condition or len(context.split()) < 3 else ''}") - _UNIT_TERMS
+                facts.append({
+                    "policy": title,
+                    "policy_id": metadata.get("policy_id"),
+                    "section": metadata.get("section", ""),
+                    "topic": " ".join(sorted(_terms(heading) if condition else terms)[:6]),
+                    "attribute": attribute,
+                    "condition": condition,
+                    "value": value,
+                    "unit": _stem(unit.lower().split()[-1]) if unit else "",
+                    "heading": heading,
+                    "sentence": sentence,
+                    "terms": terms,
+                    "title_terms": _terms(title) - terms
+                })
+        return facts
+
+    def _values(self, text: str) -> List[Tuple[str, str, str, Tuple[int, int]]]:
+        """(attribute, value, unit, span) for every value in a sentence"""
+        values = []
+        for match in _MONEY.finditer(text):
+            values.append(("amount", match.group().strip(), match.group("unit") or "", match.span()))
+        for match in _PERCENT.finditer(text):
+            values.append(("percentage", match.group().strip(), "", match.span()))
+        for match in _TIME.finditer(text):
+            if any(start <= match.start() < end for _, _, _, (start, end) in values):
+                continue
+            attribute = "allowance" if match.group("period") else "duration"
+            values.append((attribute, match.group().strip(), match.group("unit"), match.span()))
+        return values
+
+    # Lookup
+
+    def match(self, question: str) -> Optional[Dict[str, Any]]:
+        """Answer a fact-shaped question from the index, or None when it is not clearly one"""
+        started = time.perf_counter()
+        try:
+            kinds = self._question_kinds(question)
+            if not kinds:
+                return None
+            terms = _terms(question)
+            units = terms & _UNIT_TERMS
+            years = _QUESTION_YEARS.search(question)
+            with self._lock:
+                self.lookups += 1
+                groups: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+                candidates = set()
+                for term in terms:
+                    candidates |= self._by_term.get(term, set())
+                facts = [self._facts[fact_id] for fact_id in candidates]
+
+                # A question naming a policy ("remote work", "travel") is only answered from that policy
+                named = {fact["policy"] for fact in facts if terms & (fact["terms"] | fact["title_terms"]) & _terms(fact["policy"])}
+                for fact in facts:
+                    if fact["attribute"] not in kinds or (named and fact["policy"] not in named):
+                        continue
+                    # Topical evidence: words of the fact itself, or a tenure inside its condition.
+                    # Title, kind and unit alone fit every fact of the policy and never answer.
+                    evidence = len(terms & fact["terms"])
+                    if years and fact["condition"] and self._in_range(int(years.group("years")), fact["condition"]):
+                        evidence += self.CONDITION_WEIGHT
+                    if not evidence:
+                        continue
+                    score = evidence + self.TITLE_WEIGHT * len(terms & fact["title_terms"])
+                    if fact["attribute"] == kinds[0]:
+                        score += self.KIND_WEIGHT
+                    if fact["unit"] in units:
+                        score += self.UNIT_WEIGHT
+                    key = (fact["policy"], fact["topic"], fact["attribute"])
+                    group = groups.setdefault(key, {"score": 0.0, "evidence": 0.0, "facts": []})
+                    if score > group["score"]:
+                        group["score"], group["evidence"] = score, evidence
+                    group["facts"].append(fact)
+
+                ranked = sorted(groups.values(), key=lambda group: group["score"], reverse=True)
+                if not ranked or ranked[0]["score"] < self.min_score:
+                    return None
+                best = ranked[0]
+                runner_up = ranked[1]["score"] if len(ranked) > 1 else best["score"] - best["evidence"]
+                if best["score"] - runner_up < self.margin:
+                    return None
+                self.matches += 1
+                return self._answer(question, ranked[0])
+        finally:
+            self._lookup_times_us.append((time.perf_counter() - started) * 1e6)
+
+    def _question_kinds(self, question: str) -> Tuple[str, ...]:
+        for pattern, kinds in _QUESTION_KINDS:
+            if pattern.search(question):
+                return kinds
+        return ()
+
+    def _answer(self, question: str, group: Dict[str, Any]) -> Dict[str, Any]:
+        facts = list({fact["sentence"]: fact for fact in group["facts"]}.values())
+        conditioned = [fact for fact in facts if fact["condition"]]
+        years = _QUESTION_YEARS.search(question)
+        if conditioned and years:
+            chosen = [fact for fact in conditioned if self._in_range(int(years.group("years")), fact["condition"])]
+            facts = chosen or facts
+
+        first = facts[0]
+        source = first["policy"] + (f", {first['section']}" if first["section"] else "")
+        lead = f"{first['heading']}: " if first["heading"] and first["condition"] else ""
+        if len(facts) == 1:
+            answer = f"According to the {source}: {lead}{first['sentence']}"
+        else:
+            answer = f"According to the {source}, {first['heading'] or first['topic']}:\n\n" + "\n".join(
+                f"- {fact['sentence']}" for fact in facts
+            )
+        return {
+            "answer": answer,
+            "confidence": round(min(0.9, 0.5 + 0.1 * group["score"]), 4),
+            "sources": [first["policy"]] if first["policy"] else [],
+            "facts": [{key: fact[key] for key in ("policy", "policy_id", "topic", "attribute", "condition", "value", "chunk_id")}
+                      for fact in facts]
+        }
+
+    def _in_range(self, years: int, condition: str) -> bool:
+        match = _RANGE.search(condition)
+        if match is None:
+            return False
+        if match.group("min") is not None:
+            return years >= int(match.group("min"))
+        return int(match.group("low")) <= years <= int(match.group("high"))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index size, match rate and lookup latency"""
+        times = np.array(self._lookup_times_us) if self._lookup_times_us else np.zeros(1)
+        attributes: Dict[str, int] = {}
+        for fact in list(self._facts.values()):
+            attributes[fact["attribute"]] = attributes.get(fact["attribute"], 0) + 1
+        return {
+            "facts": len(self._facts),
+            "chunks": len(self._by_chunk),
+            "by_attribute": attributes,
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "match_rate": self.matches / self.lookups if self.lookups else 0.0,
+            "lookup_us": {
+                "avg": float(times.mean()),
+                "p95": float(np.percentile(times, 95))
+            }
+        }
@@ -2,12 +2,14 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.db.models import Form, PolicyForm
 from app.models.schemas import FormCreate, FormResponse, PolicyFormLink
+from app.core.executors import io_bound
 
 class FormService:
     def __init__(self, db: Session):
         self.db = db
     
-    async def get_forms(self, category: str = None, is_active: bool = True) -> List[FormResponse]:
+    @io_bound
+    def get_forms(self, category: str = None, is_active: bool = True) -> List[FormResponse]:
         """Get all forms with optional filtering"""
         query = self.db.query(Form).filter(Form.is_active == is_active)
         
@@ -17,14 +19,16 @@ class FormService:
         forms = query.all()
         return [FormResponse.from_orm(form) for form in forms]
     
-    async def get_form(self, form_id: int) -> Optional[FormResponse]:
+    @io_bound
+    def get_form(self, form_id: int) -> Optional[FormResponse]:
         """Get a specific form by ID"""
         form = self.db.query(Form).filter(Form.id == form_id).first()
         if form:
             return FormResponse.from_orm(form)
         return None
     
-    async def create_form(self, form_data: FormCreate) -> FormResponse:
+    @io_bound
+    def create_form(self, form_data: FormCreate) -> FormResponse:
         """Create a new form"""
         form = Form(
             name=form_data.name,
@@ -41,7 +45,8 @@ class FormService:
         
         return FormResponse.from_orm(form)
     
-    async def update_form(self, form_id: int, form_data: FormCreate) -> Optional[FormResponse]:
+    @io_bound
+    def update_form(self, form_id: int, form_data: FormCreate) -> Optional[FormResponse]:
         """Update an existing form"""
         form = self.db.query(Form).filter(Form.id == form_id).first()
         if not form:
@@ -59,7 +64,8 @@ class FormService:
         
         return FormResponse.from_orm(form)
     
-    async def delete_form(self, form_id: int) -> bool:
+    @io_bound
+    def delete_form(self, form_id: int) -> bool:
         """Soft delete a form"""
         form = self.db.query(Form).filter(Form.id == form_id).first()
         if not form:
@@ -69,7 +75,8 @@ class FormService:
         self.db.commit()
         return True
     
-    async def link_form_to_policy(self, link_data: PolicyFormLink) -> bool:
+    @io_bound
+    def link_form_to_policy(self, link_data: PolicyFormLink) -> bool:
         """Link a form to a policy"""
         try:
             # Check if link already exists
@@ -97,7 +104,8 @@ class FormService:
             print(f"Error linking form to policy: {e}")
             return False
     
-    async def get_forms_by_policy(self, policy_id: int) -> List[FormResponse]:
+    @io_bound
+    def get_forms_by_policy(self, policy_id: int) -> List[FormResponse]:
         """Get forms linked to a specific policy"""
         forms = self.db.query(Form).join(PolicyForm).filter(
             PolicyForm.policy_id == policy_id,
@@ -106,7 +114,8 @@ class FormService:
         
         return [FormResponse.from_orm(form) for form in forms]
     
-    async def get_policies_by_form(self, form_id: int) -> List[int]:
+    @io_bound
+    def get_policies_by_form(self, form_id: int) -> List[int]:
         """Get policy IDs linked to a specific form"""
         policy_forms = self.db.query(PolicyForm).filter(
             PolicyForm.form_id == form_id
@@ -114,7 +123,8 @@ class FormService:
         
         return [pf.policy_id for pf in policy_forms]
     
-    async def search_forms(self, query: str, category: str = None) -> List[FormResponse]:
+    @io_bound
+    def search_forms(self, query: str, category: str = None) -> List[FormResponse]:
         """Search forms by name, description, or category"""
         search_query = self.db.query(Form).filter(Form.is_active == True)
         
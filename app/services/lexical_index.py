@@ -0,0 +1,237 @@
+from array import array
+from collections import Counter, deque
+from typing import List, Dict, Any, Optional, Tuple
+import math
+import threading
+import time
+import numpy as np
+
+from app.utils.text import tokenize
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over chunk text
+
+    Each term maps to compact postings arrays (document slot, term frequency).
+    Deleted chunks are tombstoned and the postings are compacted once tombstones
+    outnumber live documents. IDF values are computed once per term and reused
+    until the next write.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._df: Dict[str, int] = {}
+        self._idf: Dict[str, float] = {}
+
+        self._doc_ids: List[Optional[str]] = []
+        self._doc_terms: List[Tuple[str, ...]] = []
+        self._slot_of: Dict[str, int] = {}
+        self._doc_lengths = array("f")
+        self._alive = array("b")
+        self._category_codes = array("i")
+        self._categories: Dict[str, int] = {}
+        self._live = 0
+        self._total_length = 0
+
+        self.searches = 0
+        self._search_times_us = deque(maxlen=1000)
+
+    def __len__(self) -> int:
+        return self._live
+
+    # Writes
+
+    def add(self, ids: List[str], documents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Index chunks; ids that are already indexed are replaced"""
+        metadatas = metadatas or [{} for _ in ids]
+        analyzed = [Counter(tokenize(document or "")) for document in documents]
+
+        with self._lock:
+            self.remove([chunk_id for chunk_id in ids if chunk_id in self._slot_of])
+
+            # Group the batch by term so each postings array is extended once
+            batch_postings: Dict[str, Tuple[List[int], List[int]]] = {}
+            for chunk_id, counts, metadata in zip(ids, analyzed, metadatas):
+                slot = len(self._doc_ids)
+                category = metadata.get("category") or ""
+                length = sum(counts.values())
+
+                self._doc_ids.append(chunk_id)
+                self._doc_terms.append(tuple(counts))
+                self._slot_of[chunk_id] = slot
+                self._doc_lengths.append(length)
+                self._alive.append(1)
+                self._category_codes.append(self._categories.setdefault(category, len(self._categories)))
+                self._live += 1
+                self._total_length += length
+
+                for term, frequency in counts.items():
+                    entry = batch_postings.get(term)
+                    if entry is None:
+                        entry = batch_postings[term] = ([], [])
+                    entry[0].append(slot)
+                    entry[1].append(frequency)
+
+            for term, (slots, frequencies) in batch_postings.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("i"), array("f"))
+                postings[0].extend(slots)
+                postings[1].extend(frequencies)
+                self._df[term] = self._df.get(term, 0) + len(slots)
+            self._idf.clear()
+
+    def remove(self, ids: List[str]) -> None:
+        """Tombstone chunks; unknown ids are ignored"""
+        with self._lock:
+            for chunk_id in ids:
+                slot = self._slot_of.pop(chunk_id, None)
+                if slot is None:
+                    continue
+                self._alive[slot] = 0
+                self._doc_ids[slot] = None
+                self._live -= 1
+                self._total_length -= int(self._doc_lengths[slot])
+                for term in self._doc_terms[slot]:
+                    self._df[term] -= 1
+                self._doc_terms[slot] = ()
+            self._idf.clear()
+
+            dead = len(self._doc_ids) - self._live
+            if dead > 1000 and dead > self._live:
+                self._compact()
+
+    def rebuild(self, ids: List[str], documents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Replace the index contents, e.g. from the vector store at startup"""
+        with self._lock:
+            self.reset()
+            self.add(ids, documents, metadatas)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._df.clear()
+            self._idf.clear()
+            self._doc_ids, self._doc_terms = [], []
+            self._slot_of.clear()
+            self._doc_lengths, self._alive, self._category_codes = array("f"), array("b"), array("i")
+            self._categories.clear()
+            self._live = 0
+            self._total_length = 0
+
+    def _compact(self) -> None:
+        """Drop tombstoned slots and renumber the postings"""
+        alive = np.frombuffer(self._alive, dtype=np.int8).astype(bool)
+        new_slot = np.cumsum(alive, dtype=np.int64) - 1
+
+        for term in list(self._postings):
+            slots = np.frombuffer(self._postings[term][0], dtype=np.int32)
+            frequencies = np.frombuffer(self._postings[term][1], dtype=np.float32)
+            keep = alive[slots]
+            if not keep.any():
+                del self._postings[term]
+                self._df.pop(term, None)
+                continue
+            self._postings[term] = (
+                array("i", new_slot[slots[keep]].astype(np.int32).tobytes()),
+                array("f", frequencies[keep].tobytes())
+            )
+
+        live_slots = np.flatnonzero(alive)
+        self._doc_ids = [self._doc_ids[slot] for slot in live_slots]
+        self._doc_terms = [self._doc_terms[slot] for slot in live_slots]
+        self._doc_lengths = array("f", np.frombuffer(self._doc_lengths, dtype=np.float32)[live_slots].tobytes())
+        self._category_codes = array("i", np.frombuffer(self._category_codes, dtype=np.int32)[live_slots].tobytes())
+        self._alive = array("b", b"\x01" * len(live_slots))
+        self._slot_of = {chunk_id: slot for slot, chunk_id in enumerate(self._doc_ids)}
+
+    # Reads
+
+    def search(self, query: str, n_results: int = 10, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top BM25 matches as {"id", "score", "coverage"} dicts, best first
+
+        ``coverage`` is the share of distinct query terms found in the chunk.
+        """
+        started = time.perf_counter()
+        terms = list(dict.fromkeys(tokenize(query)))
+
+        with self._lock:
+            hits = self._search(terms, n_results, category) if terms and self._live else []
+
+        self.searches += 1
+        self._search_times_us.append((time.perf_counter() - started) * 1e6)
+        return hits
+
+    def _search(self, terms: List[str], n_results: int, category: Optional[str]) -> List[Dict[str, Any]]:
+        category_code = None
+        if category is not None:
+            category_code = self._categories.get(category)
+            if category_code is None:
+                return []
+
+        doc_lengths = np.frombuffer(self._doc_lengths, dtype=np.float32)
+        alive = np.frombuffer(self._alive, dtype=np.int8)
+        category_codes = np.frombuffer(self._category_codes, dtype=np.int32)
+        average_length = self._total_length / self._live if self._live else 1.0
+
+        slot_parts, score_parts = [], []
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None or not self._df.get(term):
+                continue
+            slots = np.frombuffer(postings[0], dtype=np.int32)
+            frequencies = np.frombuffer(postings[1], dtype=np.float32)
+            keep = alive[slots] == 1
+            if category_code is not None:
+                keep &= category_codes[slots] == category_code
+            slots, frequencies = slots[keep], frequencies[keep]
+            if not len(slots):
+                continue
+
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[slots] / average_length)
+            slot_parts.append(slots)
+            score_parts.append(self._term_idf(term) * frequencies * (self.k1 + 1) / (frequencies + norm))
+
+        if not slot_parts:
+            return []
+
+        matched_slots, inverse = np.unique(np.concatenate(slot_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        matched_terms = np.bincount(inverse)
+
+        k = min(n_results, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {
+                "id": self._doc_ids[matched_slots[i]],
+                "score": float(scores[i]),
+                "coverage": float(matched_terms[i]) / len(terms)
+            }
+            for i in top
+        ]
+
+    def _term_idf(self, term: str) -> float:
+        idf = self._idf.get(term)
+        if idf is None:
+            df = self._df.get(term, 0)
+            idf = self._idf[term] = math.log(1 + (self._live - df + 0.5) / (df + 0.5))
+        return idf
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index size and lexical search latency"""
+        times = np.array(self._search_times_us) if self._search_times_us else np.zeros(1)
+        return {
+            "documents": self._live,
+            "tombstones": len(self._doc_ids) - self._live,
+            "terms": len(self._postings),
+            "postings": sum(len(postings[0]) for postings in self._postings.values()),
+            "searches": self.searches,
+            "search_us": {
+                "avg": float(times.mean()),
+                "p95": float(np.percentile(times, 95))
+            }
+        }
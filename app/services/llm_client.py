@@ -0,0 +1,301 @@
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import random
+import time
+import httpx
+import numpy as np
+
+class LLMError(Exception):
+    """A chat completion that failed; retryable errors are worth another attempt"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+class CircuitOpenError(LLMError):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Stops calling upstream after repeated failures, then lets one trial call through
+
+    closed -> open after ``failure_threshold`` consecutive failed calls;
+    open -> half-open once ``reset_seconds`` have passed; a successful trial
+    call closes the circuit again, a failed one re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._trial_running = False
+
+    def release(self) -> None:
+        """Give back a trial call that ended without saying anything about upstream health"""
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+        self._trial_running = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.opened
+        }
+
+class LLMClient:
+    """Chat completions against an OpenAI-compatible API over a pooled HTTP client
+
+    Each call runs under a concurrency limit and an overall deadline that
+    covers retries. Retryable failures (timeouts, connection errors, 429 and
+    5xx) are retried with jittered exponential backoff. Once enough latencies
+    have been seen, a call that outlives the recent p95 is hedged with a
+    second identical request and the first response wins. Repeated failures
+    open the circuit breaker, which fails calls fast with CircuitOpenError.
+    """
+
+    HEDGE_MIN_SAMPLES = 20
+
+    def __init__(self, api_key: str, model: str, base_url: str = "https://api.openai.com/v1",
+                 timeout: float = 30.0, connect_timeout: float = 5.0, max_connections: int = 20,
+                 max_concurrency: int = 8, max_retries: int = 2, backoff_seconds: float = 0.5,
+                 hedge: bool = True, hedge_min_ms: float = 500.0, breaker: Optional[CircuitBreaker] = None):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.hedge = hedge
+        self.hedge_min_ms = hedge_min_ms
+        self.breaker = breaker or CircuitBreaker()
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.in_flight = 0
+        self._latencies_ms = deque(maxlen=1000)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else {},
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def close(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def chat(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.3) -> str:
+        """Return the completion text for a list of chat messages"""
+        payload = {"model": self.model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+        client = self._get_client()
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        deadline = time.monotonic() + self.timeout
+        async with self._slots:
+            self.calls += 1
+            self.in_flight += 1
+            try:
+                text = await self._with_retries(client, payload, deadline)
+            except asyncio.CancelledError:
+                # The caller went away; says nothing about upstream health
+                self.breaker.release()
+                raise
+            except Exception:
+                self.failures += 1
+                self.breaker.record_failure()
+                raise
+            finally:
+                self.in_flight -= 1
+        self.breaker.record_success()
+        return text
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int = 500,
+                     temperature: float = 0.3) -> AsyncIterator[str]:
+        """Yield completion text as it is generated
+
+        Streams are neither retried nor hedged once started; the timeout
+        applies to each read rather than the whole answer.
+        """
+        payload = {"model": self.model, "messages": messages, "max_tokens": max_tokens,
+                   "temperature": temperature, "stream": True}
+        client = self._get_client()
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        async with self._slots:
+            self.calls += 1
+            self.in_flight += 1
+            try:
+                async with client.stream("POST", "/chat/completions", json=payload) as response:
+                    if response.status_code >= 400:
+                        await response.aread()
+                        raise self._status_error(response)
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        text = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                        if text:
+                            yield text
+            except httpx.HTTPError as e:
+                self.failures += 1
+                self.breaker.record_failure()
+                raise LLMError(f"LLM stream failed: {e!r}", retryable=True) from e
+            except LLMError:
+                self.failures += 1
+                self.breaker.record_failure()
+                raise
+            except (asyncio.CancelledError, GeneratorExit):
+                self.breaker.release()
+                raise
+            finally:
+                self.in_flight -= 1
+        self.breaker.record_success()
+
+    async def _with_retries(self, client: httpx.AsyncClient, payload: Dict[str, Any], deadline: float) -> str:
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(client, payload, deadline)
+            except LLMError as e:
+                # Full jitter keeps retries from many workers from arriving together
+                delay = random.uniform(0, self.backoff_seconds * 2 ** attempt)
+                if not e.retryable or attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    raise
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _hedged(self, client: httpx.AsyncClient, payload: Dict[str, Any], deadline: float) -> str:
+        first = asyncio.create_task(self._post(client, payload, deadline))
+        tasks = {first}
+        try:
+            hedge_after = self._hedge_delay()
+            if hedge_after is None:
+                return await first
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                self.hedges += 1
+                tasks.add(asyncio.create_task(self._post(client, payload, deadline)))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging: the recent p95 latency, once there are enough samples"""
+        if not self.hedge or len(self._latencies_ms) < self.HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.hedge_min_ms, float(np.percentile(self._latencies_ms, 95))) / 1000
+
+    async def _post(self, client: httpx.AsyncClient, payload: Dict[str, Any], deadline: float) -> str:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMError("LLM deadline exceeded")
+        started = time.perf_counter()
+        try:
+            response = await client.post(
+                "/chat/completions", json=payload,
+                timeout=httpx.Timeout(remaining, connect=min(self.connect_timeout, remaining))
+            )
+        except httpx.HTTPError as e:
+            raise LLMError(f"LLM request failed: {e!r}", retryable=True) from e
+        if response.status_code >= 400:
+            raise self._status_error(response)
+
+        try:
+            text = response.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError) as e:
+            raise LLMError(f"Unexpected LLM response: {e!r}") from e
+        self._latencies_ms.append((time.perf_counter() - started) * 1000)
+        return text
+
+    def _status_error(self, response: httpx.Response) -> LLMError:
+        retryable = response.status_code == 429 or response.status_code >= 500
+        return LLMError(f"LLM returned HTTP {response.status_code}: {response.text[:200]}", retryable=retryable)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get call counts, retry and hedge activity and upstream latency"""
+        latencies = np.array(self._latencies_ms) if self._latencies_ms else np.zeros(1)
+        hedge_after = self._hedge_delay()
+        return {
+            "model": self.model,
+            "base_url": self.base_url,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_after_ms": hedge_after * 1000 if hedge_after is not None else None,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "latency_ms": {
+                "avg": float(latencies.mean()),
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95))
+            },
+            "circuit_breaker": self.breaker.stats()
+        }
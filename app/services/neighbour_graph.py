@@ -0,0 +1,250 @@
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import json
+import os
+import threading
+import numpy as np
+
+from app.services.vector_stores.base import VectorStore
+
+Neighbours = List[Tuple[str, float]]
+
+class NeighbourGraph:
+    """Precomputed top-N related chunks and related policies
+
+    Chunk lists come from the vector store when chunks are ingested: each new chunk
+    gets its own neighbour list and is inserted into the lists of the chunks it
+    found. Policies are compared by the mean of their chunk embeddings, which is
+    kept as a running sum so policy lists can be recomputed without reading the
+    store. Reads never touch the encoder or the store, and take no lock: writers
+    replace lists rather than mutating them.
+    """
+
+    QUERY_BATCH_SIZE = 256
+
+    def __init__(self, vector_store: VectorStore, path: str, n_neighbours: int = 10):
+        self.vector_store = vector_store
+        self.path = path
+        self.n_neighbours = n_neighbours
+
+        self._lock = threading.RLock()
+        self._chunk_neighbours: Dict[str, Neighbours] = {}
+        self._chunk_policy: Dict[str, str] = {}
+        self._policies: Dict[str, Dict[str, Any]] = {}
+        self._policy_sums: Dict[str, np.ndarray] = {}
+        self._policy_neighbours: Dict[str, Neighbours] = {}
+        self._stale: set = set()
+
+        self._load()
+
+    # Reads
+
+    def chunk_neighbours(self, chunk_id: str, n_results: int = 3) -> Optional[Neighbours]:
+        """Related chunks as (chunk_id, similarity), or None for an unknown chunk"""
+        neighbours = self._chunk_neighbours.get(chunk_id)
+        return None if neighbours is None else neighbours[:n_results]
+
+    def related_policies(self, policy_key: str, n_results: int = 3) -> Optional[List[Dict[str, Any]]]:
+        """Related policies for a policy ID (or title for uploaded documents), or None if unknown"""
+        neighbours = self._policy_neighbours.get(policy_key)
+        if neighbours is None:
+            return None
+        return [
+            {
+                "policy_id": key,
+                "title": self._policies[key]["title"],
+                "category": self._policies[key]["category"],
+                "similarity_score": score
+            }
+            for key, score in neighbours[:n_results] if key in self._policies
+        ]
+
+    def __len__(self) -> int:
+        return len(self._chunk_neighbours)
+
+    # Writes
+
+    def add(self, ids: List[str], embeddings: Sequence[Sequence[float]], metadatas: List[Dict[str, Any]]) -> None:
+        """Link chunks that were just written to the vector store"""
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            for start in range(0, len(ids), self.QUERY_BATCH_SIZE):
+                batch_ids = ids[start:start + self.QUERY_BATCH_SIZE]
+                found = self._query(vectors[start:start + self.QUERY_BATCH_SIZE], batch_ids)
+                for chunk_id, neighbours in zip(batch_ids, found):
+                    self._chunk_neighbours[chunk_id] = neighbours[:self.n_neighbours]
+                    # The new chunk may now belong in the lists of the chunks it found
+                    for other_id, score in neighbours:
+                        self._offer(other_id, chunk_id, score)
+
+            for chunk_id, vector, metadata in zip(ids, vectors, metadatas):
+                key = self._policy_key(metadata)
+                self._chunk_policy[chunk_id] = key
+                policy = self._policies.setdefault(key, {
+                    "title": metadata.get("title", ""),
+                    "category": metadata.get("category", ""),
+                    "chunks": 0
+                })
+                policy["chunks"] += 1
+                self._policy_sums[key] = self._policy_sums.get(key, 0) + vector
+
+            self._refresh_policy_neighbours()
+            self._persist()
+
+    def forget(self, ids: List[str]) -> None:
+        """Unlink chunks that are about to be deleted from the vector store
+
+        Chunks that listed them are marked stale; call refresh_stale() once the
+        store delete has happened.
+        """
+        doomed = set(ids)
+        with self._lock:
+            stored = self.vector_store.get(ids=list(ids), include=["embeddings"])
+            for chunk_id, vector in zip(stored["ids"], self._normalize(stored["embeddings"])):
+                key = self._chunk_policy.pop(chunk_id, None)
+                if key is None:
+                    continue
+                self._policy_sums[key] = self._policy_sums[key] - vector
+                self._policies[key]["chunks"] -= 1
+                if self._policies[key]["chunks"] <= 0:
+                    del self._policies[key]
+                    del self._policy_sums[key]
+
+            for chunk_id in doomed:
+                self._chunk_neighbours.pop(chunk_id, None)
+                self._stale.discard(chunk_id)
+            for chunk_id, neighbours in list(self._chunk_neighbours.items()):
+                if any(other_id in doomed for other_id, _ in neighbours):
+                    self._chunk_neighbours[chunk_id] = [(other_id, score) for other_id, score in neighbours if other_id not in doomed]
+                    self._stale.add(chunk_id)
+
+            self._refresh_policy_neighbours()
+            self._persist()
+
+    def refresh_stale(self) -> None:
+        """Recompute neighbour lists that lost entries to deletions"""
+        with self._lock:
+            if not self._stale:
+                return
+            stale = list(self._stale)
+            self._stale.clear()
+
+            stored = self.vector_store.get(ids=stale, include=["embeddings"])
+            vectors = self._normalize(stored["embeddings"])
+            for start in range(0, len(stored["ids"]), self.QUERY_BATCH_SIZE):
+                batch_ids = stored["ids"][start:start + self.QUERY_BATCH_SIZE]
+                found = self._query(vectors[start:start + self.QUERY_BATCH_SIZE], batch_ids)
+                for chunk_id, neighbours in zip(batch_ids, found):
+                    self._chunk_neighbours[chunk_id] = neighbours[:self.n_neighbours]
+            self._persist()
+
+    def rebuild(self) -> None:
+        """Recompute the whole graph from the vector store"""
+        with self._lock:
+            self.reset()
+            stored = self.vector_store.get(include=["embeddings", "metadatas"])
+            if stored["ids"]:
+                self.add(stored["ids"], stored["embeddings"], stored["metadatas"])
+
+    def reset(self) -> None:
+        with self._lock:
+            self._chunk_neighbours.clear()
+            self._chunk_policy.clear()
+            self._policies.clear()
+            self._policy_sums.clear()
+            self._policy_neighbours = {}
+            self._stale.clear()
+            self._persist()
+
+    # Helpers
+
+    def _query(self, vectors: np.ndarray, ids: List[str]) -> List[Neighbours]:
+        # Ask for extra rows so reverse links reach chunks slightly outside the top N
+        results = self.vector_store.query(
+            query_embeddings=vectors.tolist(),
+            n_results=self.n_neighbours * 2 + 1,
+            include=["distances"]
+        )
+        found = []
+        for chunk_id, neighbour_ids, distances in zip(ids, results["ids"], results["distances"]):
+            found.append([
+                (other_id, round(1 - distance, 6))
+                for other_id, distance in zip(neighbour_ids, distances) if other_id != chunk_id
+            ])
+        return found
+
+    def _offer(self, chunk_id: str, candidate_id: str, score: float) -> None:
+        neighbours = self._chunk_neighbours.get(chunk_id)
+        if neighbours is None or any(other_id == candidate_id for other_id, _ in neighbours):
+            return
+        if len(neighbours) < self.n_neighbours or score > neighbours[-1][1]:
+            updated = sorted(neighbours + [(candidate_id, score)], key=lambda item: item[1], reverse=True)
+            self._chunk_neighbours[chunk_id] = updated[:self.n_neighbours]
+
+    def _refresh_policy_neighbours(self) -> None:
+        keys = list(self._policy_sums)
+        if not keys:
+            self._policy_neighbours = {}
+            return
+
+        centroids = self._normalize(np.stack([self._policy_sums[key] for key in keys]))
+        similarities = centroids @ centroids.T
+        np.fill_diagonal(similarities, -np.inf)
+        order = np.argsort(-similarities, axis=1)[:, :self.n_neighbours]
+        self._policy_neighbours = {
+            key: [(keys[j], round(float(similarities[i, j]), 6)) for j in order[i] if j != i]
+            for i, key in enumerate(keys)
+        }
+
+    def _policy_key(self, metadata: Dict[str, Any]) -> str:
+        policy_id = metadata.get("policy_id")
+        return str(policy_id) if policy_id is not None else metadata.get("title", "")
+
+    def _normalize(self, vectors: Optional[Sequence[Sequence[float]]]) -> np.ndarray:
+        vectors = np.asarray(vectors if vectors is not None else [], dtype=np.float32)
+        if vectors.size == 0:
+            return vectors.reshape(0, 0)
+        vectors = np.atleast_2d(vectors)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _persist(self) -> None:
+        graph = {
+            "n_neighbours": self.n_neighbours,
+            "chunks": self._chunk_neighbours,
+            "chunk_policy": self._chunk_policy,
+            "policies": self._policies,
+            "policy_sums": {key: vector.tolist() for key, vector in self._policy_sums.items()},
+            "stale": list(self._stale)
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(graph, f, separators=(",", ":"))
+        os.replace(self.path + ".tmp", self.path)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            graph = json.load(f)
+
+        self._chunk_neighbours = {
+            chunk_id: [(other_id, score) for other_id, score in neighbours]
+            for chunk_id, neighbours in graph["chunks"].items()
+        }
+        self._chunk_policy = graph["chunk_policy"]
+        self._policies = graph["policies"]
+        self._policy_sums = {key: np.array(vector, dtype=np.float32) for key, vector in graph["policy_sums"].items()}
+        self._stale = set(graph.get("stale", []))
+        self._refresh_policy_neighbours()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": len(self._chunk_neighbours),
+            "policies": len(self._policies),
+            "n_neighbours": self.n_neighbours,
+            "stale": len(self._stale)
+        }
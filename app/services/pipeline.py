@@ -0,0 +1,86 @@
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+import asyncio
+import time
+import numpy as np
+
+Stage = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+class StageTimings:
+    """Rolling per-stage latency across pipeline runs"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.runs = 0
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, durations_ms: Dict[str, float]) -> None:
+        self.runs += 1
+        for name, duration in durations_ms.items():
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(duration)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get latency per stage"""
+        stages = {}
+        for name, samples in self._samples.items():
+            times = np.array(samples)
+            stages[name] = {
+                "count": len(times),
+                "avg_ms": float(times.mean()),
+                "p50_ms": float(np.percentile(times, 50)),
+                "p95_ms": float(np.percentile(times, 95))
+            }
+        return {"runs": self.runs, "stages": stages}
+
+class Pipeline:
+    """A graph of async stages; each stage starts as soon as the stages it depends on finish
+
+    A stage is called with the results of the stages run so far, keyed by name,
+    plus any inputs passed to run(). Stage timings measure running time only,
+    not time spent waiting on dependencies; "total" is the wall time of the run.
+    """
+
+    def __init__(self, timings: Optional[StageTimings] = None):
+        self.timings = timings
+        self.durations_ms: Dict[str, float] = {}
+        self._stages: Dict[str, Tuple[Stage, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, stage: Stage, after: Iterable[str] = ()) -> "Pipeline":
+        """Add a stage that runs once every stage in ``after`` has finished"""
+        after = tuple(after)
+        for dependency in after:
+            if dependency not in self._stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dependency!r}")
+        self._stages[name] = (stage, after)
+        return self
+
+    async def run(self, **inputs: Any) -> Dict[str, Any]:
+        """Run every stage and return all results by stage name"""
+        results: Dict[str, Any] = dict(inputs)
+        tasks: Dict[str, asyncio.Task] = {}
+        started = time.perf_counter()
+
+        async def run_stage(name: str, stage: Stage, after: Tuple[str, ...]) -> None:
+            if after:
+                await asyncio.gather(*(tasks[dependency] for dependency in after))
+            stage_started = time.perf_counter()
+            try:
+                results[name] = await stage(results)
+            finally:
+                self.durations_ms[name] = (time.perf_counter() - stage_started) * 1000
+
+        # Dependencies are always added first, so their tasks already exist
+        for name, (stage, after) in self._stages.items():
+            tasks[name] = asyncio.create_task(run_stage(name, stage, after))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            self.durations_ms["total"] = (time.perf_counter() - started) * 1000
+            if self.timings is not None:
+                self.timings.record(self.durations_ms)
+        return results
@@ -1,15 +1,18 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
+import os
 from app.db.models import Policy, PolicyChunk
 from app.models.schemas import PolicyCreate, PolicyResponse, PolicyChunkResponse
 from app.services.document_processor import DocumentProcessor
+from app.core.executors import io_bound, run_io
 
 class PolicyService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, document_processor: DocumentProcessor):
         self.db = db
-        self.document_processor = DocumentProcessor()
+        self.document_processor = document_processor
     
-    async def get_policies(self, category: str = None, is_active: bool = True) -> List[PolicyResponse]:
+    @io_bound
+    def get_policies(self, category: str = None, is_active: bool = True) -> List[PolicyResponse]:
         """Get all policies with optional filtering"""
         query = self.db.query(Policy).filter(Policy.is_active == is_active)
         
@@ -19,7 +22,8 @@ class PolicyService:
         policies = query.all()
         return [PolicyResponse.from_orm(policy) for policy in policies]
     
-    async def get_policy(self, policy_id: int) -> Optional[PolicyResponse]:
+    @io_bound
+    def get_policy(self, policy_id: int) -> Optional[PolicyResponse]:
         """Get a specific policy by ID"""
         policy = self.db.query(Policy).filter(Policy.id == policy_id).first()
         if policy:
@@ -28,6 +32,16 @@ class PolicyService:
     
     async def create_policy(self, policy_data: PolicyCreate) -> PolicyResponse:
         """Create a new policy"""
+        policy = await self._insert_policy(policy_data)
+        
+        # Process the policy content into chunks
+        await self._process_policy_chunks(policy)
+        
+        return await run_io(PolicyResponse.from_orm, policy)
+    
+    @io_bound
+    def _insert_policy(self, policy_data: PolicyCreate) -> Policy:
+        """Insert a policy row"""
         policy = Policy(
             title=policy_data.title,
             content=policy_data.content,
@@ -39,18 +53,37 @@ class PolicyService:
         self.db.add(policy)
         self.db.commit()
         self.db.refresh(policy)
-        
-        # Process the policy content into chunks
-        await self._process_policy_chunks(policy)
-        
-        return PolicyResponse.from_orm(policy)
+        return policy
     
     async def update_policy(self, policy_id: int, policy_data: PolicyCreate) -> Optional[PolicyResponse]:
         """Update an existing policy"""
-        policy = self.db.query(Policy).filter(Policy.id == policy_id).first()
+        policy, chunks_changed = await self._apply_policy_update(policy_id, policy_data)
         if not policy:
             return None
         
+        # Cached answers may quote the old title, category or content
+        self.document_processor.invalidate_policy(policy_id)
+        
+        # Reprocess chunks if their text or metadata changed
+        if chunks_changed:
+            await self._reprocess_policy_chunks(policy)
+        
+        return await run_io(PolicyResponse.from_orm, policy)
+    
+    @io_bound
+    def _apply_policy_update(self, policy_id: int, policy_data: PolicyCreate) -> Tuple[Optional[Policy], bool]:
+        """Write updated fields to a policy row and report whether its chunks need reprocessing"""
+        policy = self.db.query(Policy).filter(Policy.id == policy_id).first()
+        if not policy:
+            return None, False
+        
+        # Title and category are stored in chunk metadata and pick the chunk's partition
+        chunks_changed = (
+            policy.content != policy_data.content
+            or policy.title != policy_data.title
+            or policy.category != policy_data.category
+        )
+        
         policy.title = policy_data.title
         policy.content = policy_data.content
         policy.category = policy_data.category
@@ -59,14 +92,10 @@ class PolicyService:
         
         self.db.commit()
         self.db.refresh(policy)
-        
-        # Reprocess chunks if content changed
-        if policy.content != policy_data.content:
-            await self._reprocess_policy_chunks(policy)
-        
-        return PolicyResponse.from_orm(policy)
+        return policy, chunks_changed
     
-    async def delete_policy(self, policy_id: int) -> bool:
+    @io_bound
+    def delete_policy(self, policy_id: int) -> bool:
         """Soft delete a policy"""
         policy = self.db.query(Policy).filter(Policy.id == policy_id).first()
         if not policy:
@@ -74,9 +103,11 @@ class PolicyService:
         
         policy.is_active = False
         self.db.commit()
+        self.document_processor.invalidate_policy(policy_id)
         return True
     
-    async def get_policy_chunks(self, policy_id: int) -> List[PolicyChunkResponse]:
+    @io_bound
+    def get_policy_chunks(self, policy_id: int) -> List[PolicyChunkResponse]:
         """Get chunks for a specific policy"""
         chunks = self.db.query(PolicyChunk).filter(
             PolicyChunk.policy_id == policy_id
@@ -89,43 +120,63 @@ class PolicyService:
         try:
             # Create a temporary file for processing
             temp_file = f"temp_policy_{policy.id}.txt"
-            with open(temp_file, "w", encoding="utf-8") as f:
-                f.write(policy.content)
+            await run_io(self._write_temp_file, temp_file, policy.content)
             
             # Process the document
             result = await self.document_processor.process_document(
                 file_path=temp_file,
                 category=policy.category,
                 title=policy.title,
-                description=f"Policy: {policy.title}"
+                description=f"Policy: {policy.title}",
+                policy_id=policy.id
             )
             
             if result["success"]:
                 # Store chunk references in database
-                for i, chunk_id in enumerate(result.get("chunk_ids", [])):
-                    chunk = PolicyChunk(
-                        policy_id=policy.id,
-                        content="",  # Content is stored in vector DB
-                        chunk_index=i,
-                        embedding_id=chunk_id
-                    )
-                    self.db.add(chunk)
-                
-                self.db.commit()
+                await self._store_chunk_refs(policy.id, result.get("chunk_ids", []))
             
             # Clean up temp file
-            import os
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+            await run_io(self._remove_temp_file, temp_file)
                 
         except Exception as e:
             print(f"Error processing policy chunks: {e}")
     
+    @io_bound
+    def _store_chunk_refs(self, policy_id: int, chunk_ids: List[str]) -> None:
+        """Store references to a policy's vector chunks"""
+        for i, chunk_id in enumerate(chunk_ids):
+            chunk = PolicyChunk(
+                policy_id=policy_id,
+                content="",  # Content is stored in vector DB
+                chunk_index=i,
+                embedding_id=chunk_id
+            )
+            self.db.add(chunk)
+        
+        self.db.commit()
+    
+    def _write_temp_file(self, path: str, content: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    
+    def _remove_temp_file(self, path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path)
+    
     async def _reprocess_policy_chunks(self, policy: Policy) -> None:
         """Reprocess policy chunks after content update"""
         # Delete existing chunks
-        self.db.query(PolicyChunk).filter(PolicyChunk.policy_id == policy.id).delete()
-        self.db.commit()
+        old_chunk_ids = await self._delete_chunk_refs(policy.id)
+        await self.document_processor.delete_chunks(old_chunk_ids)
         
         # Process new chunks
         await self._process_policy_chunks(policy)
+    
+    @io_bound
+    def _delete_chunk_refs(self, policy_id: int) -> List[str]:
+        """Delete a policy's chunk references and return their vector chunk IDs"""
+        refs = self.db.query(PolicyChunk).filter(PolicyChunk.policy_id == policy_id)
+        chunk_ids = [chunk.embedding_id for chunk in refs.all() if chunk.embedding_id]
+        refs.delete()
+        self.db.commit()
+        return chunk_ids
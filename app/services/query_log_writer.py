@@ -0,0 +1,254 @@
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import asyncio
+import threading
+import time
+import numpy as np
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.executors import run_io
+from app.db.models import IdBlock, Query, QueryFeedback, QueryForm, QueryStageTiming
+from app.services.spans import SpanRecorder
+
+class QueryLogWriter:
+    """Persist queries, their suggested forms, stage timings and feedback in the background, with its own database session
+
+    Records go on a bounded queue and are written in multi-row transactions
+    of up to flush_size records, at most flush_interval_ms after the first
+    one arrives. Each transaction holds the database write lock once,
+    instead of once per query. When the queue is full, submitting waits for
+    a flush, so bursts slow down instead of exhausting memory.
+
+    Query IDs are handed out before the insert, so responses can carry them
+    at once. IDs come from blocks reserved in the id_blocks table; several
+    workers can share one database without reusing an ID. Everything queued
+    is flushed on shutdown.
+
+    A query's span recorder is read when its batch is written, by which time
+    its persistence span has closed, so the stored response time and stage
+    timings cover the whole request.
+    """
+
+    ID_BLOCK_NAME = "queries"
+
+    def __init__(self, session_factory: Callable[[], Session], max_queue: int = 10000, flush_size: int = 200,
+                 flush_interval_ms: float = 50.0, id_block_size: int = 100):
+        self.session_factory = session_factory
+        self.max_queue = max_queue
+        self.flush_size = flush_size
+        self.flush_interval_ms = flush_interval_ms
+        self.id_block_size = id_block_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self._id_lock = threading.Lock()
+        self._next_id = 0
+        self._id_limit = 0
+
+        # Metrics
+        self.written = {"queries": 0, "forms": 0, "stage_timings": 0, "feedback": 0}
+        self.failed = 0
+        self.flushes = 0
+        self.blocked_submits = 0
+        self.id_blocks = 0
+        self._queue_delays_ms = deque(maxlen=1000)
+        self._flush_times_ms = deque(maxlen=1000)
+        self._flush_sizes = deque(maxlen=1000)
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def available(self) -> bool:
+        """Whether submit() can be called from the current event loop"""
+        if not self.running or self._stopping:
+            return False
+        try:
+            return asyncio.get_running_loop() is self._worker.get_loop()
+        except RuntimeError:
+            return False
+
+    async def start(self) -> None:
+        """Start the background writer on the running event loop"""
+        if self.running:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write everything still queued, then stop the writer"""
+        if self._worker is None:
+            return
+        self._stopping = True
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def submit(self, question: str, answer: str, confidence_score: float, user_id: str = None,
+                     suggested_forms: Optional[List[Dict[str, Any]]] = None, spans: Optional[SpanRecorder] = None) -> int:
+        """Queue a query record with its suggested forms and stage timings and return the query's ID"""
+        if self._next_id < self._id_limit:
+            query_id = self.reserve_id()
+        else:
+            query_id = await run_io(self.reserve_id)
+        record = {
+            "id": query_id,
+            "user_id": user_id,
+            "question": question,
+            "answer": answer,
+            "confidence_score": confidence_score
+        }
+        forms = [
+            {"query_id": query_id, "form_id": form["id"], "relevance_score": form.get("relevance_score")}
+            for form in suggested_forms or []
+        ]
+        await self._put(("query", record, forms, spans))
+        return query_id
+
+    async def submit_feedback(self, query_id: int, rating: int, is_helpful: bool, comments: str = None) -> None:
+        """Queue a feedback record"""
+        record = {
+            "query_id": query_id,
+            "rating": rating,
+            "is_helpful": is_helpful,
+            "comments": comments
+        }
+        await self._put(("feedback", record, [], None))
+
+    async def _put(self, item: Tuple[str, Dict[str, Any], List[Dict[str, Any]], Optional[SpanRecorder]]) -> None:
+        if self._queue.full():
+            self.blocked_submits += 1
+        await self._queue.put((item, time.perf_counter()))
+
+    def reserve_id(self) -> int:
+        """Next query ID, reserving a new block from the database when this one is used up"""
+        with self._id_lock:
+            if self._next_id >= self._id_limit:
+                self._next_id, self._id_limit = self._reserve_block()
+                self.id_blocks += 1
+            query_id = self._next_id
+            self._next_id += 1
+            return query_id
+
+    def _reserve_block(self) -> Tuple[int, int]:
+        """Reserve the next id_block_size query IDs; the counter update serialises writers across processes"""
+        db = self.session_factory()
+        try:
+            for _ in range(2):
+                updated = db.query(IdBlock).filter(IdBlock.name == self.ID_BLOCK_NAME).update(
+                    {IdBlock.next_id: IdBlock.next_id + self.id_block_size}, synchronize_session=False
+                )
+                if updated:
+                    limit = db.query(IdBlock.next_id).filter(IdBlock.name == self.ID_BLOCK_NAME).scalar()
+                    db.commit()
+                    return limit - self.id_block_size, limit
+
+                # First block ever: start after the queries saved before IDs were reserved
+                start = (db.query(func.max(Query.id)).scalar() or 0) + 1
+                db.add(IdBlock(name=self.ID_BLOCK_NAME, next_id=start + self.id_block_size))
+                try:
+                    db.commit()
+                    return start, start + self.id_block_size
+                except IntegrityError:
+                    db.rollback()  # Another worker created the counter first
+            raise RuntimeError("Could not reserve query IDs")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.qsize() < self.flush_size - 1 and not self._stopping:
+                # Let a batch build up; the IDs are already out, so nobody waits on this
+                await asyncio.sleep(self.flush_interval_ms / 1000)
+            while len(batch) < self.flush_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            started = time.perf_counter()
+            try:
+                items = [item for item, _ in batch]
+                try:
+                    await run_io(self._write, items)
+                except Exception as e:
+                    print(f"Error saving query batch, retrying one record at a time: {e}")
+                    for item in items:
+                        try:
+                            await run_io(self._write, [item])
+                        except Exception as item_error:
+                            print(f"Error saving {item[0]} record: {item_error}")
+                            self.failed += 1
+                self.flushes += 1
+            finally:
+                for _, enqueued in batch:
+                    self._queue_delays_ms.append((started - enqueued) * 1000)
+                self._flush_times_ms.append((time.perf_counter() - started) * 1000)
+                self._flush_sizes.append(len(batch))
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, items: List[Tuple[str, Dict[str, Any], List[Dict[str, Any]], Optional[SpanRecorder]]]) -> None:
+        """Insert a batch in one transaction; queries go first so the other rows can reference them"""
+        queries, forms, timings, feedback = [], [], [], []
+        for kind, record, query_forms, spans in items:
+            if kind == "feedback":
+                feedback.append(record)
+                continue
+            queries.append({**record, "response_time_ms": spans.total_ms() if spans is not None else None})
+            forms.extend(query_forms)
+            if spans is not None:
+                timings.extend(
+                    {"query_id": record["id"], "stage": stage, "duration_ms": duration}
+                    for stage, duration in spans.durations().items()
+                )
+
+        db = self.session_factory()
+        try:
+            for model, rows in ((Query, queries), (QueryForm, forms), (QueryStageTiming, timings), (QueryFeedback, feedback)):
+                if rows:
+                    db.execute(insert(model), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self.written["queries"] += len(queries)
+        self.written["forms"] += len(forms)
+        self.written["stage_timings"] += len(timings)
+        self.written["feedback"] += len(feedback)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, write counts and flush latency"""
+        delays = np.array(self._queue_delays_ms) if self._queue_delays_ms else np.zeros(1)
+        flush_times = np.array(self._flush_times_ms) if self._flush_times_ms else np.zeros(1)
+        flush_sizes = np.array(self._flush_sizes) if self._flush_sizes else np.zeros(1)
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.max_queue,
+            "blocked_submits": self.blocked_submits,
+            "written": dict(self.written),
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "avg_flush_size": float(flush_sizes.mean()),
+            "id_blocks_reserved": self.id_blocks,
+            "queue_delay_ms": {
+                "avg": float(delays.mean()),
+                "p95": float(np.percentile(delays, 95))
+            },
+            "flush_ms": {
+                "avg": float(flush_times.mean()),
+                "p95": float(np.percentile(flush_times, 95))
+            }
+        }
@@ -0,0 +1,84 @@
+from collections import deque
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from app.services.search_result import SearchResult
+
+class QueryRouter:
+    """Decide from retrieval scores whether a question needs the LLM
+
+    not_covered: nothing retrieved, or the best similarity is below the floor
+    extractive:  the best similarity reaches the ceiling; the chunks' own sentences answer it
+    llm:         everything in between
+
+    Questions answered from the fact table before retrieval are recorded
+    under fact.
+
+    Results from a decisive keyword match (every question term, well ahead
+    of the next BM25 hit) skip vector search and carry no similarity score;
+    they count as reaching the ceiling. Any other results without a
+    similarity score go to the LLM. A request can also ask for a mode:
+    "extractive" never uses the LLM and "llm" always does, though uncovered
+    questions stay uncovered in every mode. Latency per tier, answer cache
+    hits included, is kept for stats().
+    """
+
+    CACHED = "cached"
+    NOT_COVERED = "not_covered"
+    EXTRACTIVE = "extractive"
+    LLM = "llm"
+    FACT = "fact"
+    TIERS = (CACHED, FACT, NOT_COVERED, EXTRACTIVE, LLM)
+
+    def __init__(self, similarity_floor: float = 0.25, extractive_ceiling: float = 0.85, enabled: bool = True,
+                 window: int = 1000):
+        self.similarity_floor = similarity_floor
+        self.extractive_ceiling = extractive_ceiling
+        self.enabled = enabled
+        self._counts = {tier: 0 for tier in self.TIERS}
+        self._latencies_ms = {tier: deque(maxlen=window) for tier in self.TIERS}
+
+    def route(self, chunks: List[SearchResult], mode: str = "auto") -> str:
+        """Pick the tier for a question from its retrieved chunks and the requested mode"""
+        if not chunks:
+            return self.NOT_COVERED
+        best = self.best_similarity(chunks)
+        if self.enabled and best is not None and best < self.similarity_floor:
+            return self.NOT_COVERED
+        if mode != "auto":
+            return mode
+        if not self.enabled:
+            return self.LLM
+        if best is None:
+            return self.EXTRACTIVE if chunks[0].exact_match else self.LLM
+        if best >= self.extractive_ceiling:
+            return self.EXTRACTIVE
+        return self.LLM
+
+    def best_similarity(self, chunks: List[SearchResult]) -> Optional[float]:
+        scores = [chunk.similarity_score for chunk in chunks if chunk.similarity_score is not None]
+        return max(scores) if scores else None
+
+    def record(self, tier: str, elapsed_ms: float) -> None:
+        self._counts[tier] += 1
+        self._latencies_ms[tier].append(elapsed_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get each tier's share of traffic and latency"""
+        total = sum(self._counts.values())
+        tiers = {}
+        for tier in self.TIERS:
+            latencies = np.array(self._latencies_ms[tier]) if self._latencies_ms[tier] else np.zeros(1)
+            tiers[tier] = {
+                "count": self._counts[tier],
+                "share": self._counts[tier] / total if total else 0.0,
+                "avg_ms": float(latencies.mean()),
+                "p95_ms": float(np.percentile(latencies, 95))
+            }
+        return {
+            "enabled": self.enabled,
+            "similarity_floor": self.similarity_floor,
+            "extractive_ceiling": self.extractive_ceiling,
+            "queries": total,
+            "tiers": tiers
+        }
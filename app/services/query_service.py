@@ -1,27 +1,116 @@
 from sqlalchemy.orm import Session
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator, Tuple
 from datetime import datetime
-import openai
+import asyncio
 from app.core.config import settings
-from app.db.models import Query, QueryFeedback, QueryForm, Form
+from app.db.models import Query, QueryFeedback, QueryForm, QueryStageTiming, Form
 from app.services.vector_search import VectorSearchService
+from app.services.search_result import SearchResult
+from app.services.context_builder import ContextBuilder
+from app.services.pipeline import Pipeline, StageTimings
+from app.services.query_log_writer import QueryLogWriter
+from app.services.answer_cache import AnswerCache
+from app.services.semantic_cache import SemanticCache
+from app.services.singleflight import Singleflight
+from app.services.llm_client import LLMClient
+from app.services.query_router import QueryRouter
+from app.services.extractive_answerer import ExtractiveAnswerer
+from app.services.fact_index import FactIndex
+from app.services.spans import SpanRecorder, current_spans, span, start_spans
 from app.services.form_service import FormService
+from app.core.executors import io_bound
+from app.utils.text import normalize_question, tokenize
 import json
+import time
+
+SYSTEM_PROMPT = "You are a helpful HR assistant."
+
+ANSWER_PROMPT = """
+You are an HR assistant helping employees with policy questions. Use the provided context to answer the question accurately and helpfully.
+
+Context:
+{context}
+
+Question: {question}
+
+Instructions:
+1. Answer based on the provided context
+2. Be specific and cite relevant policy sections when possible
+3. If the context doesn't contain enough information, say so clearly
+4. Provide actionable guidance when appropriate
+5. Be professional and helpful
+6. If forms are needed, mention them but don't provide links (those will be handled separately)
+
+Answer:"""
 
 class QueryService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, vector_search: VectorSearchService, context_builder: Optional[ContextBuilder] = None,
+                 query_log: Optional[QueryLogWriter] = None, stage_timings: Optional[StageTimings] = None,
+                 answer_cache: Optional[AnswerCache] = None, semantic_cache: Optional[SemanticCache] = None,
+                 singleflight: Optional[Singleflight] = None, llm_client: Optional[LLMClient] = None,
+                 router: Optional[QueryRouter] = None, extractive_answerer: Optional[ExtractiveAnswerer] = None,
+                 fact_index: Optional[FactIndex] = None):
         self.db = db
-        self.vector_search = VectorSearchService()
+        self.vector_search = vector_search
+        self.query_log = query_log
+        self.stage_timings = stage_timings
+        self.answer_cache = answer_cache
+        self.semantic_cache = semantic_cache
+        self.singleflight = singleflight
+        self.fact_index = fact_index
+        self._db_lock = asyncio.Lock()  # The request's session must not be used from two threads at once
+        self.context_builder = context_builder or ContextBuilder(
+            model=settings.OPENAI_MODEL,
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            mmr_lambda=settings.CONTEXT_MMR_LAMBDA,
+            duplicate_threshold=settings.CONTEXT_DUPLICATE_THRESHOLD,
+            score_gap=settings.CONTEXT_SCORE_GAP,
+            min_chunks=settings.CONTEXT_MIN_CHUNKS
+        )
+        self.llm_client = llm_client or LLMClient(
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.OPENAI_MODEL,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            max_retries=settings.LLM_MAX_RETRIES,
+            hedge=settings.LLM_HEDGE_ENABLED
+        )
+        self.router = router or QueryRouter(
+            similarity_floor=settings.ROUTING_SIMILARITY_FLOOR,
+            extractive_ceiling=settings.ROUTING_EXTRACTIVE_CEILING,
+            enabled=settings.ROUTING_ENABLED
+        )
+        self.extractive_answerer = extractive_answerer or ExtractiveAnswerer(
+            vector_search,
+            max_sentences=settings.EXTRACTIVE_MAX_SENTENCES,
+            min_score=settings.EXTRACTIVE_MIN_SCORE
+        )
         self.form_service = FormService(db)
-        openai.api_key = settings.OPENAI_API_KEY
     
-    async def process_query(self, question: str, user_id: str = None, context: str = None) -> Dict[str, Any]:
-        """Process a user query and return AI-generated response"""
+    async def process_query(self, question: str, user_id: str = None, context: str = None,
+                            nprobe: Optional[int] = None, mode: str = "auto") -> Dict[str, Any]:
+        """Process a user query and return AI-generated response
+        
+        mode "auto" lets the router decide whether the LLM is needed,
+        "extractive" answers from policy sentences without the LLM, and "llm"
+        always uses it.
+        
+        Stage timings go to the span recorder of the current request, or a new
+        one, and are stored with the query.
+        """
         try:
-            # Search for relevant content
-            similar_chunks = await self.vector_search.search_similar_content(question, n_results=5)
+            spans = current_spans() or start_spans()
+            if self.singleflight is not None:
+                # Identical questions asked at the same moment share one retrieval and one LLM call
+                response = await self.singleflight.do(
+                    (normalize_question(question), context or "", nprobe, mode),
+                    lambda: self._answer_query(question, context, nprobe, mode)
+                )
+            else:
+                response = await self._answer_query(question, context, nprobe, mode)
             
-            if not similar_chunks:
+            if response is None:
                 return {
                     "answer": "I couldn't find relevant information for your question. Please try rephrasing or contact HR for assistance.",
                     "confidence_score": 0.0,
@@ -29,29 +118,12 @@ class QueryService:
                     "suggested_forms": []
                 }
             
-            # Prepare context for AI
-            context_text = self._prepare_context(similar_chunks, context)
-            
-            # Generate AI response
-            ai_response = await self._generate_ai_response(question, context_text)
-            
-            # Find relevant forms
-            suggested_forms = await self._find_relevant_forms(question, similar_chunks)
-            
-            # Save query to database
-            query_record = await self._save_query(question, ai_response, user_id, similar_chunks)
-            
-            # Prepare sources
-            sources = [chunk['title'] for chunk in similar_chunks if chunk['title']]
-            sources = list(set(sources))  # Remove duplicates
-            
-            return {
-                "answer": ai_response['answer'],
-                "confidence_score": ai_response['confidence'],
-                "sources": sources,
-                "suggested_forms": suggested_forms,
-                "query_id": query_record.id
-            }
+            # Every asker gets their own query record, even when the answer was shared
+            query_id = await self._record_query(
+                question, {"answer": response["answer"], "confidence": response["confidence_score"]}, user_id, [],
+                response["suggested_forms"], spans
+            )
+            return {**response, "query_id": query_id}
             
         except Exception as e:
             print(f"Error processing query: {e}")
@@ -62,119 +134,448 @@ class QueryService:
                 "suggested_forms": []
             }
     
-    def _prepare_context(self, chunks: List[Dict], additional_context: str = None) -> str:
-        """Prepare context from similar chunks"""
-        context_parts = []
+    async def _answer_query(self, question: str, context: str, nprobe: Optional[int], mode: str = "auto",
+                            retrieved: Optional[List[SearchResult]] = None,
+                            all_forms: Optional[List] = None) -> Optional[Dict[str, Any]]:
+        """Answer a question without recording it; None when nothing relevant was found
         
-        for chunk in chunks:
-            section_info = ""
-            if chunk.get('section'):
-                section_info = f"Section: {chunk['section']}"
-            if chunk.get('subsection'):
-                section_info += f" - {chunk['subsection']}"
-            
-            context_part = f"Source: {chunk['title']}\n"
-            if section_info:
-                context_part += f"{section_info}\n"
-            context_part += f"Content: {chunk['content']}\n"
-            
-            context_parts.append(context_part)
+        ``retrieved`` and ``all_forms``, when given, were already loaded for a
+        batch and replace retrieval and the form lookup.
+        """
+        started = time.perf_counter()
+        # Repeat questions are answered without retrieval while nothing they depend on has changed.
+        # Only LLM answers are cached, so extractive mode never looks.
+        with span("cache"):
+            cached = self._cached_answer(question, context) if mode != QueryRouter.EXTRACTIVE else None
+        if cached is not None:
+            self.router.record(QueryRouter.CACHED, (time.perf_counter() - started) * 1000)
+            return cached
+        
+        # Questions after a single policy figure are answered from the fact table without retrieval
+        fact = self._match_fact(question, mode)
+        if fact is not None:
+            response = await self._fact_response(fact)
+            self.router.record(QueryRouter.FACT, (time.perf_counter() - started) * 1000)
+            return response
+        
+        results = await self._query_pipeline(question, context, nprobe, mode, retrieved, all_forms).run()
+        key, cached = results["cache"]
+        self.router.record(QueryRouter.CACHED if cached is not None else results["route"],
+                           (time.perf_counter() - started) * 1000)
+        
+        if results["generate"] is None:
+            return None
+        if cached is not None:
+            return cached
+        
+        ai_response = results["generate"]
+        if "sources" in ai_response:
+            sources = ai_response["sources"]
+        else:
+            # Prepare sources from the chunks the answer was based on
+            sources = [chunk.title for chunk in results["context"]["chunks"] if chunk.title]
+            sources = list(set(sources))  # Remove duplicates
+        
+        response = {
+            "answer": ai_response['answer'],
+            "confidence_score": ai_response['confidence'],
+            "sources": sources,
+            "suggested_forms": results["forms"]
+        }
+        if results["route"] == QueryRouter.LLM:
+            # Extractive answers cost tens of milliseconds, not worth a cache entry
+            await self._cache_answer(key, question, context, response, results["retrieve"])
+        return response
+    
+    def _query_pipeline(self, question: str, context: str, nprobe: Optional[int], mode: str = "auto",
+                        retrieved: Optional[List[SearchResult]] = None, all_forms: Optional[List] = None) -> Pipeline:
+        """Stage graph for one query
+        
+        retrieve -> cache -> context -> generate
+                 -> route -^-> forms
+        
+        Form lookup runs alongside context assembly and generation. On an
+        answer cache hit, exact or for a paraphrase, context assembly,
+        generation and form lookup are skipped. Otherwise the router decides
+        from retrieval scores and the requested mode whether the LLM is needed
+        at all: questions nothing relevant was found for get no answer, and
+        questions the chunks clearly answer get an extractive answer from
+        their sentences. If the LLM fails, the extractive answer stands in.
+        
+        Batches pass in the chunks and forms they loaded for every question.
+        """
+        async def retrieve(results: Dict[str, Any]) -> List[SearchResult]:
+            if retrieved is not None:
+                return retrieved
+            return await self.vector_search.search_similar_content(question, n_results=5, nprobe=nprobe)
+        
+        async def cache(results: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+            with span("cache"):
+                key = self._answer_key(question, results["retrieve"], context)
+                if key is None or mode == QueryRouter.EXTRACTIVE:
+                    return key, None
+                cached = self.answer_cache.get(key)
+                if cached is None and self.semantic_cache is not None:
+                    cached = await self._semantic_answer(question, results["retrieve"], context)
+                return key, cached
         
-        if additional_context:
-            context_parts.append(f"Additional Context: {additional_context}")
+        async def route(results: Dict[str, Any]) -> str:
+            return self.router.route(results["retrieve"], mode)
         
-        return "\n---\n".join(context_parts)
+        async def assemble(results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            chunks = results["retrieve"]
+            if results["cache"][1] is not None or results["route"] != QueryRouter.LLM:
+                return None
+            # Only the chunks that reach the prompt need their text
+            with span("context"):
+                await self.vector_search.load_content(chunks)
+                return self.context_builder.build(chunks, context)
+        
+        async def generate(results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            cached = results["cache"][1]
+            if cached is not None:
+                return {"answer": cached["answer"], "confidence": cached["confidence_score"]}
+            if results["route"] == QueryRouter.NOT_COVERED:
+                return None
+            if results["route"] == QueryRouter.EXTRACTIVE:
+                return await self.extractive_answerer.answer(question, results["retrieve"])
+            ai_response = await self._generate_ai_response(question, results["context"]["text"])
+            if ai_response is None:
+                return await self._degraded_response(question, results["context"]["chunks"])
+            return ai_response
+        
+        async def forms(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+            if results["cache"][1] is not None:
+                return results["cache"][1]["suggested_forms"]
+            if results["route"] == QueryRouter.NOT_COVERED:
+                return []
+            if all_forms is not None:
+                return self._score_forms(question, results["retrieve"], all_forms)
+            return await self._find_relevant_forms(question, results["retrieve"])
+        
+        return (
+            Pipeline(self.stage_timings)
+            .add("retrieve", retrieve)
+            .add("cache", cache, after=["retrieve"])
+            .add("route", route, after=["retrieve"])
+            .add("context", assemble, after=["cache", "route"])
+            .add("generate", generate, after=["context"])
+            .add("forms", forms, after=["cache", "route"])
+        )
     
-    async def _generate_ai_response(self, question: str, context: str) -> Dict[str, Any]:
-        """Generate AI response using OpenAI"""
+    async def process_batch(self, questions: List[str], user_id: str = None, context: str = None,
+                            nprobe: Optional[int] = None, max_concurrency: int = 8) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Answer several queries, yielding (index, result) pairs as each answer completes"""
+        # Retrieval for the whole batch: one encode, one vector query, one metadata fetch, one text fetch
+        chunk_lists = await self.vector_search.search_similar_content_batch(questions, n_results=5, nprobe=nprobe)
+        await self.vector_search.load_content([chunk for chunks in chunk_lists for chunk in chunks])
+        forms = await self.form_service.get_forms()
+        
+        slots = asyncio.Semaphore(max_concurrency)
+        
+        async def answer(index: int) -> Tuple[int, Dict[str, Any]]:
+            question, similar_chunks = questions[index], chunk_lists[index]
+            try:
+                # Same cache, fact and routing tiers as a single query, on the batch's chunks
+                async with slots:
+                    response = await self._answer_query(question, context, nprobe, retrieved=similar_chunks, all_forms=forms)
+                if response is None:
+                    return index, {
+                        "answer": "I couldn't find relevant information for your question. Please try rephrasing or contact HR for assistance.",
+                        "confidence_score": 0.0,
+                        "sources": [],
+                        "suggested_forms": []
+                    }
+                
+                query_id = await self._record_query(
+                    question, {"answer": response["answer"], "confidence": response["confidence_score"]}, user_id,
+                    similar_chunks, response["suggested_forms"]
+                )
+                return index, {**response, "query_id": query_id}
+                
+            except Exception as e:
+                print(f"Error processing batch query: {e}")
+                return index, {
+                    "answer": "I encountered an error processing your question. Please try again or contact HR for assistance.",
+                    "confidence_score": 0.0,
+                    "sources": [],
+                    "suggested_forms": []
+                }
+        
+        tasks = [asyncio.create_task(answer(index)) for index in range(len(questions))]
         try:
-            prompt = f"""
-You are an HR assistant helping employees with policy questions. Use the provided context to answer the question accurately and helpfully.
-
-Context:
-{context}
-
-Question: {question}
-
-Instructions:
-1. Answer based on the provided context
-2. Be specific and cite relevant policy sections when possible
-3. If the context doesn't contain enough information, say so clearly
-4. Provide actionable guidance when appropriate
-5. Be professional and helpful
-6. If forms are needed, mention them but don't provide links (those will be handled separately)
-
-Answer:"""
-
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful HR assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.3
-            )
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # Stop outstanding work if the client goes away mid-stream
+            for task in tasks:
+                task.cancel()
+    
+    async def stream_query(self, question: str, user_id: str = None, context: str = None,
+                           nprobe: Optional[int] = None, mode: str = "auto") -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Answer a query as (event, data) pairs: sources and forms, then answer tokens, then done"""
+        try:
+            use_cache = self.answer_cache is not None and mode != QueryRouter.EXTRACTIVE
+            with span("cache"):
+                cached = self.answer_cache.lookup(question, context) if use_cache else None
+            fact = self._match_fact(question, mode) if cached is None else None
+            if fact is not None:
+                cached = await self._fact_response(fact)
+            similar_chunks = []
+            if cached is None:
+                similar_chunks = await self.vector_search.search_similar_content(question, n_results=5, nprobe=nprobe)
+                with span("cache"):
+                    key = self._answer_key(question, similar_chunks, context)
+                    cached = self.answer_cache.get(key) if key is not None and use_cache else None
             
-            answer = response.choices[0].message.content.strip()
+            if cached is not None:
+                yield "sources", {"sources": cached["sources"], "suggested_forms": cached["suggested_forms"]}
+                yield "token", {"text": cached["answer"]}
+                query_id = await self._record_query(
+                    question, {"answer": cached["answer"], "confidence": cached["confidence_score"]}, user_id, similar_chunks,
+                    cached["suggested_forms"]
+                )
+                yield "done", {"confidence_score": cached["confidence_score"], "query_id": query_id}
+                return
             
-            # Calculate confidence based on response length and specificity
-            confidence = min(0.9, max(0.1, len(answer) / 200))
+            tier = self.router.route(similar_chunks, mode)
+            if tier == QueryRouter.NOT_COVERED:
+                yield "sources", {"sources": [], "suggested_forms": []}
+                yield "token", {"text": "I couldn't find relevant information for your question. Please try rephrasing or contact HR for assistance."}
+                yield "done", {"confidence_score": 0.0, "query_id": None}
+                return
             
-            return {
+            if tier == QueryRouter.EXTRACTIVE:
+                extractive = await self.extractive_answerer.answer(question, similar_chunks)
+                suggested_forms = await self._find_relevant_forms(question, similar_chunks)
+                yield "sources", {"sources": extractive["sources"], "suggested_forms": suggested_forms}
+                yield "token", {"text": extractive["answer"]}
+                query_id = await self._record_query(question, extractive, user_id, similar_chunks, suggested_forms)
+                yield "done", {"confidence_score": extractive["confidence"], "query_id": query_id}
+                return
+            
+            with span("context"):
+                await self.vector_search.load_content(similar_chunks)
+                prompt_context = self.context_builder.build(similar_chunks, context)
+            
+            # Everything that does not depend on the answer goes out before the first token
+            suggested_forms = await self._find_relevant_forms(question, similar_chunks)
+            sources = list(set(chunk.title for chunk in prompt_context["chunks"] if chunk.title))
+            yield "sources", {"sources": sources, "suggested_forms": suggested_forms}
+            
+            parts = []
+            try:
+                async for text in self._stream_ai_response(question, prompt_context["text"]):
+                    parts.append(text)
+                    yield "token", {"text": text}
+                answer = "".join(parts).strip()
+                confidence = self._calculate_confidence(answer)
+            except Exception as e:
+                print(f"Error streaming AI response: {e}")
+                fallback = await self._degraded_response(question, prompt_context["chunks"])
+                answer, confidence = fallback["answer"], fallback["confidence"]
+                yield "token", {"text": ("\n\n" if parts else "") + answer}
+            
+            await self._cache_answer(key, question, context, {
                 "answer": answer,
-                "confidence": confidence
-            }
+                "confidence_score": confidence,
+                "sources": sources,
+                "suggested_forms": suggested_forms
+            }, similar_chunks)
+            
+            # Recorded once the answer is complete, so it never delays the first token
+            query_id = await self._record_query(
+                question, {"answer": answer, "confidence": confidence}, user_id, similar_chunks, suggested_forms
+            )
+            yield "done", {"confidence_score": confidence, "query_id": query_id}
             
         except Exception as e:
-            print(f"Error generating AI response: {e}")
-            return {
-                "answer": "I'm unable to generate a response at the moment. Please contact HR directly for assistance.",
-                "confidence": 0.0
-            }
+            print(f"Error streaming query: {e}")
+            yield "error", {"detail": "I encountered an error processing your question. Please try again or contact HR for assistance."}
     
-    async def _find_relevant_forms(self, question: str, chunks: List[Dict]) -> List[Dict[str, Any]]:
-        """Find relevant forms based on question and context"""
-        try:
-            # Extract keywords from question
-            keywords = self._extract_keywords(question)
-            
-            # Get forms from database
-            forms = await self.form_service.get_forms()
-            
-            # Score forms based on keyword matching
-            scored_forms = []
-            for form in forms:
-                score = self._calculate_form_relevance(form, keywords, chunks)
-                if score > 0.3:  # Threshold for relevance
-                    scored_forms.append({
+    def _match_fact(self, question: str, mode: str) -> Optional[Dict[str, Any]]:
+        """Fact table answer for a question, unless the LLM was asked for"""
+        if self.fact_index is None or mode == QueryRouter.LLM:
+            return None
+        with span("fact"):
+            return self.fact_index.match(question)
+    
+    async def _fact_response(self, fact: Dict[str, Any]) -> Dict[str, Any]:
+        """Response for a fact table answer, with the forms linked to its policy"""
+        policy_id = fact["facts"][0]["policy_id"]
+        suggested_forms = []
+        if policy_id is not None:
+            try:
+                with span("forms"):
+                    async with self._db_lock:
+                        forms = await self.form_service.get_forms_by_policy(policy_id)
+                suggested_forms = [
+                    {
                         "id": form.id,
                         "name": form.name,
                         "description": form.description,
                         "category": form.category,
                         "file_url": form.file_url,
-                        "relevance_score": score
-                    })
+                        "relevance_score": 1.0
+                    }
+                    for form in forms[:3]
+                ]
+            except Exception as e:
+                print(f"Error finding policy forms: {e}")
+        return {
+            "answer": fact["answer"],
+            "confidence_score": fact["confidence"],
+            "sources": fact["sources"],
+            "suggested_forms": suggested_forms
+        }
+    
+    def _build_messages(self, question: str, context: str) -> List[Dict[str, str]]:
+        """Build the chat messages for a question and its context"""
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": ANSWER_PROMPT.format(context=context, question=question)}
+        ]
+    
+    def _cached_answer(self, question: str, context: str) -> Optional[Dict[str, Any]]:
+        """Serve a repeat question straight from the answer cache, skipping retrieval"""
+        if self.answer_cache is None:
+            return None
+        started = time.perf_counter()
+        cached = self.answer_cache.lookup(question, context)
+        if cached is None:
+            return None
+        
+        if self.stage_timings is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.stage_timings.record({"answer_cache": elapsed_ms, "total": elapsed_ms})
+        return cached
+    
+    def _answer_key(self, question: str, chunks: List[SearchResult], context: str) -> Optional[str]:
+        """Answer cache key for a question and its retrieved chunks, or None when there is nothing to cache"""
+        if self.answer_cache is None or not chunks:
+            return None
+        return self.answer_cache.key(question, [chunk.id for chunk in chunks], context)
+    
+    async def _cache_answer(self, key: Optional[str], question: str, context: str, response: Dict[str, Any],
+                            chunks: List[SearchResult]) -> None:
+        """Remember a generated answer; fallback answers from failed LLM calls are not cached"""
+        if key is None or response["confidence_score"] <= 0:
+            return
+        self.answer_cache.put(key, question, response, chunks, context)
+        if self.semantic_cache is not None:
+            embedding = await self.vector_search.get_embedding(question)
+            self.semantic_cache.add(question, embedding, key, [chunk.id for chunk in chunks])
+    
+    async def _semantic_answer(self, question: str, chunks: List[SearchResult], context: str) -> Optional[Dict[str, Any]]:
+        """Reuse the answer to a paraphrase of this question that was answered from mostly the same chunks"""
+        if context:
+            # Additional context changes the prompt in ways question similarity cannot see
+            return None
+        embedding = await self.vector_search.get_embedding(question)
+        match = self.semantic_cache.find(embedding, [chunk.id for chunk in chunks])
+        if match is None:
+            return None
+        
+        response, details = match
+        if self.semantic_cache.should_sample():
+            self.semantic_cache.track(asyncio.create_task(
+                self._check_semantic_hit(question, chunks, response["answer"], details)
+            ))
+        return response
+    
+    async def _check_semantic_hit(self, question: str, chunks: List[SearchResult], reused_answer: str,
+                                  details: Dict[str, Any]) -> None:
+        """Answer a sampled semantic hit for real and record whether the reused answer agreed"""
+        try:
+            await self.vector_search.load_content(chunks)
+            prompt_context = self.context_builder.build(chunks)
+            fresh = await self._generate_ai_response(question, prompt_context["text"])
+            if fresh is None:
+                return
+            similarity = await self.vector_search.calculate_similarity(reused_answer, fresh["answer"])
+            self.semantic_cache.record_sample(question, details, reused_answer, fresh["answer"], similarity)
+        except Exception as e:
+            print(f"Error checking semantic cache hit: {e}")
+    
+    def _calculate_confidence(self, answer: str) -> float:
+        """Calculate confidence based on response length and specificity"""
+        return min(0.9, max(0.1, len(answer) / 200))
+    
+    async def _generate_ai_response(self, question: str, context: str) -> Optional[Dict[str, Any]]:
+        """Generate AI response using the LLM client; None when the LLM is unavailable"""
+        try:
+            with span("llm"):
+                answer = (await self.llm_client.chat(self._build_messages(question, context))).strip()
+            confidence = self._calculate_confidence(answer)
             
-            # Sort by relevance score
-            scored_forms.sort(key=lambda x: x['relevance_score'], reverse=True)
+            return {
+                "answer": answer,
+                "confidence": confidence
+            }
             
-            return scored_forms[:3]  # Return top 3 forms
+        except Exception as e:
+            print(f"Error generating AI response: {e}")
+            return None
+    
+    async def _degraded_response(self, question: str, chunks: List[SearchResult]) -> Dict[str, Any]:
+        """Answer from the best policy sentences when the LLM is unavailable
+        
+        Confidence is zero, so these answers are never cached.
+        """
+        extractive = await self.extractive_answerer.answer(
+            question, chunks,
+            intro="I'm unable to generate a full answer at the moment. These policy statements look most relevant to your question:"
+        )
+        return {**extractive, "confidence": 0.0}
+    
+    async def _stream_ai_response(self, question: str, context: str) -> AsyncIterator[str]:
+        """Stream answer text from the LLM client as it is generated"""
+        with span("llm"):
+            async for text in self.llm_client.stream(self._build_messages(question, context)):
+                yield text
+    
+    async def _find_relevant_forms(self, question: str, chunks: List[SearchResult]) -> List[Dict[str, Any]]:
+        """Find relevant forms based on question and context"""
+        try:
+            # Get forms from database
+            with span("forms"):
+                forms = await self.form_service.get_forms()
+                return self._score_forms(question, chunks, forms)
             
         except Exception as e:
             print(f"Error finding relevant forms: {e}")
             return []
     
+    def _score_forms(self, question: str, chunks: List[SearchResult], forms: List) -> List[Dict[str, Any]]:
+        """Rank already-loaded forms against a question and its context"""
+        # Extract keywords from question
+        keywords = self._extract_keywords(question)
+        
+        # Score forms based on keyword matching
+        scored_forms = []
+        for form in forms:
+            score = self._calculate_form_relevance(form, keywords, chunks)
+            if score > 0.3:  # Threshold for relevance
+                scored_forms.append({
+                    "id": form.id,
+                    "name": form.name,
+                    "description": form.description,
+                    "category": form.category,
+                    "file_url": form.file_url,
+                    "relevance_score": score
+                })
+        
+        # Sort by relevance score
+        scored_forms.sort(key=lambda x: x['relevance_score'], reverse=True)
+        
+        return scored_forms[:3]  # Return top 3 forms
+    
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from text"""
-        # Simple keyword extraction - can be enhanced with NLP
-        words = text.lower().split()
-        # Filter out common words
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'must'}
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
-        return keywords
-    
-    def _calculate_form_relevance(self, form, keywords: List[str], chunks: List[Dict]) -> float:
+        # Same tokenizer as the lexical index, so form scoring and BM25 agree on terms
+        return [word for word in tokenize(text) if len(word) > 2]
+    
+    def _calculate_form_relevance(self, form, keywords: List[str], chunks: List[SearchResult]) -> float:
         """Calculate relevance score for a form"""
         score = 0.0
         
@@ -188,28 +589,75 @@ Answer:"""
         
         # Category matching with chunks
         for chunk in chunks:
-            if chunk.get('category') == form.category:
+            if chunk.category == form.category:
                 score += 0.2
         
         return min(1.0, score)
     
-    async def _save_query(self, question: str, ai_response: Dict, user_id: str, chunks: List[Dict]) -> Query:
+    async def _record_query(self, question: str, ai_response: Dict, user_id: str, chunks: List[SearchResult],
+                            suggested_forms: Optional[List[Dict[str, Any]]] = None,
+                            spans: Optional[SpanRecorder] = None) -> Optional[int]:
+        """Hand the query record to the background writer and return its ID
+        
+        Without a running writer the record is saved before returning.
+        """
+        spans = spans or current_spans()
+        with span("persist"):
+            if self.query_log is not None and self.query_log.available():
+                return await self.query_log.submit(
+                    question, ai_response['answer'], ai_response['confidence'], user_id, suggested_forms, spans
+                )
+            
+            async with self._db_lock:
+                query_record = await self._save_query(question, ai_response, user_id, chunks, suggested_forms, spans)
+            return query_record.id
+    
+    @io_bound
+    def _save_query(self, question: str, ai_response: Dict, user_id: str, chunks: List[SearchResult],
+                    suggested_forms: Optional[List[Dict[str, Any]]] = None, spans: Optional[SpanRecorder] = None) -> Query:
         """Save query to database"""
         query_record = Query(
+            # IDs come from the writer's blocks whenever there is one, so the two never collide
+            id=self.query_log.reserve_id() if self.query_log is not None else None,
             user_id=user_id,
             question=question,
             answer=ai_response['answer'],
-            confidence_score=ai_response['confidence']
+            confidence_score=ai_response['confidence'],
+            response_time_ms=spans.total_ms() if spans is not None else None
         )
         
         self.db.add(query_record)
+        self.db.flush()
+        for stage, duration in (spans.durations() if spans is not None else {}).items():
+            self.db.add(QueryStageTiming(query_id=query_record.id, stage=stage, duration_ms=duration))
+        for form in suggested_forms or []:
+            self.db.add(QueryForm(
+                query_id=query_record.id,
+                form_id=form["id"],
+                relevance_score=form.get("relevance_score")
+            ))
         self.db.commit()
         self.db.refresh(query_record)
         
         return query_record
     
     async def submit_feedback(self, feedback_data) -> None:
-        """Submit feedback for a query"""
+        """Submit feedback for a query, through the background writer when it is running"""
+        if self.query_log is not None and self.query_log.available():
+            await self.query_log.submit_feedback(
+                feedback_data.query_id,
+                feedback_data.rating,
+                feedback_data.is_helpful,
+                feedback_data.comments
+            )
+            return
+        
+        async with self._db_lock:
+            await self._save_feedback(feedback_data)
+    
+    @io_bound
+    def _save_feedback(self, feedback_data) -> None:
+        """Save feedback to database"""
         feedback = QueryFeedback(
             query_id=feedback_data.query_id,
             rating=feedback_data.rating,
@@ -220,7 +668,8 @@ Answer:"""
         self.db.add(feedback)
         self.db.commit()
     
-    async def get_query_history(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    @io_bound
+    def get_query_history(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get query history for a user"""
         queries = self.db.query(Query).filter(
             Query.user_id == user_id
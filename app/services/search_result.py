@@ -0,0 +1,105 @@
+from typing import Callable, Dict, Any, List, Optional
+
+class ContentBatch:
+    """Shared loader that fetches the text of every pending result in one store read"""
+
+    __slots__ = ("fetch", "pending")
+
+    def __init__(self, fetch: Callable[[List[str]], Dict[str, str]], pending: List["SearchResult"]):
+        self.fetch = fetch
+        self.pending = pending
+
+    def load(self) -> None:
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        contents = self.fetch([result.id for result in pending])
+        for result in pending:
+            result._content = contents.get(result.id, "")
+            result._batch = None
+
+class SearchResult:
+    """One search hit that reads title/category/section from its metadata instead of copying them
+
+    Chunk text is only fetched when ``content`` is first read, together with the text
+    of the other results from the same search. Async code should await
+    ``VectorSearchService.load_content`` first so the fetch happens off the event loop.
+    Supports ``result["title"]`` style access for code written against result dicts.
+    """
+
+    __slots__ = ("id", "similarity_score", "metadata", "bm25_score", "rrf_score", "exact_match", "_content", "_batch")
+
+    FIELDS = ("id", "content", "metadata", "similarity_score", "title", "category", "section",
+              "subsection", "bm25_score", "rrf_score", "exact_match")
+
+    def __init__(self, chunk_id: str, similarity_score: Optional[float] = None,
+                 metadata: Optional[Dict[str, Any]] = None, content: Optional[str] = None):
+        self.id = chunk_id
+        self.similarity_score = similarity_score
+        self.metadata = metadata
+        self.bm25_score: Optional[float] = None
+        self.rrf_score: Optional[float] = None
+        self.exact_match = False  # Found by a decisive keyword match, without vector search
+        self._content = content
+        self._batch: Optional[ContentBatch] = None
+
+    @property
+    def content(self) -> str:
+        if self._content is None and self._batch is not None:
+            self._batch.load()
+        return self._content or ""
+
+    @property
+    def content_loaded(self) -> bool:
+        return self._content is not None
+
+    @property
+    def title(self) -> str:
+        return self._metadata_field("title")
+
+    @property
+    def category(self) -> str:
+        return self._metadata_field("category")
+
+    @property
+    def section(self) -> str:
+        return self._metadata_field("section")
+
+    @property
+    def subsection(self) -> str:
+        return self._metadata_field("subsection")
+
+    def _metadata_field(self, field: str) -> str:
+        return self.metadata.get(field, '') if self.metadata else ''
+
+    # Mapping-style access
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in ("similarity_score", "bm25_score", "rrf_score"):
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self.FIELDS else default
+
+    def to_dict(self, include_content: bool = True) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.FIELDS if include_content or key != "content"}
+
+    def __repr__(self) -> str:
+        return f"SearchResult(id={self.id!r}, title={self.title!r}, similarity_score={self.similarity_score!r})"
+
+def attach_content_loader(results: List[SearchResult], fetch: Callable[[List[str]], Dict[str, str]]) -> None:
+    """Let results without text load it lazily, all in one fetch"""
+    pending = [result for result in results if result._content is None]
+    if pending:
+        batch = ContentBatch(fetch, pending)
+        for result in pending:
+            result._batch = batch
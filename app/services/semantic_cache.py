@@ -0,0 +1,205 @@
+from collections import deque
+from typing import Dict, Any, List, Optional, Sequence, Set, Tuple
+import asyncio
+import threading
+import numpy as np
+
+from app.services.answer_cache import AnswerCache
+
+class SemanticCache:
+    """Reuse cached answers for paraphrased questions
+
+    Holds the embeddings of answered questions next to the answer cache key
+    they were stored under. A new question reuses an answer when its embedding
+    is close enough to a previous question *and* retrieval brought back enough
+    of the same chunks. Answers themselves live in the answer cache, so its
+    dependency tracking also retires semantic matches; stale rows are dropped
+    when they are next matched.
+
+    A sample of hits is re-answered in the background and compared with the
+    reused answer to estimate the false-hit rate.
+    """
+
+    CANDIDATES = 3
+    AGREEMENT_SIMILARITY = 0.8  # fresh vs. reused answer similarity below this counts as a false hit
+
+    def __init__(self, answer_cache: AnswerCache, threshold: float = 0.85, min_overlap: float = 0.6,
+                 max_entries: int = 5000, sample_rate: float = 0.05):
+        self.answer_cache = answer_cache
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self.max_entries = max_entries
+        self.sample_rate = sample_rate
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+        self._questions: List[str] = []
+        self._chunks: List[frozenset] = []
+        self._row_of: Dict[str, int] = {}
+        self._next_victim = 0
+        self._checks: Set[asyncio.Task] = set()
+
+        self.lookups = 0
+        self.hits = 0
+        self.below_threshold = 0
+        self.overlap_rejects = 0
+        self.stale = 0
+        self.samples = 0
+        self.false_hits = 0
+        self._recent_false_hits = deque(maxlen=20)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def find(self, question_embedding: Sequence[float], chunk_ids: List[str]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Return (cached response, match details) for a paraphrase of an answered question, or None"""
+        query = self._normalize(question_embedding)
+        retrieved = set(chunk_ids)
+        with self._lock:
+            self.lookups += 1
+            if not self._keys:
+                self.below_threshold += 1
+                return None
+
+            similarities = self._vectors[:len(self._keys)] @ query
+            candidates = np.argsort(-similarities)[:self.CANDIDATES]
+            if similarities[candidates[0]] < self.threshold:
+                self.below_threshold += 1
+                return None
+
+            match, stale = None, []
+            for row in candidates:
+                similarity = float(similarities[row])
+                if similarity < self.threshold:
+                    break
+                cached_chunks = self._chunks[row]
+                overlap = len(cached_chunks & retrieved) / len(cached_chunks) if cached_chunks else 0.0
+                if overlap < self.min_overlap:
+                    continue
+
+                response = self.answer_cache.peek(self._keys[row])
+                if response is None:
+                    # Invalidated or evicted from the answer cache
+                    stale.append(self._keys[row])
+                    continue
+
+                match = response, {"question": self._questions[row], "similarity": similarity, "overlap": overlap}
+                break
+
+            for key in stale:
+                self._remove(key)
+            self.stale += len(stale)
+            if match is None:
+                self.overlap_rejects += 1
+                return None
+            self.hits += 1
+            return match
+
+    def add(self, question: str, question_embedding: Sequence[float], answer_key: str, chunk_ids: List[str]) -> None:
+        """Index an answered question under the answer cache key its answer was stored with"""
+        if self.max_entries <= 0:
+            return
+
+        vector = self._normalize(question_embedding)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((min(self.max_entries, 64), len(vector)), dtype=np.float32)
+
+            row = self._row_of.get(answer_key)
+            if row is None:
+                if len(self._keys) >= self.max_entries:
+                    # Full: overwrite rows in insertion order
+                    row = self._next_victim
+                    self._next_victim = (self._next_victim + 1) % self.max_entries
+                    del self._row_of[self._keys[row]]
+                else:
+                    row = len(self._keys)
+                    if row == len(self._vectors):
+                        grown = np.zeros((min(self.max_entries, row * 2), self._vectors.shape[1]), dtype=np.float32)
+                        grown[:row] = self._vectors
+                        self._vectors = grown
+                    self._keys.append(answer_key)
+                    self._questions.append(question)
+                    self._chunks.append(frozenset())
+
+            self._vectors[row] = vector
+            self._keys[row] = answer_key
+            self._questions[row] = question
+            self._chunks[row] = frozenset(chunk_ids)
+            self._row_of[answer_key] = row
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._keys, self._questions, self._chunks = [], [], []
+            self._row_of.clear()
+            self._next_victim = 0
+
+    def _remove(self, answer_key: str) -> None:
+        row = self._row_of.pop(answer_key)
+        last = len(self._keys) - 1
+        if row != last:
+            # Move the last row into the hole
+            self._vectors[row] = self._vectors[last]
+            self._keys[row] = self._keys[last]
+            self._questions[row] = self._questions[last]
+            self._chunks[row] = self._chunks[last]
+            self._row_of[self._keys[row]] = row
+        self._keys.pop()
+        self._questions.pop()
+        self._chunks.pop()
+        self._next_victim = 0
+
+    def _normalize(self, vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # False-hit sampling
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and np.random.random() < self.sample_rate
+
+    def track(self, check: asyncio.Task) -> None:
+        """Keep a background hit check alive until it finishes"""
+        self._checks.add(check)
+        check.add_done_callback(self._checks.discard)
+
+    def record_sample(self, question: str, match: Dict[str, Any], reused_answer: str, fresh_answer: str,
+                      answer_similarity: float) -> None:
+        """Record whether a sampled hit's reused answer agreed with a freshly generated one"""
+        with self._lock:
+            self.samples += 1
+            if answer_similarity < self.AGREEMENT_SIMILARITY:
+                self.false_hits += 1
+                self._recent_false_hits.append({
+                    "question": question,
+                    "matched_question": match["question"],
+                    "question_similarity": round(match["similarity"], 4),
+                    "chunk_overlap": round(match["overlap"], 4),
+                    "answer_similarity": round(answer_similarity, 4),
+                    "reused_answer": reused_answer,
+                    "fresh_answer": fresh_answer
+                })
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit rate and sampled false-hit rate"""
+        with self._lock:
+            return {
+                "size": len(self._keys),
+                "max_size": self.max_entries,
+                "threshold": self.threshold,
+                "min_overlap": self.min_overlap,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "below_threshold": self.below_threshold,
+                "overlap_rejects": self.overlap_rejects,
+                "stale": self.stale,
+                "sample_rate": self.sample_rate,
+                "samples": self.samples,
+                "false_hits": self.false_hits,
+                "false_hit_rate": self.false_hits / self.samples if self.samples else 0.0,
+                "recent_false_hits": list(self._recent_false_hits)
+            }
@@ -0,0 +1,48 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+class Singleflight:
+    """Coalesce concurrent calls with the same key onto one in-flight call
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it is running wait on the same task instead of repeating it.
+    The task is shielded, so a caller that goes away does not cancel the work
+    for everyone else. Nothing is kept once the call finishes.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Run call() unless a call for this key is already in flight, and return its result"""
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is not None and task.get_loop() is loop:
+            self.coalesced += 1
+        else:
+            self.leaders += 1
+            task = loop.create_task(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._done(key, finished))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get how many calls ran and how many joined one already in flight"""
+        requests = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesce_rate": self.coalesced / requests if requests else 0.0
+        }
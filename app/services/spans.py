@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+import time
+
+class SpanRecorder:
+    """Time spent per stage while answering one query
+
+    Spans with the same name add up, so a stage that runs twice (two
+    embeddings, say) reports its total. Stages can run concurrently, so the
+    spans may add up to more than the elapsed time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._durations_ms: Dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.finished = time.perf_counter()
+            self._durations_ms[name] = self._durations_ms.get(name, 0.0) + (self.finished - started) * 1000
+
+    def durations(self) -> Dict[str, float]:
+        """Milliseconds per stage"""
+        return {name: round(duration, 3) for name, duration in self._durations_ms.items()}
+
+    def total_ms(self) -> int:
+        """Milliseconds from the start to the end of the last span"""
+        return int(((self.finished or time.perf_counter()) - self.started) * 1000)
+
+    def server_timing(self) -> str:
+        """The spans as a Server-Timing header value"""
+        entries = [f"{name};dur={duration:.1f}" for name, duration in self._durations_ms.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+_current: ContextVar[Optional[SpanRecorder]] = ContextVar("spans", default=None)
+
+def start_spans() -> SpanRecorder:
+    """Start recording spans for the current request; tasks it creates record into the same recorder"""
+    recorder = SpanRecorder()
+    _current.set(recorder)
+    return recorder
+
+def current_spans() -> Optional[SpanRecorder]:
+    return _current.get()
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block as stage ``name`` of the current request, if one is being recorded"""
+    recorder = _current.get()
+    if recorder is None:
+        yield
+        return
+    with recorder.span(name):
+        yield
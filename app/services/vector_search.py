@@ -1,94 +1,364 @@
-import chromadb
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 import numpy as np
 
+from app.core.executors import run_cpu, run_io
+from app.services.vector_stores.base import VectorStore
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.lexical_index import LexicalIndex
+from app.services.neighbour_graph import NeighbourGraph
+from app.services.search_result import SearchResult, attach_content_loader
+from app.services.spans import span
+
+# Columns fetched with each hit; chunk text left out here is loaded on first access
+DEFAULT_INCLUDE = ("metadatas",)
+FULL_INCLUDE = ("documents", "metadatas")
+
 class VectorSearchService:
-    def __init__(self):
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.chroma_client = chromadb.PersistentClient(path="./chroma_db")
-        self.collection = self.chroma_client.get_or_create_collection("hr_policies")
+    def __init__(self, embedding_model: SentenceTransformer, vector_store: VectorStore, embedding_cache: EmbeddingCache,
+                 embedding_batcher: Optional[EmbeddingBatcher] = None, lexical_index: Optional[LexicalIndex] = None,
+                 rrf_k: int = 60, decisive_ratio: float = 2.0, neighbour_graph: Optional[NeighbourGraph] = None):
+        self.embedding_model = embedding_model
+        self.vector_store = vector_store
+        self.embedding_cache = embedding_cache
+        self.embedding_batcher = embedding_batcher
+        self.lexical_index = lexical_index
+        self.rrf_k = rrf_k
+        self.decisive_ratio = decisive_ratio
+        self.neighbour_graph = neighbour_graph
+        
+        self.vector_only_searches = 0
+        self.fused_searches = 0
+        self.lexical_only_searches = 0
+        self.batch_searches = 0
+        self.batch_questions = 0
+        self.shared_chunk_fetches_saved = 0
+        self.content_fetches = 0
+        self.content_rows_fetched = 0
     
-    async def search_similar_content(self, query: str, n_results: int = 5, category: str = None) -> List[Dict[str, Any]]:
-        """Search for similar content using vector similarity"""
+    async def _encode_query(self, text: str) -> np.ndarray:
+        """Encode text, reusing the cached embedding for repeated questions"""
+        embedding = self.embedding_cache.get(text)
+        if embedding is None:
+            with span("embed"):
+                if self.embedding_batcher is not None and self.embedding_batcher.available():
+                    embedding = await self.embedding_batcher.encode(text)
+                else:
+                    embedding = await run_cpu(self.embedding_model.encode, text)
+            self.embedding_cache.put(text, embedding)
+        return embedding
+    
+    async def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        """Encode several texts in one batched encode, reusing cached embeddings"""
+        embeddings = [self.embedding_cache.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+        if missing:
+            encoded = await run_cpu(
+                self.embedding_model.encode,
+                missing,
+                batch_size=len(missing),
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            fresh = dict(zip(missing, encoded))
+            for text, embedding in fresh.items():
+                self.embedding_cache.put(text, embedding)
+            embeddings = [embedding if embedding is not None else fresh[text] for text, embedding in zip(texts, embeddings)]
+        return np.stack(embeddings)
+    
+    async def search_similar_content(self, query: str, n_results: int = 5, category: str = None,
+                                     nprobe: Optional[int] = None,
+                                     include: Sequence[str] = DEFAULT_INCLUDE) -> List[SearchResult]:
+        """Search for similar content, fusing vector similarity with BM25 term matches
+
+        ``include`` picks the columns read from the store ("documents", "metadatas").
+        Results without documents load their text on first access of ``content``.
+        """
         try:
-            # Create query embedding
-            query_embedding = self.embedding_model.encode(query).tolist()
-            
-            # Prepare where clause for category filtering
-            where_clause = None
-            if category:
-                where_clause = {"category": category}
+            lexical_hits = []
+            if self.lexical_index is not None:
+                with span("search"):
+                    lexical_hits = self.lexical_index.search(query, n_results, category)
             
-            # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                where=where_clause
-            )
+            # An unambiguous exact-term match does not need the embedding round trip
+            if self._lexical_is_decisive(lexical_hits):
+                self.lexical_only_searches += 1
+                with span("search"):
+                    return self._with_content_loader(await self._lexical_results(lexical_hits, include))
             
-            # Format results
-            similar_content = []
-            for i in range(len(results['ids'][0])):
-                similar_content.append({
-                    "id": results['ids'][0][i],
-                    "content": results['documents'][0][i],
-                    "metadata": results['metadatas'][0][i],
-                    "similarity_score": 1 - results['distances'][0][i],  # Convert distance to similarity
-                    "title": results['metadatas'][0][i].get('title', ''),
-                    "category": results['metadatas'][0][i].get('category', ''),
-                    "section": results['metadatas'][0][i].get('section', ''),
-                    "subsection": results['metadatas'][0][i].get('subsection', '')
-                })
+            similar_content = await self._vector_search(query, n_results, category, nprobe, include)
+            if not lexical_hits:
+                self.vector_only_searches += 1
+                return self._with_content_loader(similar_content)
             
-            return similar_content
+            self.fused_searches += 1
+            with span("search"):
+                return self._with_content_loader(await self._fuse_results(similar_content, lexical_hits, n_results, include))
             
         except Exception as e:
             print(f"Error searching content: {e}")
             return []
     
+    async def search_similar_content_batch(self, queries: List[str], n_results: int = 5, category: str = None,
+                                           nprobe: Optional[int] = None,
+                                           include: Sequence[str] = DEFAULT_INCLUDE) -> List[List[SearchResult]]:
+        """Search for several questions with one encode, one vector query and one shared chunk fetch"""
+        try:
+            lexical = [
+                self.lexical_index.search(query, n_results, category) if self.lexical_index is not None else []
+                for query in queries
+            ]
+            vector_positions = [i for i, hits in enumerate(lexical) if not self._lexical_is_decisive(hits)]
+            
+            vector_ranked: List[List[str]] = [[] for _ in queries]
+            similarities: List[Dict[str, float]] = [{} for _ in queries]
+            if vector_positions:
+                embeddings = await self._encode_queries([queries[i] for i in vector_positions])
+                results = await run_io(
+                    self.vector_store.query,
+                    query_embeddings=embeddings.tolist(),
+                    n_results=n_results,
+                    where={"category": category} if category else None,
+                    include=["distances"],
+                    nprobe=nprobe
+                )
+                for i, ids, distances in zip(vector_positions, results['ids'], results['distances']):
+                    vector_ranked[i] = list(ids)
+                    similarities[i] = {chunk_id: 1 - distance for chunk_id, distance in zip(ids, distances)}
+            
+            # Rank chunk IDs per question with the same rules as search_similar_content
+            rankings = []
+            needs_vector = set(vector_positions)
+            for i, hits in enumerate(lexical):
+                if i not in needs_vector:
+                    self.lexical_only_searches += 1
+                    rankings.append([hit["id"] for hit in hits])
+                elif not hits:
+                    self.vector_only_searches += 1
+                    rankings.append(vector_ranked[i])
+                else:
+                    self.fused_searches += 1
+                    fused = self._rrf(vector_ranked[i], [hit["id"] for hit in hits])
+                    rankings.append(sorted(fused, key=fused.get, reverse=True)[:n_results])
+            
+            # Chunks shared between questions are fetched once
+            unique_ids = list(dict.fromkeys(chunk_id for ranking in rankings for chunk_id in ranking))
+            chunks = await self._load_chunks(unique_ids, include) if unique_ids else {}
+            self.batch_searches += 1
+            self.batch_questions += len(queries)
+            self.shared_chunk_fetches_saved += sum(len(ranking) for ranking in rankings) - len(unique_ids)
+            
+            batch_results = []
+            for i, ranking in enumerate(rankings):
+                bm25_scores = {hit["id"]: hit["score"] for hit in lexical[i]}
+                fused = self._rrf(vector_ranked[i], list(bm25_scores)) if i in needs_vector and lexical[i] else {}
+                results = []
+                for chunk_id in ranking:
+                    if chunk_id not in chunks:
+                        continue
+                    result = self._format_result(chunk_id, *chunks[chunk_id], similarity_score=similarities[i].get(chunk_id))
+                    if lexical[i]:
+                        result.bm25_score = bm25_scores.get(chunk_id)
+                        result.exact_match = i not in needs_vector
+                    if fused:
+                        result.rrf_score = fused[chunk_id]
+                    results.append(result)
+                batch_results.append(results)
+            
+            # Text for the whole batch, if it was left out, arrives in a single fetch
+            self._with_content_loader([result for results in batch_results for result in results])
+            return batch_results
+            
+        except Exception as e:
+            print(f"Error searching content batch: {e}")
+            return [[] for _ in queries]
+    
+    async def _vector_search(self, query: str, n_results: int, category: Optional[str],
+                             nprobe: Optional[int], include: Sequence[str] = FULL_INCLUDE) -> List[SearchResult]:
+        """Search for similar content using vector similarity"""
+        # Create query embedding
+        query_embedding = (await self._encode_query(query)).tolist()
+        
+        # Prepare where clause for category filtering
+        where_clause = None
+        if category:
+            where_clause = {"category": category}
+        
+        # Search the vector store
+        with span("search"):
+            results = await run_io(
+                self.vector_store.query,
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where_clause,
+                include=["distances", *include],
+                nprobe=nprobe
+            )
+        
+        # Format results
+        ids = results['ids'][0]
+        documents = results['documents'][0] if results.get('documents') else [None] * len(ids)
+        metadatas = results['metadatas'][0] if results.get('metadatas') else [None] * len(ids)
+        return [
+            self._format_result(chunk_id, document, metadata, 1 - distance)  # Convert distance to similarity
+            for chunk_id, document, metadata, distance in zip(ids, documents, metadatas, results['distances'][0])
+        ]
+    
+    def _lexical_is_decisive(self, lexical_hits: List[Dict[str, Any]]) -> bool:
+        """Whether the best BM25 hit contains every query term and clearly beats the runner-up"""
+        if not lexical_hits or not self.decisive_ratio or lexical_hits[0]["coverage"] < 1.0:
+            return False
+        if len(lexical_hits) == 1:
+            return True
+        return lexical_hits[0]["score"] >= self.decisive_ratio * lexical_hits[1]["score"]
+    
+    async def _lexical_results(self, lexical_hits: List[Dict[str, Any]],
+                               include: Sequence[str] = FULL_INCLUDE) -> List[SearchResult]:
+        """Load chunk fields for BM25 hits, keeping BM25 order"""
+        chunks = await self._load_chunks([hit["id"] for hit in lexical_hits], include)
+        results = []
+        for hit in lexical_hits:
+            if hit["id"] in chunks:
+                result = self._format_result(hit["id"], *chunks[hit["id"]], similarity_score=None)
+                result.bm25_score = hit["score"]
+                result.exact_match = True
+                results.append(result)
+        return results
+    
+    async def _fuse_results(self, vector_results: List[SearchResult], lexical_hits: List[Dict[str, Any]],
+                            n_results: int, include: Sequence[str] = FULL_INCLUDE) -> List[SearchResult]:
+        """Combine vector and BM25 rankings with reciprocal-rank fusion"""
+        fused = self._rrf([result.id for result in vector_results], [hit["id"] for hit in lexical_hits])
+        ranked = sorted(fused, key=fused.get, reverse=True)[:n_results]
+        by_id = {result.id: result for result in vector_results}
+        bm25_scores = {hit["id"]: hit["score"] for hit in lexical_hits}
+        
+        missing = [chunk_id for chunk_id in ranked if chunk_id not in by_id]
+        if missing:
+            for chunk_id, (content, metadata) in (await self._load_chunks(missing, include)).items():
+                by_id[chunk_id] = self._format_result(chunk_id, content, metadata, similarity_score=None)
+        
+        results = []
+        for chunk_id in ranked:
+            if chunk_id in by_id:
+                result = by_id[chunk_id]
+                result.rrf_score = fused[chunk_id]
+                result.bm25_score = bm25_scores.get(chunk_id)
+                results.append(result)
+        return results
+    
+    def _rrf(self, *rankings: List[str]) -> Dict[str, float]:
+        """Reciprocal-rank fusion scores for chunk IDs across several rankings"""
+        fused: Dict[str, float] = {}
+        for ranking in rankings:
+            for rank, chunk_id in enumerate(ranking):
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+        return fused
+    
+    async def _load_chunks(self, chunk_ids: List[str], include: Sequence[str] = FULL_INCLUDE) -> Dict[str, tuple]:
+        """Fetch (document, metadata) per chunk ID; columns left out of ``include`` come back as None"""
+        results = await run_io(self.vector_store.get, ids=chunk_ids, include=list(include))
+        ids = results['ids']
+        documents = results.get('documents') or [None] * len(ids)
+        metadatas = results.get('metadatas') or [None] * len(ids)
+        return {
+            chunk_id: (document, metadata)
+            for chunk_id, document, metadata in zip(ids, documents, metadatas)
+        }
+    
+    def _fetch_content(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """Read chunk text for results that were searched without documents"""
+        unique_ids = list(dict.fromkeys(chunk_ids))
+        results = self.vector_store.get(ids=unique_ids, include=["documents"])
+        self.content_fetches += 1
+        self.content_rows_fetched += len(results['ids'])
+        return dict(zip(results['ids'], results['documents']))
+    
+    def _with_content_loader(self, results: List[SearchResult]) -> List[SearchResult]:
+        attach_content_loader(results, self._fetch_content)
+        return results
+    
+    async def load_content(self, results: List[SearchResult]) -> List[SearchResult]:
+        """Fetch pending chunk text on the I/O pool so reading ``content`` never blocks the event loop"""
+        batches = {id(result._batch): result._batch for result in results
+                   if not result.content_loaded and result._batch is not None}
+        for batch in batches.values():
+            await run_io(batch.load)
+        return results
+    
+    def _format_result(self, chunk_id: str, content: Optional[str], metadata: Optional[Dict[str, Any]],
+                       similarity_score: Optional[float]) -> SearchResult:
+        return SearchResult(chunk_id, similarity_score, metadata, content)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get counts of how searches were answered"""
+        return {
+            "vector_only_searches": self.vector_only_searches,
+            "fused_searches": self.fused_searches,
+            "lexical_only_searches": self.lexical_only_searches,
+            "batch_searches": self.batch_searches,
+            "batch_questions": self.batch_questions,
+            "shared_chunk_fetches_saved": self.shared_chunk_fetches_saved,
+            "content_fetches": self.content_fetches,
+            "content_rows_fetched": self.content_rows_fetched
+        }
+    
     async def get_related_policies(self, policy_id: str, n_results: int = 3) -> List[Dict[str, Any]]:
-        """Get policies related to a specific policy"""
+        """Get policies related to a policy, by policy ID (or title for uploaded documents)"""
         try:
-            # Get the policy content first
-            policy_results = self.collection.get(ids=[policy_id])
-            if not policy_results['ids']:
+            if self.neighbour_graph is None:
                 return []
+            # Precomputed at ingest time, so no encoding or vector search happens here
+            return self.neighbour_graph.related_policies(str(policy_id), n_results) or []
             
-            policy_content = policy_results['documents'][0]
+        except Exception as e:
+            print(f"Error getting related policies: {e}")
+            return []
+    
+    async def get_related_chunks(self, chunk_id: str, n_results: int = 3) -> List[SearchResult]:
+        """Get the chunks most similar to a policy chunk"""
+        try:
+            if self.neighbour_graph is None:
+                return []
+            
+            neighbours = self.neighbour_graph.chunk_neighbours(chunk_id, n_results)
+            if not neighbours:
+                return []
             
-            # Search for similar content
-            return await self.search_similar_content(policy_content, n_results)
+            chunks = await self._load_chunks([neighbour_id for neighbour_id, _ in neighbours])
+            return [
+                self._format_result(neighbour_id, *chunks[neighbour_id], similarity_score=score)
+                for neighbour_id, score in neighbours if neighbour_id in chunks
+            ]
             
         except Exception as e:
-            print(f"Error getting related policies: {e}")
+            print(f"Error getting related chunks: {e}")
             return []
     
-    async def search_by_category(self, category: str, query: str = "", n_results: int = 10) -> List[Dict[str, Any]]:
+    async def search_by_category(self, category: str, query: str = "", n_results: int = 10,
+                                 include: Sequence[str] = FULL_INCLUDE) -> List[SearchResult]:
         """Search within a specific category"""
         try:
             if query:
-                return await self.search_similar_content(query, n_results, category)
+                return await self.search_similar_content(query, n_results, category, include=include)
             else:
                 # Get all content from category
-                results = self.collection.get(
+                results = await run_io(
+                    self.vector_store.get,
                     where={"category": category},
-                    limit=n_results
+                    limit=n_results,
+                    include=list(include)
                 )
                 
-                content = []
-                for i in range(len(results['ids'])):
-                    content.append({
-                        "id": results['ids'][i],
-                        "content": results['documents'][i],
-                        "metadata": results['metadatas'][i],
-                        "title": results['metadatas'][i].get('title', ''),
-                        "category": results['metadatas'][i].get('category', ''),
-                        "section": results['metadatas'][i].get('section', ''),
-                        "subsection": results['metadatas'][i].get('subsection', '')
-                    })
-                
-                return content
+                ids = results['ids']
+                documents = results.get('documents') or [None] * len(ids)
+                metadatas = results.get('metadatas') or [None] * len(ids)
+                content = [
+                    self._format_result(chunk_id, document, metadata, similarity_score=None)
+                    for chunk_id, document, metadata in zip(ids, documents, metadatas)
+                ]
+                return self._with_content_loader(content)
                 
         except Exception as e:
             print(f"Error searching by category: {e}")
@@ -96,12 +366,12 @@ class VectorSearchService:
     
     async def get_embedding(self, text: str) -> List[float]:
         """Get embedding for a text"""
-        return self.embedding_model.encode(text).tolist()
+        return (await self._encode_query(text)).tolist()
     
     async def calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two texts"""
-        embedding1 = self.embedding_model.encode(text1)
-        embedding2 = self.embedding_model.encode(text2)
+        embedding1 = await self._encode_query(text1)
+        embedding2 = await self._encode_query(text2)
         
         # Calculate cosine similarity
         similarity = np.dot(embedding1, embedding2) / (np.linalg.norm(embedding1) * np.linalg.norm(embedding2))
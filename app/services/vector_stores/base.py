@@ -0,0 +1,86 @@
+from typing import Protocol, List, Dict, Any, Optional, Sequence
+
+# Columns returned when the caller does not ask for specific ones (same as Chroma)
+DEFAULT_QUERY_INCLUDE = ("documents", "metadatas", "distances")
+DEFAULT_GET_INCLUDE = ("documents", "metadatas")
+
+class VectorStore(Protocol):
+    """Storage and nearest-neighbour search over chunk embeddings
+
+    Results use Chroma's column layout so backends are interchangeable: query()
+    returns {"ids": [[...]], "documents": [[...]], "metadatas": [[...]], "distances": [[...]]}
+    with one inner list per query embedding, and get() returns flat lists. Smaller
+    distances are closer; every backend reports cosine distance. ``nprobe`` tunes
+    approximate indexes per query and is ignored by exhaustive backends.
+    """
+
+    max_batch_size: int
+
+    def add(self, ids: List[str], embeddings: Sequence[Sequence[float]],
+            metadatas: List[Dict[str, Any]], documents: List[str]) -> None:
+        ...
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None, include: Optional[Sequence[str]] = None,
+              nprobe: Optional[int] = None) -> Dict[str, Any]:
+        ...
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None, include: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        ...
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        ...
+
+    def count(self) -> int:
+        ...
+
+    def reset(self) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style metadata filter ($eq, $ne, $in, $nin, $and, $or) against one row"""
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$eq" and value != operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+
+    return True
+
+def simple_equality(where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Return {field: value} if the filter is plain field equality, otherwise None"""
+    if not where:
+        return None
+
+    fields = {}
+    for key, condition in where.items():
+        if key.startswith("$"):
+            return None
+        if isinstance(condition, dict):
+            if list(condition) != ["$eq"]:
+                return None
+            condition = condition["$eq"]
+        fields[key] = condition
+    return fields
@@ -0,0 +1,68 @@
+from typing import List, Dict, Any, Optional, Sequence
+import chromadb
+
+from app.services.vector_stores.base import DEFAULT_QUERY_INCLUDE, DEFAULT_GET_INCLUDE
+
+# Cosine space, so distances are on the same scale as the NumPy backends and the routing thresholds
+COLLECTION_METADATA = {"hnsw:space": "cosine"}
+
+class ChromaVectorStore:
+    """VectorStore backed by a persistent Chroma collection
+
+    Collections are created in cosine space. A collection created earlier in
+    Chroma's default squared-L2 space keeps it, and its distances are halved,
+    which is the cosine distance for the unit-length vectors the embedding
+    model produces. reset() recreates it in cosine space.
+    """
+
+    def __init__(self, path: str, collection_name: str, max_batch_size: int = 5000):
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection_name = collection_name
+        self.collection = self.client.get_or_create_collection(collection_name, metadata=COLLECTION_METADATA)
+
+        server_limit = getattr(self.client, "max_batch_size", None)
+        self.max_batch_size = min(max_batch_size, server_limit) if server_limit else max_batch_size
+
+    def add(self, ids: List[str], embeddings: Sequence[Sequence[float]],
+            metadatas: List[Dict[str, Any]], documents: List[str]) -> None:
+        self.collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None, include: Optional[Sequence[str]] = None,
+              nprobe: Optional[int] = None) -> Dict[str, Any]:
+        # Chroma's HNSW search has no per-query probe setting, so nprobe is ignored
+        results = self.collection.query(
+            query_embeddings=[list(map(float, embedding)) for embedding in query_embeddings],
+            n_results=n_results,
+            where=where,
+            include=list(include if include is not None else DEFAULT_QUERY_INCLUDE)
+        )
+        if results.get("distances") and self._space() == "l2":
+            results["distances"] = [[distance / 2 for distance in row] for row in results["distances"]]
+        return results
+
+    def _space(self) -> str:
+        return (self.collection.metadata or {}).get("hnsw:space", "l2")
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None, include: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        return self.collection.get(ids=ids, where=where, limit=limit, include=list(include if include is not None else DEFAULT_GET_INCLUDE))
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        self.collection.delete(ids=ids, where=where)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def reset(self) -> None:
+        """Drop and recreate the collection"""
+        self.client.delete_collection(self.collection_name)
+        self.collection = self.client.create_collection(self.collection_name, metadata=COLLECTION_METADATA)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "chroma",
+            "collection": self.collection_name,
+            "space": self._space(),
+            "count": self.count()
+        }
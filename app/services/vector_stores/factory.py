@@ -0,0 +1,52 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.services.vector_stores.base import VectorStore
+
+def create_vector_store(backend: Optional[str] = None, path: Optional[str] = None) -> VectorStore:
+    """Build the configured vector store backend"""
+    backend = backend or settings.VECTOR_STORE_BACKEND
+    if backend == "chroma":
+        # Imported lazily so NumPy-only deployments do not need chromadb installed
+        from app.services.vector_stores.chroma_store import ChromaVectorStore
+        return ChromaVectorStore(
+            path=path or settings.CHROMA_PERSIST_DIRECTORY,
+            collection_name=settings.CHROMA_COLLECTION_NAME,
+            max_batch_size=settings.VECTOR_STORE_MAX_BATCH_SIZE
+        )
+
+    if backend == "numpy":
+        from app.services.vector_stores.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(path=path or settings.VECTOR_STORE_PATH, max_batch_size=settings.VECTOR_STORE_MAX_BATCH_SIZE)
+
+    if backend in ("int8", "binary"):
+        from app.services.vector_stores.quantized_store import QuantizedVectorStore
+        return QuantizedVectorStore(
+            path=path or settings.VECTOR_STORE_PATH,
+            mode=backend,
+            rescore_factor=settings.VECTOR_STORE_RESCORE_FACTOR,
+            max_batch_size=settings.VECTOR_STORE_MAX_BATCH_SIZE
+        )
+
+    if backend == "ivf":
+        from app.services.vector_stores.ivf_store import IVFVectorStore
+        return IVFVectorStore(
+            path=path or settings.VECTOR_STORE_PATH,
+            n_lists=settings.IVF_N_LISTS,
+            nprobe=settings.IVF_NPROBE,
+            min_train_size=settings.IVF_MIN_TRAIN_SIZE,
+            max_batch_size=settings.VECTOR_STORE_MAX_BATCH_SIZE
+        )
+
+    if backend == "partitioned":
+        from app.services.vector_stores.partitioned_store import PartitionedVectorStore
+        inner_backend = settings.VECTOR_STORE_PARTITION_BACKEND
+        if inner_backend in ("chroma", "partitioned"):
+            raise ValueError(f"Unsupported partition backend: {inner_backend}")
+        return PartitionedVectorStore(
+            path=path or settings.VECTOR_STORE_PATH,
+            make_partition=lambda partition_path: create_vector_store(inner_backend, partition_path),
+            max_batch_size=settings.VECTOR_STORE_MAX_BATCH_SIZE
+        )
+
+    raise ValueError(f"Unknown vector store backend: {backend}")
@@ -0,0 +1,192 @@
+from typing import List, Dict, Any, Optional, Tuple
+import os
+import numpy as np
+
+from app.services.vector_stores.numpy_store import NumpyVectorStore, normalize_rows, top_k_columns
+
+ASSIGN_BLOCK_ROWS = 65536
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every row, computed block by block"""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS])
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+def update_centroids(centroids: np.ndarray, counts: np.ndarray, batch: np.ndarray) -> None:
+    """One spherical mini-batch k-means step, in place, with a per-centroid learning rate"""
+    assignments = np.argmax(batch @ centroids.T, axis=1)
+    batch_counts = np.bincount(assignments, minlength=len(centroids))
+    sums = np.zeros_like(centroids)
+    np.add.at(sums, assignments, batch)
+
+    touched = batch_counts > 0
+    counts[touched] += batch_counts[touched]
+    rate = (batch_counts[touched] / counts[touched])[:, None]
+    centroids[touched] = (1 - rate) * centroids[touched] + rate * (sums[touched] / batch_counts[touched][:, None])
+    centroids[:] = normalize_rows(centroids)
+
+def train_centroids(vectors: np.ndarray, n_lists: int, iterations: int = 25,
+                    batch_size: int = 4096, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Mini-batch spherical k-means over (a sample of) the rows; returns (centroids, counts)"""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    centroids = normalize_rows(vectors[np.sort(rng.choice(n, size=n_lists, replace=False))])
+    counts = np.zeros(n_lists, dtype=np.float64)
+    for _ in range(iterations):
+        batch = np.asarray(vectors[np.sort(rng.choice(n, size=min(batch_size, n), replace=False))])
+        update_centroids(centroids, counts, batch)
+    return centroids, counts
+
+class IVFVectorStore(NumpyVectorStore):
+    """Inverted-file index: rows are clustered with k-means and a query scans only the
+    ``nprobe`` lists whose centroids are closest to it
+
+    Below ``min_train_size`` rows the index searches exhaustively. Once trained, new
+    rows are assigned to their nearest list and nudge the centroids with a mini-batch
+    update; the centroids are retrained from scratch whenever the index has doubled
+    since the last training so list quality does not drift.
+    """
+
+    backend = "ivf"
+    CENTROIDS_FILE = "centroids.npy"
+    ASSIGNMENTS_FILE = "assignments.npy"
+
+    def __init__(self, path: str, n_lists: int = 0, nprobe: int = 8, min_train_size: int = 1024,
+                 max_batch_size: int = 5000):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+
+        self._centroids: Optional[np.ndarray] = None
+        self._centroid_counts: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._trained_at = 0
+        self._list_rows: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+        super().__init__(path, max_batch_size=max_batch_size)
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    # Index maintenance
+
+    def _on_rows_added(self, start: int, end: int) -> None:
+        if start == 0 and self._load_lists(end):
+            return
+
+        if not self.trained or end >= 2 * self._trained_at:
+            if end >= self.min_train_size:
+                self._train()
+            return
+
+        added = np.asarray(self._matrix[start:end])
+        update_centroids(self._centroids, self._centroid_counts, added)
+        self._assignments = np.concatenate([self._assignments[:start], assign_to_centroids(added, self._centroids)])
+        self._list_rows = None
+
+    def _on_rows_removed(self, keep: np.ndarray) -> None:
+        if len(keep) < self.min_train_size:
+            self._centroids = None
+            self._centroid_counts = None
+            self._assignments = np.empty(0, dtype=np.int32)
+            self._trained_at = 0
+        elif self.trained:
+            self._assignments = self._assignments[keep]
+        self._list_rows = None
+
+    def _train(self) -> None:
+        vectors = self.vectors
+        n_lists = self.n_lists or int(np.sqrt(len(vectors)))
+        n_lists = max(1, min(n_lists, len(vectors)))
+        self._centroids, self._centroid_counts = train_centroids(vectors, n_lists)
+        self._assignments = assign_to_centroids(vectors, self._centroids)
+        self._trained_at = len(vectors)
+        self._list_rows = None
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows grouped by list (CSR layout), rebuilt lazily after writes"""
+        if self._list_rows is None:
+            self._list_rows = np.argsort(self._assignments, kind="stable")
+            sizes = np.bincount(self._assignments, minlength=len(self._centroids))
+            self._list_offsets = np.concatenate([[0], np.cumsum(sizes)])
+        return self._list_rows, self._list_offsets
+
+    # Search
+
+    def _search(self, queries: np.ndarray, candidates: Optional[np.ndarray],
+                k: int, nprobe: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if not self.trained:
+            return super()._search(queries, candidates, k)
+
+        list_rows, offsets = self._inverted_lists()
+        allowed = None
+        if candidates is not None:
+            allowed = np.zeros(self._count, dtype=bool)
+            allowed[candidates] = True
+
+        n_lists = len(self._centroids)
+        probe_order = np.argsort(-(queries @ self._centroids.T), axis=1)
+        hits = []
+        for query, order in zip(queries, probe_order):
+            probes = min(nprobe or self.nprobe, n_lists)
+            while True:
+                rows = np.concatenate([list_rows[offsets[i]:offsets[i + 1]] for i in order[:probes]])
+                if allowed is not None:
+                    rows = rows[allowed[rows]]
+                # Widen the probe when the nearest lists cannot fill k results
+                if len(rows) >= k or probes >= n_lists:
+                    break
+                probes = min(probes * 2, n_lists)
+
+            rows = np.sort(rows)
+            scores = self._matrix[rows] @ query
+            top = top_k_columns(scores[:, None], k)[:, 0]
+            hits.append((rows[top], scores[top]))
+        return hits
+
+    # Persistence
+
+    def _persist(self) -> None:
+        super()._persist()
+        centroids_path = os.path.join(self.path, self.CENTROIDS_FILE)
+        assignments_path = os.path.join(self.path, self.ASSIGNMENTS_FILE)
+        if self.trained:
+            np.save(centroids_path, self._centroids)
+            np.save(assignments_path, self._assignments)
+        else:
+            for file_path in (centroids_path, assignments_path):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+    def _load_lists(self, count: int) -> bool:
+        """Restore persisted centroids and assignments if they match the table"""
+        centroids_path = os.path.join(self.path, self.CENTROIDS_FILE)
+        assignments_path = os.path.join(self.path, self.ASSIGNMENTS_FILE)
+        if self.trained or not (os.path.exists(centroids_path) and os.path.exists(assignments_path)):
+            return False
+
+        assignments = np.load(assignments_path)
+        if len(assignments) != count:
+            return False
+        self._centroids = np.load(centroids_path)
+        self._centroid_counts = np.bincount(assignments, minlength=len(self._centroids)).astype(np.float64)
+        self._assignments = assignments
+        self._trained_at = count
+        self._list_rows = None
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "trained": self.trained,
+            "n_lists": len(self._centroids) if self.trained else 0,
+            "nprobe": self.nprobe,
+            "trained_at_count": self._trained_at
+        })
+        if self.trained:
+            sizes = np.bincount(self._assignments, minlength=len(self._centroids))
+            stats["list_size"] = {"min": int(sizes.min()), "avg": float(sizes.mean()), "max": int(sizes.max())}
+        return stats
@@ -0,0 +1,362 @@
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import json
+import os
+import threading
+import numpy as np
+
+from app.services.vector_stores.base import (
+    DEFAULT_QUERY_INCLUDE, DEFAULT_GET_INCLUDE, matches_where, simple_equality
+)
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise each row so dot products are cosine similarities"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def top_k_columns(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores in each column of an (n, m) matrix, best first"""
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((0, scores.shape[1]), dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=0)[:k]
+    else:
+        candidates = np.broadcast_to(np.arange(n)[:, None], scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=0), axis=0, kind="stable")
+    return np.take_along_axis(candidates, order, axis=0)
+
+class NumpyVectorStore:
+    """VectorStore keeping L2-normalised float32 embeddings in one memory-mapped matrix
+
+    Rows live contiguously in ``embeddings.f32``. Their IDs, documents and metadata
+    go to an append-only table (``table.jsonl``): writes append their rows and
+    deletions, and the table is only rewritten once deleted rows outnumber live
+    ones, so a write costs time in its own size rather than the corpus. Top-k is
+    a single matrix-vector product followed by ``argpartition``; subclasses
+    override ``_search`` to change the search strategy.
+    """
+
+    backend = "numpy"
+    MATRIX_FILE = "embeddings.f32"
+    TABLE_FILE = "table.jsonl"
+    LEGACY_TABLE_FILE = "metadata.json"
+
+    def __init__(self, path: str, max_batch_size: int = 5000, initial_capacity: int = 1024):
+        self.path = path
+        self.max_batch_size = max_batch_size
+        self.initial_capacity = initial_capacity
+        self.dimension: Optional[int] = None
+
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.memmap] = None
+        self._capacity = 0
+        self._count = 0
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._row_of: Dict[str, int] = {}
+        self._field_rows: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._pending: List[Dict[str, Any]] = []  # Table entries not yet appended
+        self._table_rows = 0  # Rows in the table file, deleted ones included
+        self._table_dimension: Optional[int] = None
+
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the stored (normalised) embeddings"""
+        if self._matrix is None:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+        return self._matrix[:self._count]
+
+    # Writes
+
+    def add(self, ids: List[str], embeddings: Sequence[Sequence[float]],
+            metadatas: List[Dict[str, Any]], documents: List[str]) -> None:
+        vectors = normalize_rows(embeddings)
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dimension}")
+            duplicates = [chunk_id for chunk_id in ids if chunk_id in self._row_of]
+            if duplicates:
+                raise ValueError(f"IDs already exist in the index: {duplicates[:5]}")
+
+            start = self._count
+            end = start + len(ids)
+            self._ensure_capacity(end)
+            self._matrix[start:end] = vectors
+
+            self._ids.extend(ids)
+            self._documents.extend(documents or [""] * len(ids))
+            self._metadatas.extend(metadatas or [{} for _ in ids])
+            self._pending.extend(
+                {"id": self._ids[row], "document": self._documents[row], "metadata": self._metadatas[row]}
+                for row in range(start, end)
+            )
+            self._table_rows += len(ids)
+            for row, chunk_id in enumerate(ids, start):
+                self._row_of[chunk_id] = row
+            self._count = end
+            self._field_rows.clear()
+
+            self._on_rows_added(start, end)
+            self._persist()
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            doomed = set(self._rows_for(ids, where))
+            if not doomed:
+                return
+
+            self._pending.append({"deleted": [self._ids[row] for row in sorted(doomed)]})
+            keep = np.array([row for row in range(self._count) if row not in doomed], dtype=np.int64)
+            if len(keep):
+                self._matrix[:len(keep)] = self._matrix[keep]
+            self._ids = [self._ids[row] for row in keep]
+            self._documents = [self._documents[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._row_of = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._count = len(keep)
+            self._field_rows.clear()
+
+            self._on_rows_removed(keep)
+            self._persist()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ids, self._documents, self._metadatas = [], [], []
+            self._pending.clear()
+            self._row_of.clear()
+            self._field_rows.clear()
+            self._count = 0
+            self._on_rows_removed(np.empty(0, dtype=np.int64))
+            self._persist()
+
+    # Reads
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None, include: Optional[Sequence[str]] = None,
+              nprobe: Optional[int] = None) -> Dict[str, Any]:
+        include = include if include is not None else DEFAULT_QUERY_INCLUDE
+        queries = normalize_rows(query_embeddings)
+        with self._lock:
+            candidates = self._candidate_rows(where)
+            if self._count == 0 or (candidates is not None and len(candidates) == 0):
+                hits = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+            else:
+                hits = self._search(queries, candidates, n_results, nprobe=nprobe)
+
+            columns = [column for column in ("documents", "metadatas", "distances", "embeddings") if column in include]
+            results: Dict[str, Any] = {"ids": []}
+            results.update({column: [] for column in columns})
+            for rows, scores in hits:
+                results["ids"].append([self._ids[row] for row in rows])
+                if "distances" in results:
+                    results["distances"].append((1.0 - scores).tolist())
+                if "documents" in results:
+                    results["documents"].append([self._documents[row] for row in rows])
+                if "metadatas" in results:
+                    results["metadatas"].append([self._metadatas[row] for row in rows])
+                if "embeddings" in results:
+                    results["embeddings"].append(self._matrix[rows].tolist() if len(rows) else [])
+        return self._project(results, include)
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None, include: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        include = include if include is not None else DEFAULT_GET_INCLUDE
+        with self._lock:
+            rows = self._rows_for(ids, where)
+            if limit:
+                rows = rows[:limit]
+            results: Dict[str, Any] = {"ids": [self._ids[row] for row in rows]}
+            if "documents" in include:
+                results["documents"] = [self._documents[row] for row in rows]
+            if "metadatas" in include:
+                results["metadatas"] = [self._metadatas[row] for row in rows]
+            if "embeddings" in include:
+                results["embeddings"] = self._matrix[rows].tolist() if rows else []
+        return self._project(results, include)
+
+    def count(self) -> int:
+        return self._count
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "path": self.path,
+            "count": self._count,
+            "dimension": self.dimension,
+            "capacity": self._capacity,
+            "bytes_per_chunk": (self.dimension or 0) * 4,
+            "vector_bytes": self._count * (self.dimension or 0) * 4
+        }
+
+    # Search strategy, overridden by derived indexes
+
+    def _search(self, queries: np.ndarray, candidates: Optional[np.ndarray],
+                k: int, nprobe: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        vectors = self.vectors if candidates is None else self._matrix[candidates]
+        scores = vectors @ queries.T
+        top = top_k_columns(scores, k)
+
+        hits = []
+        for column in range(queries.shape[0]):
+            local = top[:, column]
+            rows = local if candidates is None else candidates[local]
+            hits.append((rows, scores[local, column]))
+        return hits
+
+    def _on_rows_added(self, start: int, end: int) -> None:
+        """Hook for derived indexes when rows [start, end) were appended"""
+
+    def _on_rows_removed(self, keep: np.ndarray) -> None:
+        """Hook for derived indexes after rows were compacted to ``keep`` (old row numbers)"""
+
+    # Helpers
+
+    def _candidate_rows(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Row numbers allowed by a metadata filter, or None for all rows"""
+        if not where:
+            return None
+
+        equality = simple_equality(where)
+        if equality is None:
+            return np.array(
+                [row for row, metadata in enumerate(self._metadatas) if matches_where(metadata, where)],
+                dtype=np.int64
+            )
+
+        rows = None
+        for field, value in equality.items():
+            field_rows = self._field_rows_for(field).get(value, np.empty(0, dtype=np.int64))
+            rows = field_rows if rows is None else np.intersect1d(rows, field_rows, assume_unique=True)
+        return rows
+
+    def _field_rows_for(self, field: str) -> Dict[Any, np.ndarray]:
+        if field not in self._field_rows:
+            grouped: Dict[Any, List[int]] = {}
+            for row, metadata in enumerate(self._metadatas):
+                grouped.setdefault(metadata.get(field), []).append(row)
+            self._field_rows[field] = {value: np.array(rows, dtype=np.int64) for value, rows in grouped.items()}
+        return self._field_rows[field]
+
+    def _rows_for(self, ids: Optional[List[str]], where: Optional[Dict[str, Any]]) -> List[int]:
+        if ids is not None:
+            rows = [self._row_of[chunk_id] for chunk_id in ids if chunk_id in self._row_of]
+        else:
+            rows = list(range(self._count))
+        if where:
+            rows = [row for row in rows if matches_where(self._metadatas[row], where)]
+        return rows
+
+    def _project(self, results: Dict[str, Any], include: Sequence[str]) -> Dict[str, Any]:
+        for column in ("documents", "metadatas", "distances", "embeddings"):
+            if column not in include:
+                results[column] = None
+        return results
+
+    def _read_table(self, table_path: str) -> bool:
+        """Replay the table's appended rows and deletions; False if its last line is incomplete"""
+        rows: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        complete = True
+        with open(table_path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    complete = False
+                    break
+                if "deleted" in entry:
+                    for chunk_id in entry["deleted"]:
+                        rows.pop(chunk_id, None)
+                else:
+                    # A re-added ID goes to the end, where add() put its matrix row
+                    rows.pop(entry["id"], None)
+                    rows[entry["id"]] = (entry["document"], entry["metadata"])
+                    self._table_rows += 1
+
+        self.dimension = self._table_dimension = header["dimension"]
+        self._ids = list(rows)
+        self._documents = [document for document, _ in rows.values()]
+        self._metadatas = [metadata for _, metadata in rows.values()]
+        return complete
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+
+        capacity = max(self.initial_capacity, self._capacity)
+        while capacity < rows:
+            capacity *= 2
+
+        matrix_path = os.path.join(self.path, self.MATRIX_FILE)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(matrix_path, "ab") as f:
+            f.truncate(capacity * self.dimension * 4)
+        self._matrix = np.memmap(matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        self._capacity = capacity
+
+    def _persist(self) -> None:
+        if self._matrix is not None:
+            self._matrix.flush()
+
+        # Rows are appended; the table is rewritten when it would be mostly deleted rows
+        if self._table_dimension != self.dimension or self._table_rows - self._count > self._count:
+            self._rewrite_table()
+        elif self._pending:
+            with open(os.path.join(self.path, self.TABLE_FILE), "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry, separators=(",", ":")) + "\n" for entry in self._pending)
+        self._pending.clear()
+
+    def _rewrite_table(self) -> None:
+        """Write the table from scratch with only the live rows"""
+        table_path = os.path.join(self.path, self.TABLE_FILE)
+        with open(table_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"dimension": self.dimension}) + "\n")
+            for chunk_id, document, metadata in zip(self._ids, self._documents, self._metadatas):
+                f.write(json.dumps({"id": chunk_id, "document": document, "metadata": metadata},
+                                   separators=(",", ":")) + "\n")
+        os.replace(table_path + ".tmp", table_path)
+        self._table_rows = self._count
+        self._table_dimension = self.dimension
+        self._pending.clear()
+
+    def _load(self) -> None:
+        table_path = os.path.join(self.path, self.TABLE_FILE)
+        legacy_path = os.path.join(self.path, self.LEGACY_TABLE_FILE)
+        if os.path.exists(table_path):
+            complete = self._read_table(table_path)
+        elif os.path.exists(legacy_path):
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+            self.dimension = table["dimension"]
+            self._ids = table["ids"][:table["count"]]
+            self._documents = table["documents"][:table["count"]]
+            self._metadatas = table["metadatas"][:table["count"]]
+            complete = False
+        else:
+            return
+
+        self._count = len(self._ids)
+        self._row_of = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        if not complete:
+            # Convert an old single-file table, or drop a line cut short by a crash
+            self._rewrite_table()
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+
+        matrix_path = os.path.join(self.path, self.MATRIX_FILE)
+        if self.dimension and os.path.exists(matrix_path):
+            self._capacity = os.path.getsize(matrix_path) // (self.dimension * 4)
+            self._matrix = np.memmap(matrix_path, dtype=np.float32, mode="r+", shape=(self._capacity, self.dimension))
+        if self._count:
+            self._on_rows_added(0, self._count)
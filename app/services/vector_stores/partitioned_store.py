@@ -0,0 +1,223 @@
+from typing import Callable, List, Dict, Any, Optional, Sequence, Tuple
+import heapq
+import json
+import os
+import re
+import shutil
+import threading
+
+from app.core.executors import executors
+from app.services.vector_stores.base import (
+    VectorStore, DEFAULT_QUERY_INCLUDE, DEFAULT_GET_INCLUDE, simple_equality
+)
+
+class PartitionedVectorStore:
+    """VectorStore keeping one physical sub-index per value of a metadata field (category)
+
+    Queries filtered on the field only touch the matching partitions, so their cost
+    follows the category's size rather than the corpus. Unfiltered queries fan out to
+    every partition on the search pool and the per-partition top-k lists are merged.
+    """
+
+    backend = "partitioned"
+    PARTITIONS_FILE = "partitions.json"
+    DEFAULT_PARTITION = "_default"
+
+    def __init__(self, path: str, make_partition: Callable[[str], VectorStore],
+                 partition_field: str = "category", max_batch_size: int = 5000):
+        self.path = path
+        self.make_partition = make_partition
+        self.partition_field = partition_field
+        self.max_batch_size = max_batch_size
+
+        self._lock = threading.RLock()
+        self._directories: Dict[str, str] = {}
+        self._partitions: Dict[str, VectorStore] = {}
+        self._partition_of: Dict[str, str] = {}
+
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    # Writes
+
+    def add(self, ids: List[str], embeddings: Sequence[Sequence[float]],
+            metadatas: List[Dict[str, Any]], documents: List[str]) -> None:
+        metadatas = metadatas or [{} for _ in ids]
+        documents = documents or [""] * len(ids)
+        groups: Dict[str, List[int]] = {}
+        for position, metadata in enumerate(metadatas):
+            groups.setdefault(self._partition_key(metadata.get(self.partition_field)), []).append(position)
+
+        with self._lock:
+            for key, positions in groups.items():
+                self._partition(key, create=True).add(
+                    ids=[ids[i] for i in positions],
+                    embeddings=[embeddings[i] for i in positions],
+                    metadatas=[metadatas[i] for i in positions],
+                    documents=[documents[i] for i in positions]
+                )
+                for i in positions:
+                    self._partition_of[ids[i]] = key
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            for key, partition_ids, partition_where in self._route(ids, where):
+                partition = self._partitions[key]
+                partition.delete(ids=partition_ids, where=partition_where)
+                if partition_ids is not None and partition_where is None:
+                    for chunk_id in partition_ids:
+                        self._partition_of.pop(chunk_id, None)
+                else:
+                    remaining = set(partition.get(include=[])["ids"])
+                    self._partition_of = {
+                        chunk_id: owner for chunk_id, owner in self._partition_of.items()
+                        if owner != key or chunk_id in remaining
+                    }
+
+    def reset(self) -> None:
+        with self._lock:
+            for key in list(self._partitions):
+                self._partitions[key].reset()
+                shutil.rmtree(os.path.join(self.path, self._directories[key]), ignore_errors=True)
+            self._partitions.clear()
+            self._directories.clear()
+            self._partition_of.clear()
+            self._persist()
+
+    # Reads
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None, include: Optional[Sequence[str]] = None,
+              nprobe: Optional[int] = None) -> Dict[str, Any]:
+        include = list(include if include is not None else DEFAULT_QUERY_INCLUDE)
+        # Distances are needed to merge partitions even if the caller did not ask for them
+        partition_include = include if "distances" in include else include + ["distances"]
+        routes = self._route(None, where)
+
+        def search(route: Tuple[str, Optional[List[str]], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+            key, _, partition_where = route
+            return self._partitions[key].query(
+                query_embeddings=query_embeddings, n_results=n_results,
+                where=partition_where, include=partition_include, nprobe=nprobe
+            )
+
+        if len(routes) == 1:
+            partials = [search(routes[0])]
+        else:
+            partials = list(executors.search.map(search, routes))
+
+        columns = [column for column in ("documents", "metadatas", "distances", "embeddings") if column in include]
+        results: Dict[str, Any] = {"ids": []}
+        results.update({column: [] for column in columns})
+        for query_index in range(len(query_embeddings)):
+            ranked = heapq.merge(*[
+                [(distance, p, position) for position, distance in enumerate(partial["distances"][query_index])]
+                for p, partial in enumerate(partials)
+            ])
+            top = [(p, position) for _, p, position in ranked][:n_results]
+            results["ids"].append([partials[p]["ids"][query_index][position] for p, position in top])
+            for column in columns:
+                results[column].append([partials[p][column][query_index][position] for p, position in top])
+
+        for column in ("documents", "metadatas", "distances", "embeddings"):
+            results.setdefault(column, None)
+        return results
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None, include: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        include = list(include if include is not None else DEFAULT_GET_INCLUDE)
+        results: Dict[str, Any] = {"ids": []}
+        results.update({column: [] for column in ("documents", "metadatas", "embeddings") if column in include})
+        for key, partition_ids, partition_where in self._route(ids, where):
+            remaining = limit - len(results["ids"]) if limit else None
+            if remaining is not None and remaining <= 0:
+                break
+            partial = self._partitions[key].get(ids=partition_ids, where=partition_where, limit=remaining, include=include)
+            for column in results:
+                results[column].extend(partial[column])
+
+        for column in ("documents", "metadatas", "embeddings"):
+            results.setdefault(column, None)
+        return results
+
+    def count(self) -> int:
+        return sum(partition.count() for partition in self._partitions.values())
+
+    def stats(self) -> Dict[str, Any]:
+        partition_stats = {key: partition.stats() for key, partition in self._partitions.items()}
+        inner = next(iter(partition_stats.values()), {})
+        return {
+            "backend": self.backend,
+            "partition_backend": inner.get("backend"),
+            "partition_field": self.partition_field,
+            "path": self.path,
+            "count": self.count(),
+            "partitions": {key: stats.get("count", 0) for key, stats in partition_stats.items()}
+        }
+
+    # Routing
+
+    def _partition_key(self, value: Any) -> str:
+        return str(value) if value not in (None, "") else self.DEFAULT_PARTITION
+
+    def _route(self, ids: Optional[List[str]],
+               where: Optional[Dict[str, Any]]) -> List[Tuple[str, Optional[List[str]], Optional[Dict[str, Any]]]]:
+        """Resolve a request to (partition, ids, remaining filter) triples"""
+        keys = list(self._partitions)
+        partition_where = where
+
+        equality = simple_equality(where)
+        if equality and self.partition_field in equality:
+            keys = [self._partition_key(equality[self.partition_field])]
+            rest = {field: value for field, value in equality.items() if field != self.partition_field}
+            partition_where = rest or None
+        elif where and isinstance(where.get(self.partition_field), dict) and list(where[self.partition_field]) == ["$in"]:
+            keys = [self._partition_key(value) for value in where[self.partition_field]["$in"]]
+            rest = {field: value for field, value in where.items() if field != self.partition_field}
+            partition_where = rest or None
+
+        keys = [key for key in keys if key in self._partitions]
+        if ids is None:
+            return [(key, None, partition_where) for key in keys]
+
+        grouped: Dict[str, List[str]] = {}
+        for chunk_id in ids:
+            key = self._partition_of.get(chunk_id)
+            if key in keys:
+                grouped.setdefault(key, []).append(chunk_id)
+        return [(key, grouped[key], partition_where) for key in keys if key in grouped]
+
+    def _partition(self, key: str, create: bool = False) -> Optional[VectorStore]:
+        if key not in self._partitions and create:
+            directory = re.sub(r"[^\w.-]+", "_", key).strip("_") or "partition"
+            taken = set(self._directories.values())
+            suffix = 1
+            candidate = directory
+            while candidate in taken:
+                suffix += 1
+                candidate = f"{directory}_{suffix}"
+            self._directories[key] = candidate
+            self._partitions[key] = self.make_partition(os.path.join(self.path, candidate))
+            self._persist()
+        return self._partitions.get(key)
+
+    # Persistence
+
+    def _persist(self) -> None:
+        partitions_path = os.path.join(self.path, self.PARTITIONS_FILE)
+        with open(partitions_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self._directories, f)
+        os.replace(partitions_path + ".tmp", partitions_path)
+
+    def _load(self) -> None:
+        partitions_path = os.path.join(self.path, self.PARTITIONS_FILE)
+        if not os.path.exists(partitions_path):
+            return
+
+        with open(partitions_path, "r", encoding="utf-8") as f:
+            self._directories = json.load(f)
+        for key, directory in self._directories.items():
+            partition = self.make_partition(os.path.join(self.path, directory))
+            self._partitions[key] = partition
+            for chunk_id in partition.get(include=[])["ids"]:
+                self._partition_of[chunk_id] = key
@@ -0,0 +1,150 @@
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+from app.services.vector_stores.numpy_store import NumpyVectorStore, top_k_columns
+
+# Number of set bits in every possible byte, for Hamming distance on packed codes
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+class QuantizedVectorStore(NumpyVectorStore):
+    """Flat index that searches compact codes in RAM and rescores against float vectors on disk
+
+    ``int8`` keeps one signed byte per dimension (per-dimension scale) and scores the
+    codes against the float query; ``binary`` keeps one sign bit per dimension and ranks
+    by Hamming distance. The top ``k * rescore_factor`` candidates are then rescored
+    exactly from the memory-mapped float32 matrix.
+    """
+
+    # Sign bits lose far more ranking information than int8, so binary needs a deeper shortlist
+    DEFAULT_RESCORE_FACTORS = {"int8": 4, "binary": 32}
+    SCAN_BLOCK_ROWS = 16384
+
+    def __init__(self, path: str, mode: str = "int8", rescore_factor: Optional[int] = None, max_batch_size: int = 5000):
+        if mode not in self.DEFAULT_RESCORE_FACTORS:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        self.backend = f"numpy-{mode}"
+        self.rescore_factor = rescore_factor or self.DEFAULT_RESCORE_FACTORS[mode]
+        self._codes: Optional[np.ndarray] = None
+        self._scale: Optional[np.ndarray] = None
+        self._recent_queries = deque(maxlen=256)
+        super().__init__(path, max_batch_size=max_batch_size)
+
+    # Code maintenance
+
+    def _on_rows_added(self, start: int, end: int) -> None:
+        added = np.asarray(self._matrix[start:end])
+        if self.mode == "int8":
+            batch_max = np.maximum(np.abs(added).max(axis=0), 1e-6)
+            if self._scale is None or np.any(batch_max > self._scale):
+                # Widen the per-dimension range and re-encode everything against it
+                self._scale = batch_max if self._scale is None else np.maximum(self._scale, batch_max)
+                self._codes = self._encode(np.asarray(self.vectors))
+                return
+
+        codes = self._encode(added)
+        if self._codes is None or start == 0:
+            self._codes = codes
+        else:
+            self._codes = np.concatenate([self._codes[:start], codes])
+
+    def _on_rows_removed(self, keep: np.ndarray) -> None:
+        if len(keep) == 0:
+            self._codes = None
+            self._scale = None
+        elif self._codes is not None:
+            self._codes = self._codes[keep]
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.mode == "int8":
+            return np.clip(np.rint(vectors / self._scale * 127), -127, 127).astype(np.int8)
+        return np.packbits(vectors > 0, axis=1)
+
+    # Search
+
+    def _search(self, queries: np.ndarray, candidates: Optional[np.ndarray],
+                k: int, nprobe: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        self._recent_queries.extend(queries)
+        return self._rescored_search(queries, candidates, k)
+
+    def _rescored_search(self, queries: np.ndarray, candidates: Optional[np.ndarray],
+                         k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        codes = self._codes if candidates is None else self._codes[candidates]
+        hits = []
+        for query in queries:
+            approximate = self._approximate_scores(codes, query)
+            local = top_k_columns(approximate[:, None], k * self.rescore_factor)[:, 0]
+            shortlist = local if candidates is None else candidates[local]
+
+            exact = self._matrix[shortlist] @ query
+            order = top_k_columns(exact[:, None], k)[:, 0]
+            hits.append((shortlist[order], exact[order]))
+        return hits
+
+    def _approximate_scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        if self.mode == "binary":
+            query_bits = np.packbits(query > 0)
+            hamming = POPCOUNT[np.bitwise_xor(codes, query_bits)].sum(axis=1, dtype=np.int32)
+            return -hamming.astype(np.float32)
+
+        # int8 codes against the scaled float query; converted block by block to bound memory
+        weights = (query * self._scale).astype(np.float32)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), self.SCAN_BLOCK_ROWS):
+            block = codes[start:start + self.SCAN_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ weights
+        return scores
+
+    # Reporting
+
+    def code_bytes_per_chunk(self) -> int:
+        if not self.dimension:
+            return 0
+        return self.dimension if self.mode == "int8" else (self.dimension + 7) // 8
+
+    def evaluate_recall(self, k: int = 10, samples: int = 100) -> Dict[str, Any]:
+        """Measure recall@k of the quantized search against exact float search
+
+        Uses recently served query embeddings, falling back to stored chunk vectors
+        when no queries have been seen yet.
+        """
+        with self._lock:
+            if self._count == 0:
+                return {"k": k, "samples": 0, "recall_at_k": None}
+
+            if self._recent_queries:
+                queries = np.stack(list(self._recent_queries)[-samples:])
+            else:
+                rows = np.random.default_rng(0).choice(self._count, size=min(samples, self._count), replace=False)
+                queries = np.asarray(self._matrix[np.sort(rows)])
+
+            exact = NumpyVectorStore._search(self, queries, None, k)
+            approximate = self._rescored_search(queries, None, k)
+
+        overlaps = [
+            len(set(exact_rows.tolist()) & set(approx_rows.tolist())) / max(1, len(exact_rows))
+            for (exact_rows, _), (approx_rows, _) in zip(exact, approximate)
+        ]
+        return {
+            "mode": self.mode,
+            "k": k,
+            "samples": len(queries),
+            "rescore_factor": self.rescore_factor,
+            "recall_at_k": float(np.mean(overlaps)),
+            "code_bytes_per_chunk": self.code_bytes_per_chunk(),
+            "float_bytes_per_chunk": (self.dimension or 0) * 4
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        code_bytes = self.code_bytes_per_chunk()
+        stats.update({
+            "mode": self.mode,
+            "rescore_factor": self.rescore_factor,
+            "bytes_per_chunk": code_bytes,
+            "index_ram_bytes": int(self._codes.nbytes) if self._codes is not None else 0,
+            "float_bytes_per_chunk_on_disk": (self.dimension or 0) * 4,
+            "compression_ratio": ((self.dimension or 0) * 4 / code_bytes) if code_bytes else None
+        })
+        return stats
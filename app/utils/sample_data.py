@@ -3,7 +3,7 @@ from app.db.models import Policy, Form, User
 from app.services.document_processor import DocumentProcessor
 import os
 
-async def create_sample_data(db: Session):
+async def create_sample_data(db: Session, processor: DocumentProcessor):
     """Create sample data for testing and demonstration"""
     
     # Create sample policies
@@ -202,7 +202,6 @@ async def create_sample_data(db: Session):
     db.commit()
     
     # Process policies into vector database
-    processor = DocumentProcessor()
     policies = db.query(Policy).all()
     
     for policy in policies:
@@ -216,7 +215,8 @@ async def create_sample_data(db: Session):
             file_path=temp_file,
             category=policy.category,
             title=policy.title,
-            description=f"Policy: {policy.title}"
+            description=f"Policy: {policy.title}",
+            policy_id=policy.id
         )
         
         # Clean up temp file
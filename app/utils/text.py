@@ -0,0 +1,55 @@
+import re
+from typing import List
+
+_PUNCTUATION = re.compile(r"[^\w\s$%/-]")
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"[\w$%]+(?:[-/.][\w$%]+)*")
+_TOKEN_SEPARATORS = re.compile(r"[-/.]")
+_INLINE_WHITESPACE = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES = re.compile(r"\n{2,}")
+# Sentence ends, plus the inline bullets and numbered headings left when ingest collapses line breaks
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])|\s+[-\u2022]\s+|\s+\d+\.\s+(?=[A-Z])")
+_LINE_MARKER = re.compile(r"^(?:#+|[-*\u2022]|\d+[.)])(?:\s+|$)")
+_LEADING_HEADING = re.compile(r"^(?:[A-Z&/()]{2,}\s+)+(?=[A-Z][a-z])")
+
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did',
+    'will', 'would', 'could', 'should', 'may', 'might', 'can', 'must'
+})
+
+def normalize_question(text: str) -> str:
+    """Normalise question text for use as a cache key (case, whitespace, punctuation)"""
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+def normalize_whitespace(text: str) -> str:
+    """Drop indentation, runs of spaces and blank lines while keeping line breaks"""
+    lines = (_INLINE_WHITESPACE.sub(" ", line).strip() for line in text.splitlines())
+    return _BLANK_LINES.sub("\n", "\n".join(lines)).strip()
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences and list items; line breaks always end one, and heading and list markers are dropped"""
+    sentences = []
+    for line in normalize_whitespace(text).splitlines():
+        for sentence in _SENTENCE_END.split(line):
+            sentence = _LEADING_HEADING.sub("", _LINE_MARKER.sub("", sentence))
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase search terms without stop words
+
+    Compound terms such as ``w-4`` or ``$200/night`` are kept whole and also
+    contribute their parts, so both exact and partial mentions match.
+    """
+    tokens = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        if token in STOP_WORDS:
+            continue
+        tokens.append(token)
+        if "-" in token or "/" in token or "." in token:
+            tokens.extend(part for part in _TOKEN_SEPARATORS.split(token) if part and part not in STOP_WORDS)
+    return tokens
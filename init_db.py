@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from sqlalchemy.orm import Session
 from app.db.database import engine, SessionLocal
 from app.db import models
+from app.core.container import ServiceContainer
 from app.utils.sample_data import create_sample_data
 
 def init_database():
@@ -26,7 +27,8 @@ def init_database():
     # Create sample data
     db = SessionLocal()
     try:
-        asyncio.run(create_sample_data(db))
+        container = ServiceContainer()
+        asyncio.run(create_sample_data(db, container.document_processor))
         print("Sample data loaded successfully!")
     except Exception as e:
         print(f"Error loading sample data: {e}")
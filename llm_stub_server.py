@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+OpenAI-compatible stub LLM server for load and resilience testing
+
+Serves /v1/chat/completions (plain and streaming) with injectable latency
+and failures, so the LLM client's timeouts, retries, hedging and circuit
+breaker can be exercised without calling OpenAI.
+
+    python llm_stub_server.py --port 8001 --latency-ms 800 --jitter-ms 400 --error-rate 0.1
+    OPENAI_BASE_URL=http://localhost:8001/v1 python start.py
+
+Latency and failures can be changed while it runs:
+
+    curl -X POST localhost:8001/stub/config -H 'Content-Type: application/json' -d '{"error_rate": 1.0}'
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="LLM stub server")
+
+config = {
+    "latency_ms": 500.0,   # base time before the answer (or first token)
+    "jitter_ms": 200.0,    # uniform extra latency
+    "slow_rate": 0.0,      # share of requests that take slow_ms instead
+    "slow_ms": 5000.0,
+    "error_rate": 0.0,     # share of requests answered with error_status
+    "error_status": 503,
+    "fail_next": 0,        # number of upcoming requests that fail whatever error_rate says
+    "token_delay_ms": 20.0 # delay between streamed tokens
+}
+stats = {"requests": 0, "errors": 0}
+
+def build_answer(messages):
+    """Answer with the first context lines of the prompt, so output depends on the input"""
+    prompt = messages[-1]["content"] if messages else ""
+    lines = [line.strip() for line in prompt.splitlines() if line.strip().startswith("Content:")]
+    excerpt = lines[0][len("Content:"):].strip()[:200] if lines else "No context was provided."
+    return f"According to the policy: {excerpt}"
+
+async def inject_latency():
+    if random.random() < config["slow_rate"]:
+        delay = config["slow_ms"]
+    else:
+        delay = config["latency_ms"] + random.uniform(0, config["jitter_ms"])
+    await asyncio.sleep(delay / 1000)
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    stats["requests"] += 1
+    await inject_latency()
+    if config["fail_next"] > 0 or random.random() < config["error_rate"]:
+        config["fail_next"] = max(0, config["fail_next"] - 1)
+        stats["errors"] += 1
+        return JSONResponse({"error": {"message": "Injected failure"}}, status_code=config["error_status"])
+
+    answer = build_answer(body.get("messages", []))
+    created = int(time.time())
+    model = body.get("model", "stub")
+
+    if not body.get("stream"):
+        return {
+            "id": f"chatcmpl-stub-{stats['requests']}",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}]
+        }
+
+    async def tokens():
+        for word in answer.split(" "):
+            chunk = {
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(config["token_delay_ms"] / 1000)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(tokens(), media_type="text/event-stream")
+
+@app.get("/stub/config")
+async def get_config():
+    return {"config": config, "stats": stats}
+
+@app.post("/stub/config")
+async def update_config(changes: dict):
+    """Change latency or failure injection at runtime"""
+    for key, value in changes.items():
+        if key in config:
+            config[key] = type(config[key])(value)
+    return {"config": config}
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    for key, value in config.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+    for key in config:
+        config[key] = getattr(args, key)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,23 @@ import time
 
 BASE_URL = "http://localhost:8000"
 
+# Excerpts of the sample policies, flattened the way ingest flattens chunk text
+FACT_POLICIES = {
+    "Paid Time Off (PTO) Policy": """
+        ELIGIBILITY All full-time employees are eligible for PTO after completing 90 days of employment.
+        ACCRUAL RATES - 0-2 years: 15 days per year - 3-5 years: 20 days per year - 6+ years: 25 days per year
+        REQUESTING PTO 1. Submit PTO requests at least 2 weeks in advance
+        CARRYOVER Up to 5 days may be carried over to the next year.
+    """,
+    "Travel and Expense Reimbursement Policy": """
+        ELIGIBLE EXPENSES - Hotel accommodations (up to $200/night) - Meals (up to $50/day)
+        SUBMISSION PROCESS 1. Submit within 30 days of travel 2. Processed within 10 business days of approval
+    """,
+    "Remote Work Policy": """
+        COMMUNICATION - Respond to communications within 2 hours
+    """
+}
+
 def test_health():
     """Test health endpoint"""
     print("Testing health endpoint...")
@@ -41,6 +58,197 @@ def test_query():
         else:
             print(f"Error: {response.status_code} - {response.text}")
 
+def test_fact_index():
+    """Test fact table matching offline, without the API server"""
+    print("\nTesting fact index...")
+    from app.services.fact_index import FactIndex
+    
+    index = FactIndex()
+    titles = list(FACT_POLICIES)
+    index.add(
+        [f"chunk-{i}" for i in range(len(titles))],
+        [" ".join(FACT_POLICIES[title].split()) for title in titles],
+        [{"title": title, "policy_id": i + 1} for i, title in enumerate(titles)]
+    )
+    
+    answered = {
+        "How many PTO days do I get after 4 years?": "20 days per year",
+        "What is the hotel limit per night?": "$200/night",
+        "How long do I have to submit expenses?": "30 days",
+        "How many days can I carry over?": "5 days"
+    }
+    # Questions sharing only a policy title word with a fact must fall through to retrieval
+    not_answered = [
+        "How many hours a week do remote employees work?",
+        "How long does remote work approval take?",
+        "How many days per week can I work from home?",
+        "How do I request PTO?"
+    ]
+    
+    failures = 0
+    for question, expected in answered.items():
+        match = index.match(question)
+        if match is None or expected not in match["answer"]:
+            failures += 1
+            print(f"  FAIL {question} -> {match and match['answer']}")
+    for question in not_answered:
+        match = index.match(question)
+        if match is not None:
+            failures += 1
+            print(f"  FAIL {question} -> {match['answer']}")
+    print(f"Fact index: {len(answered) + len(not_answered) - failures}/{len(answered) + len(not_answered)} passed")
+
+def test_llm_client():
+    """Test LLM client retries, circuit breaker and deadline offline, against the stub LLM server"""
+    print("\nTesting LLM client...")
+    import asyncio
+    import socket
+    import threading
+    import uvicorn
+    import llm_stub_server as stub
+    from app.services.llm_client import LLMClient, LLMError, CircuitBreaker, CircuitOpenError
+    
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(stub.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    
+    base_url = f"http://127.0.0.1:{port}/v1"
+    messages = [{"role": "user", "content": "Content: Submit PTO requests at least 2 weeks in advance."}]
+    
+    async def run_checks():
+        checks = {}
+        
+        # One injected 503, then a normal answer
+        stub.config.update(latency_ms=10.0, jitter_ms=0.0, error_rate=0.0, fail_next=1)
+        client = LLMClient(api_key="", model="stub", base_url=base_url, max_retries=2, backoff_seconds=0.01, hedge=False)
+        answer = await client.chat(messages)
+        checks["retried 5xx succeeds"] = answer.startswith("According to the policy") and client.retries == 1
+        await client.close()
+        
+        # Every request fails; after three failed calls the fourth must not reach the server
+        stub.config.update(error_rate=1.0)
+        client = LLMClient(api_key="", model="stub", base_url=base_url, max_retries=0, hedge=False,
+                           breaker=CircuitBreaker(failure_threshold=3, reset_seconds=60))
+        for _ in range(3):
+            try:
+                await client.chat(messages)
+            except LLMError:
+                pass
+        requests_before = stub.stats["requests"]
+        try:
+            await client.chat(messages)
+            rejected = False
+        except CircuitOpenError:
+            rejected = True
+        checks["breaker opens after failures"] = (
+            rejected and client.breaker.state == "open" and stub.stats["requests"] == requests_before
+        )
+        await client.close()
+        
+        # Answers take 2 seconds; a 0.3 second deadline covers every retry
+        stub.config.update(error_rate=0.0, latency_ms=2000.0)
+        client = LLMClient(api_key="", model="stub", base_url=base_url, timeout=0.3, max_retries=2,
+                           backoff_seconds=0.01, hedge=False)
+        started = time.perf_counter()
+        try:
+            await client.chat(messages)
+            timed_out = False
+        except LLMError:
+            timed_out = True
+        checks["call past its deadline fails"] = timed_out and time.perf_counter() - started < 1.0
+        await client.close()
+        return checks
+    
+    defaults = dict(stub.config)
+    try:
+        checks = asyncio.run(run_checks())
+    finally:
+        stub.config.update(defaults)
+        server.should_exit = True
+        thread.join()
+    
+    for name, passed in checks.items():
+        if not passed:
+            print(f"  FAIL {name}")
+    print(f"LLM client: {sum(checks.values())}/{len(checks)} passed")
+
+def test_vector_stores():
+    """Test every local vector store backend offline: writes, filters, reopening and recall against exact search"""
+    print("\nTesting vector stores...")
+    import shutil
+    import tempfile
+    import numpy as np
+    from app.services.vector_stores.factory import create_vector_store
+    
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(3000, 32)).astype(np.float32)
+    queries = vectors[:100] + 0.5 * rng.normal(size=(100, 32)).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    metadatas = [{"category": "ABC"[i % 3], "parity": i % 2} for i in range(len(vectors))]
+    
+    # Exact top 10 by cosine similarity, the baseline every backend is held to
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    exact = np.argsort(-(unit @ queries.T), axis=0)[:10].T
+    recall_floors = {"numpy": 1.0, "int8": 0.95, "binary": 0.7, "ivf": 0.55, "partitioned": 1.0}
+    
+    failed_backends = 0
+    for backend, floor in recall_floors.items():
+        path = tempfile.mkdtemp()
+        try:
+            store = create_vector_store(backend, path)
+            for start in range(0, len(vectors), 1000):
+                store.add(ids[start:start + 1000], vectors[start:start + 1000],
+                          metadatas[start:start + 1000], [f"document {i}" for i in range(start, start + 1000)])
+            
+            found = store.query(queries, n_results=10, include=["distances"])["ids"]
+            recall = float(np.mean([
+                len({ids[row] for row in rows} & set(hits)) / 10 for rows, hits in zip(exact, found)
+            ]))
+            
+            checks = {f"recall@10 {recall:.3f} >= {floor}": recall >= floor}
+            filtered = store.query(queries[:5], n_results=10, where={"category": "B"}, include=["metadatas"])
+            checks["partition field filter"] = all(
+                len(rows) == 10 and all(metadata["category"] == "B" for metadata in rows) for rows in filtered["metadatas"]
+            )
+            filtered = store.query(queries[:5], n_results=10, where={"parity": 1}, include=["metadatas"])
+            checks["other field filter"] = all(
+                len(rows) == 10 and all(metadata["parity"] == 1 for metadata in rows) for rows in filtered["metadatas"]
+            )
+            ids_only = store.get(ids=ids[:3], include=[])
+            checks["empty include returns ids only"] = (
+                ids_only["ids"] == ids[:3] and ids_only["documents"] is None and ids_only["metadatas"] is None
+            )
+            
+            store.delete(where={"category": "C"})
+            remaining = set(store.get(include=[])["ids"])
+            checks["delete by filter"] = (
+                store.count() == 2000 and not store.get(where={"category": "C"}, include=[])["ids"]
+                and remaining == {chunk_id for chunk_id, metadata in zip(ids, metadatas) if metadata["category"] != "C"}
+            )
+            before = store.query(queries[:5], n_results=10)
+            
+            reopened = create_vector_store(backend, path)
+            after = reopened.query(queries[:5], n_results=10)
+            checks["reopen"] = (
+                reopened.count() == 2000 and set(reopened.get(include=[])["ids"]) == remaining
+                and after["ids"] == before["ids"] and after["documents"] == before["documents"]
+                and after["metadatas"] == before["metadatas"]
+            )
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+        
+        for name, passed in checks.items():
+            if not passed:
+                print(f"  FAIL {backend}: {name}")
+        failed_backends += not all(checks.values())
+        print(f"  {backend}: recall@10 {recall:.3f}, {sum(checks.values())}/{len(checks)} checks passed")
+    print(f"Vector stores: {len(recall_floors) - failed_backends}/{len(recall_floors)} backends passed")
+
 def test_policies():
     """Test policies endpoint"""
     print("\nTesting policies endpoint...")
@@ -86,6 +294,10 @@ def main():
     print("HR Copilot API Test Suite")
     print("=" * 40)
     
+    test_fact_index()
+    test_llm_client()
+    test_vector_stores()
+    
     try:
         test_health()
         test_policies()